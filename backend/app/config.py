@@ -21,6 +21,10 @@ class Settings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     USE_REDIS: bool = False
     
+    # Ayrı matchmaker süreci (python -m app.matchmaker) için Unix socket yolu.
+    # Boşsa her worker kendi in-memory kuyruğunu kullanır.
+    MATCHMAKER_SOCKET: str = ""
+    
     # JWT Settings (for admin auth)
     JWT_SECRET_KEY: str = "omechat-super-secret-key-change-this-in-production-2024"
     JWT_ALGORITHM: str = "HS256"
@@ -29,9 +33,39 @@ class Settings(BaseSettings):
     # Session Settings
     SESSION_TOKEN_LENGTH: int = 64
     SESSION_TIMEOUT_MINUTES: int = 30
+    SESSION_CACHE_TTL_SECONDS: int = 300  # /ws/signaling token doğrulama cache'i (worker başına)
+    SESSION_CACHE_MAX_SIZE: int = 100000
     
     # Matchmaking
     MATCH_TIMEOUT_SECONDS: int = 60
+    QUEUE_POSITION_PUSH_INTERVAL_MS: int = 1000  # Toplu QUEUE_POSITION güncellemesi
+    ONLINE_COUNT_BROADCAST_INTERVAL_MS: int = 2000  # ONLINE_COUNT_UPDATE (sadece sayı değiştiyse)
+    BROADCAST_CONCURRENCY: int = 64  # Broadcast'te aynı anda yazılan en fazla socket
+    WS_OUTBOUND_QUEUE_SIZE: int = 256  # Socket başına giden mesaj kuyruğu
+    WS_SLOW_CONSUMER_POLICY: str = "drop_oldest"  # Kuyruk dolunca: drop_oldest veya disconnect
+    ICE_BATCH_WINDOW_MS: int = 0  # >0: bu pencerede gelen ICE adayları tek ICE_CANDIDATES olarak iletilir (istemci desteği gerekir)
+    MATCHING_MODE: str = "greedy"  # greedy: join anında FIFO, batch: periyodik puanlı turlar (numpy)
+    MATCH_ROUND_INTERVAL_MS: int = 250
+    MATCH_ROUND_MAX_SIZE: int = 1000  # Tur başına en fazla kişi (n^2 puan matrisi)
+    RECENT_PARTNER_WINDOW_SECONDS: int = 600  # Bu süre içinde aynı kişiyle tekrar eşleşme yok
+    RECENT_PARTNERS_PER_SESSION: int = 5
+    RECENT_PARTNERS_MAX_SESSIONS: int = 100000
+    RECONNECT_WINDOW_SECONDS: int = 120  # RECONNECT ile son partnere dönülebilecek süre
+    MATCH_PRIORITY_BOOST_SECONDS: int = 15  # Premium/VIP öne geçişi; normal kullanıcı en fazla bu kadar geciktirilir
+    MATCH_QUEUE_MAX_SIZE: int = 50000  # Kuyruk üst sınırı (0 = sınırsız), dolunca JOIN reddedilir
+    MATCH_BUCKET_MAX_SIZE: int = 5000  # Tek kova (filtre + cinsiyet/ülke/dil) üst sınırı (0 = sınırsız)
+    QUEUE_BUSY_RETRY_AFTER_SECONDS: int = 5  # QUEUE_BUSY'de önerilen bekleme (1-2 katı arası dağıtılır)
+    MATCHMAKING_SNAPSHOT_PATH: str = ""  # In-memory durum dosyası (boş = kapalı, sadece tek worker'da aç)
+    MATCHMAKING_RESTORE_GRACE_SECONDS: int = 30  # Geri yüklenen session'ların socket'i için bekleme
+    
+    # connections tablosuna write-behind kayıt
+    CONNECTION_LOG_FLUSH_INTERVAL_MS: int = 250
+    CONNECTION_LOG_BATCH_SIZE: int = 500  # Bu kadar olay birikince beklemeden yaz
+    CONNECTION_LOG_MAX_PENDING: int = 100000  # DB yazılamazsa tamponda tutulacak en fazla olay
+    
+    # GeoIP (yerel MaxMind .mmdb, yoksa country boş kalır)
+    GEOIP_DB_PATH: str = "data/GeoLite2-Country.mmdb"
+    GEOIP_CACHE_SIZE: int = 65536  # IP başına LRU kayıt sayısı
     
     # STUN/TURN Configuration - Google'ın ücretsiz STUN sunucuları
     STUN_SERVERS: List[str] = [
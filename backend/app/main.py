@@ -1,6 +1,9 @@
 """
 OmeChat Backend - Main Application Entry Point
 """
+import asyncio
+import signal
+import threading
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,10 +17,31 @@ from fastapi.staticfiles import StaticFiles
 from app.routes import public, admin, websocket, auth, features, friends, chat, points, upload
 
 from app.database import create_tables
+from app.services.connection_log import get_connection_log
 
 settings = get_settings()
 
 
+def _flag_shutdown_on_signals(service) -> None:
+    """
+    SIGINT/SIGTERM'de service.shutting_down'ı işaretle, sonra önceki handler'a
+    (uvicorn) devret. uvicorn açık socket'leri lifespan kapanışından önce 1012
+    ile kapatır; route sunucu kapanışını istemcinin 1012'sinden bununla ayırır.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        previous = signal.getsignal(sig)
+        if not callable(previous):
+            continue
+
+        def handler(signum, frame, previous=previous):
+            service.shutting_down = True
+            previous(signum, frame)
+
+        signal.signal(sig, handler)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup: Tabloları oluştur (Development için)
@@ -25,11 +49,37 @@ async def lifespan(app: FastAPI):
     if settings.DEBUG:
         print("Creating database tables...")
         create_tables()
+    
+    # Matchmaking (Redis modunda pub/sub relay ve sayaç yenileme)
+    await websocket.mm_service.start()
+    _flag_shutdown_on_signals(websocket.mm_service)
+    
+    # Kuyruk sırası değişenlere toplu QUEUE_POSITION gönderimi
+    background_tasks = [asyncio.create_task(websocket.push_queue_positions())]
+    
+    # Online sayısı (periyodik, sadece değiştiğinde; her worker kendi socket'lerine)
+    background_tasks.append(asyncio.create_task(websocket.broadcast_online_count()))
+    
+    # Süresi dolan kuyruk kayıtları (timing wheel, saniyede bir tick)
+    background_tasks.append(asyncio.create_task(websocket.expire_queue_entries()))
+    
+    # connections tablosuna toplu (write-behind) yazım
+    connection_log = get_connection_log()
+    background_tasks.append(asyncio.create_task(connection_log.run()))
+    
+    # Toplu eşleştirme turları (MATCHING_MODE=batch)
+    if websocket.mm_service.batch_matching:
+        background_tasks.append(asyncio.create_task(websocket.run_match_rounds()))
         
     yield
     
     # Shutdown: Kaynakları temizle (varsa Redis connection vs.)
     print("Shutting down...")
+    websocket.mm_service.shutting_down = True
+    for task in background_tasks:
+        task.cancel()
+    await websocket.mm_service.stop()
+    await connection_log.close()
 
 
 app = FastAPI(
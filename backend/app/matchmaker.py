@@ -0,0 +1,63 @@
+"""
+OmeChat Matchmaker - Çok worker'lı kurulum için tek kuyruk sahibi süreç
+
+Kuyruk ve bağlantı durumu bu süreçteki MatchmakingService'te tutulur;
+web worker'ları MATCHMAKER_SOCKET üzerinden bağlanır (matchmaker_ipc).
+Sıra bildirimi, süre dolumu, toplu eşleştirme turları ve connections
+tablosuna yazım da burada çalışır.
+
+Kullanım (backend/ klasöründen):
+    MATCHMAKER_SOCKET=/tmp/omechat-mm.sock python -m app.matchmaker
+    MATCHMAKER_SOCKET=/tmp/omechat-mm.sock uvicorn app.main:app --workers 4
+"""
+import asyncio
+
+from app.config import get_settings
+from app.services.matchmaking import create_local_matchmaking_service, use_matchmaking_service
+from app.services.matchmaker_ipc import MatchmakerServer
+from app.services.connection_log import get_connection_log
+
+
+async def run() -> None:
+    settings = get_settings()
+    if not settings.MATCHMAKER_SOCKET:
+        raise SystemExit("MATCHMAKER_SOCKET is not set")
+
+    service = create_local_matchmaking_service(settings)
+    use_matchmaking_service(service)
+    # Önceki çalışmanın snapshot'ı: worker'lar yeniden bağlanıp socket'leri kaydettikçe devam eder
+    await service.start()
+
+    # Route'lardaki background loop'lar bu süreçte in-memory servisi kullanır
+    from app.routes import websocket
+
+    server = MatchmakerServer(service, settings.MATCHMAKER_SOCKET)
+    await server.start()
+    print(f"Matchmaker listening on {settings.MATCHMAKER_SOCKET}")
+
+    connection_log = get_connection_log()
+    background_tasks = [
+        asyncio.create_task(connection_log.run()),
+        asyncio.create_task(websocket.push_queue_positions()),
+        asyncio.create_task(websocket.expire_queue_entries()),
+    ]
+    if service.batch_matching:
+        background_tasks.append(asyncio.create_task(websocket.run_match_rounds()))
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        print("Matchmaker shutting down...")
+        for task in background_tasks:
+            task.cancel()
+        # Worker bağlantıları kapanınca session'lar temizleneceği için snapshot önce alınır
+        await service.stop()
+        await server.stop()
+        await connection_log.close()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
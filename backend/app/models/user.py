@@ -65,3 +65,15 @@ class User(Base):
         if self.is_premium and self.premium_until and self.premium_until > datetime.utcnow():
             return True
         return self.country_filter_unlocked
+    
+    def can_use_reconnect(self) -> bool:
+        """Check if user can reconnect to previous partner (premium or unlocked)"""
+        if self.is_premium and self.premium_until and self.premium_until > datetime.utcnow():
+            return True
+        return self.reconnect_unlocked
+    
+    def has_match_priority(self) -> bool:
+        """Check if user gets the priority lane in matchmaking (premium or VIP)"""
+        if self.is_premium and self.premium_until and self.premium_until > datetime.utcnow():
+            return True
+        return self.vip_badge_unlocked
@@ -15,6 +15,7 @@ from app.services.auth import verify_password, create_access_token, decode_acces
 from app.services.ban import list_bans, create_ban, deactivate_ban
 from app.services.reporting import list_reports, update_report_status, count_pending_reports
 from app.services.matchmaking import get_matchmaking_service
+from app.services.outbound import outbound_stats
 from app.schemas.admin import (
     AdminLoginRequest, AdminLoginResponse,
     BanCreateRequest, BanResponse, BanUpdateRequest,
@@ -93,7 +94,7 @@ def get_stats_overview(
     db: Session = Depends(get_db),
     current_admin: Admin = Depends(get_current_admin)
 ):
-    mm_service = get_matchmaking_service()
+    mm_stats = get_matchmaking_service().stats()
     
     # Get real user counts
     total_users = db.query(func.count(User.id)).scalar() or 0
@@ -114,10 +115,22 @@ def get_stats_overview(
     
     return {
         "total_users": total_users,
-        "online_users": mm_service.online_count,
+        "online_users": mm_stats.online_users,
         "premium_users": premium_users,
         "banned_users": banned_users,
-        "active_connections": mm_service.active_connections_count,
+        "active_connections": mm_stats.active_connections,
+        "in_queue": mm_stats.in_queue,
+        "queue_fairness": {
+            "priority_wait_sec": mm_stats.priority_wait_sec,
+            "normal_wait_sec": mm_stats.normal_wait_sec,
+            "total_overtakes": mm_stats.total_overtakes,
+            "max_overtake_sec": mm_stats.max_overtake_sec,
+        },
+        "websocket_outbound": outbound_stats(),
+        "queue_admission": {
+            "rejected_global": mm_stats.rejected_global,
+            "rejected_bucket": mm_stats.rejected_bucket,
+        },
         "users_today": users_today,
         "pending_reports": pending_reports,
         "total_reports": total_reports,
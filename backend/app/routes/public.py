@@ -14,6 +14,8 @@ from app.models.ban import Ban
 from app.services.ban import check_ban
 from app.services.reporting import create_report
 from app.services.matchmaking import get_matchmaking_service
+from app.services.geoip import get_geoip_resolver
+from app.services.session_cache import CachedSession, get_session_cache
 from app.schemas.session import (
     SessionStartRequest, SessionStartResponse,
     SessionHeartbeatRequest, SessionHeartbeatResponse
@@ -45,7 +47,10 @@ def start_session(
             detail=f"Erişiminiz engellendi. Sebep: {active_ban.reason}"
         )
     
-    # 2. Yeni session oluştur
+    # 2. Ülke (yerel mmdb + LRU; senkron endpoint threadpool'da, event loop'u bloklamaz)
+    geo = get_geoip_resolver().lookup(client_ip)
+    
+    # 3. Yeni session oluştur
     session_token = token_urlsafe(settings.SESSION_TOKEN_LENGTH // 2)  # bytes to hex string length approx
     
     new_session = UserSession(
@@ -55,13 +60,16 @@ def start_session(
         device_fingerprint=request.device_fingerprint,
         gender=Gender(request.gender) if request.gender else Gender.UNSPECIFIED,
         user_agent=req.headers.get("user-agent"),
-        # GeoIP eklenebilir: country=get_country(client_ip)
+        country=geo.country,
     )
     
     db.add(new_session)
     db.commit()
     db.refresh(new_session)
     
+    # WebSocket el sıkışması bu session'ı DB'ye inmeden doğrular
+    get_session_cache().put(session_token, CachedSession.from_model(new_session))
+    
     return SessionStartResponse(
         session_id=str(new_session.id),
         session_token=session_token,
@@ -133,13 +141,8 @@ def submit_report(
 
 @router.get("/online-count")
 def get_online_count():
-    """Anlık çevrimiçi kullanıcı sayısı"""
-    matchmaking_service = get_matchmaking_service()
-    return {
-        "online_users": matchmaking_service.online_count,
-        "in_queue": matchmaking_service.queue_size,
-        "active_connections": matchmaking_service.active_connections_count
-    }
+    """Anlık çevrimiçi kullanıcı sayısı ve tipik bekleme süresi (estimated_wait_sec)"""
+    return get_matchmaking_service().stats().as_dict()
 
 
 @router.get("/health")
@@ -2,23 +2,38 @@
 WebSocket Routes - Signaling and Matchmaking
 The core of the real-time functionality.
 """
-import json
 import asyncio
 from uuid import UUID
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from sqlalchemy.orm import Session
 
+from app.config import get_settings
 from app.database import get_session_local
-from app.services.matchmaking import get_matchmaking_service, QueuedUser
-from app.models.user_session import UserSession
+from app.services.matchmaking import get_matchmaking_service, QueueFullError, QueuedUser
+from app.services.outbound import OutboundSocket
+from app.services.fanout import fanout
+from app.services.session_cache import get_session_cache
+from app.services.signaling_codec import (
+    Frame, decode_client_message, decode_client_msgpack, loads, negotiate_subprotocol, unpack, wrap_socket,
+)
+from app.schemas.websocket import (
+    AnswerMessage, ChatMessageSend, IceCandidateMessage, JoinQueueMessage, OfferMessage,
+)
+from app.models.user_session import Gender
 from app.models.connection import EndedReason
+from app.services.auth_service import decode_access_token, get_user_by_id
 
 router = APIRouter()
 mm_service = get_matchmaking_service()
+settings = get_settings()
+
+# uvicorn kapanırken açık socket'leri 1012 (Service Restart) ile kapatır.
+# İstemci de 1012 gönderebilir; sunucu kapanışı mm_service.shutting_down ile ayırt edilir
+SERVICE_RESTART_CLOSE_CODE = 1012
 
 
 from app.services.auth import get_current_user_ws
-from typing import List
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
 
 # --- AUTHENTICATED CHAT MANAGER ---
 class ConnectionManager:
@@ -26,11 +41,14 @@ class ConnectionManager:
         # user_id -> List[WebSocket] (support multiple devices)
         self.active_connections: dict[UUID, List[WebSocket]] = {}
 
-    async def connect(self, user_id: UUID, websocket: WebSocket):
-        await websocket.accept()
+    async def connect(self, user_id: UUID, websocket: WebSocket, subprotocol: Optional[str] = None):
+        """Kabul et ve kaydet; kaydedilen (ve dönen) alt protokole göre sarılmış socket'tir"""
+        await websocket.accept(subprotocol=subprotocol)
+        connection = wrap_socket(websocket, subprotocol)
         if user_id not in self.active_connections:
             self.active_connections[user_id] = []
-        self.active_connections[user_id].append(websocket)
+        self.active_connections[user_id].append(connection)
+        return connection
 
     def disconnect(self, user_id: UUID, websocket: WebSocket):
         if user_id in self.active_connections:
@@ -40,12 +58,10 @@ class ConnectionManager:
                 del self.active_connections[user_id]
 
     async def send_personal_message(self, message: dict, user_id: UUID):
-        if user_id in self.active_connections:
-            for connection in self.active_connections[user_id]:
-                try:
-                    await connection.send_text(json.dumps(message))
-                except Exception:
-                    pass
+        # Kullanıcının tüm cihazlarına tek serileştirme ile, eşzamanlı
+        connections = self.active_connections.get(user_id)
+        if connections:
+            await fanout(list(connections), message, settings.BROADCAST_CONCURRENCY)
 
 manager = ConnectionManager()
 
@@ -65,12 +81,15 @@ async def chat_websocket_endpoint(websocket: WebSocket, token: str):
             await websocket.close(code=4001)
             return
             
-        await manager.connect(user.id, websocket)
+        subprotocol = negotiate_subprotocol(websocket)
+        connection = await manager.connect(user.id, websocket, subprotocol)
         
         try:
             while True:
-                data = await websocket.receive_text()
-                message = json.loads(data)
+                if subprotocol:
+                    message = unpack(await websocket.receive_bytes())
+                else:
+                    message = loads(await websocket.receive_text())
                 
                 # Handle incoming messages specific to chat logic if needed
                 # Ideally, sending messages is done via REST API (/api/v1/chat/send)
@@ -81,7 +100,7 @@ async def chat_websocket_endpoint(websocket: WebSocket, token: str):
                      pass
                      
         except WebSocketDisconnect:
-            manager.disconnect(user.id, websocket)
+            manager.disconnect(user.id, connection)
             
     except Exception as e:
         print(f"Auth WS Error: {e}")
@@ -89,83 +108,200 @@ async def chat_websocket_endpoint(websocket: WebSocket, token: str):
 
 # --- EXISTING ANONYMOUS MATCHMAKING ---
 @router.websocket("/ws/signaling")
-async def websocket_endpoint(websocket: WebSocket, session_token: str):
+async def websocket_endpoint(websocket: WebSocket, session_token: str, auth_token: Optional[str] = None):
     """
     WebSocket endpoint for signaling and matchmaking.
     Requires a valid session_token as query parameter.
+    Optional auth_token (user JWT) unlocks gender/country filters for
+    users who bought them or have active premium.
     """
-    # 1. Connection Accept & Validation
-    await websocket.accept()
+    # 1. Connection Accept & Validation (istemci isterse msgpack alt protokolü, yoksa JSON)
+    subprotocol = negotiate_subprotocol(websocket)
+    await websocket.accept(subprotocol=subprotocol)
     
-    # Get sessionmaker and create a session instance
-    SessionLocal = get_session_local()
-    db = SessionLocal()
-    try:
-        session = db.query(UserSession).filter(UserSession.session_token == session_token).first()
-        
-        if not session or not session.is_active:
-            await websocket.close(code=4001, reason="Invalid session")
-            db.close()
-            return
-            
-        session_id = session.id
-        gender = session.gender.value if session.gender else "UNSPECIFIED"
-        
-    finally:
-        db.close()
+    # Session: önce token cache (session/start'ta doldurulur), kaçarsa DB thread'de
+    session = await get_session_cache().get_or_load(session_token)
+    if not session or not session.is_active:
+        await websocket.close(code=4001, reason="Invalid session")
+        return
+    
+    session_id = session.session_id
+    profile = {
+        "gender": session.gender,
+        "country": session.country,
+        "language": None,
+        "can_use_gender_filter": False,
+        "can_use_country_filter": False,
+        "can_use_reconnect": False,
+        "priority": False,
+    }
+    
+    # Giriş yapmış kullanıcı: filtre hakları ve dil (DB sorgusu event loop dışında)
+    if auth_token:
+        token_data = decode_access_token(auth_token)
+        if token_data:
+            profile.update(await asyncio.to_thread(_user_profile, token_data.sub))
         
-    # 2. Register WebSocket
-    await mm_service.register_websocket(session_id, websocket)
+    # 2. Register WebSocket (giden mesajlar socket'in kendi kuyruğu ve writer task'ı ile)
+    outbound = OutboundSocket(wrap_socket(websocket, subprotocol), settings.WS_OUTBOUND_QUEUE_SIZE, settings.WS_SLOW_CONSUMER_POLICY)
+    await mm_service.register_websocket(session_id, outbound)
+    client = SignalingClient(session_id, session_token, profile, outbound)
+    # msgpack binary, JSON text frame'lerle konuşur; diğer türdeki frame geçersiz mesajdır
+    if subprotocol:
+        frame_key, decode = "bytes", decode_client_msgpack
+    else:
+        frame_key, decode = "text", decode_client_message
     
     try:
-        # 3. Message Loop
+        # 3. Message Loop (doğrulanmış mesaj, tipine göre tablodan handler'a)
         while True:
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            msg_type = message.get("type")
+            data = await _receive_frame(websocket, frame_key)
+            try:
+                if data is None:
+                    raise ValueError(f"expected a {frame_key} frame")
+                message = decode(data)
+            except ValueError:
+                await send_json(outbound, {
+                    "type": "ERROR",
+                    "code": "INVALID_MESSAGE",
+                    "message": "Unknown message type or invalid fields"
+                })
+                continue
+            await SIGNALING_HANDLERS[message.type](client, message)
             
-            if msg_type == "JOIN_QUEUE":
-                await handle_join_queue(session_id, session_token, gender, websocket)
-                
-            elif msg_type == "LEAVE_QUEUE":
-                await mm_service.leave_queue(session_id)
-                
-            elif msg_type == "NEXT":
-                await handle_next(session_id)
-                
-            elif msg_type == "OFFER":
-                await forward_signal(session_id, message)
-                
-            elif msg_type == "ANSWER":
-                await forward_signal(session_id, message)
-                
-            elif msg_type == "ICE_CANDIDATE":
-                await forward_signal(session_id, message)
-                
-            elif msg_type == "CHAT_MESSAGE":
-                await forward_chat(session_id, message)
-                
-    except WebSocketDisconnect:
+    except WebSocketDisconnect as e:
+        if e.code == SERVICE_RESTART_CLOSE_CODE and mm_service.shutting_down and mm_service.restores_sessions:
+            # Sunucu yeniden başlıyor: kuyruk/bağlantı snapshot'a yazılacak,
+            # sadece socket kaydı kaldırılır (istemci yeniden bağlanınca devam eder)
+            await mm_service.unregister_websocket(session_id)
+            return
         # Handle disconnect (automatic leave queue/end match)
-        partner_id = await mm_service.cleanup_session(session_id)
-        if partner_id:
-            await notify_partner_end(partner_id, "DISCONNECTED")
+        await _end_session(session_id)
             
     except Exception as e:
         print(f"WebSocket Error for {session_id}: {e}")
-        await mm_service.cleanup_session(session_id)
+        await _end_session(session_id)
+    
+    finally:
+        client.discard_ice_candidates()
+        outbound.close()
+
+
+async def _receive_frame(websocket: WebSocket, key: str) -> Optional[Union[str, bytes]]:
+    """Sıradaki frame'in verisi ("text"/"bytes"); diğer türde frame ise None"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    return message.get(key)
+
+
+async def _end_session(session_id: UUID) -> None:
+    """Socket kapandı: kuyruk/eşleşmeyi temizle, partnere MATCH_ENDED"""
+    partner_id = await mm_service.cleanup_session(session_id)
+    if partner_id:
+        await notify_partner_end(partner_id, "DISCONNECTED")
 
 
-async def handle_join_queue(session_id: UUID, token: str, gender: str, ws: WebSocket):
+def _user_profile(user_id) -> dict:
+    """Giriş yapmış kullanıcının eşleşme hakları (thread'de çalışır)"""
+    db = get_session_local()()
+    try:
+        user = get_user_by_id(db, user_id)
+        if not user or not user.is_active:
+            return {}
+        return {
+            "language": user.language_code,
+            "can_use_gender_filter": user.can_use_gender_filter(),
+            "can_use_country_filter": user.can_use_country_filter(),
+            "can_use_reconnect": user.can_use_reconnect(),
+            "priority": user.has_match_priority(),
+        }
+    finally:
+        db.close()
+
+
+class SignalingClient:
+    """Bir /ws/signaling bağlantısının handler'lara geçen bilgileri"""
+    
+    __slots__ = ("session_id", "session_token", "profile", "ws", "ice_pending", "ice_flush", "signal_lock")
+    
+    def __init__(self, session_id: UUID, session_token: str, profile: dict, ws: OutboundSocket):
+        self.session_id = session_id
+        self.session_token = session_token
+        self.profile = profile
+        self.ws = ws
+        # ICE_BATCH_WINDOW_MS içinde biriken, eşe henüz iletilmemiş adaylar
+        self.ice_pending: List[dict] = []
+        self.ice_flush: Optional[asyncio.Task] = None
+        # Zamanlayıcıyla gönderilen adaylar ile SDP'nin sırası karışmasın
+        self.signal_lock = asyncio.Lock()
+    
+    def discard_ice_candidates(self) -> None:
+        """Bekleyen adayları at (eşleşme değişiyor veya socket kapandı)"""
+        if self.ice_flush is not None:
+            self.ice_flush.cancel()
+            self.ice_flush = None
+        self.ice_pending = []
+
+
+def _requested_filters(profile: dict, message: JoinQueueMessage):
+    """JOIN_QUEUE içindeki filtreleri kullanıcının haklarına göre süz"""
+    preferred_gender = message.preferred_gender
+    if preferred_gender not in Gender.__members__ or preferred_gender == Gender.UNSPECIFIED.value:
+        preferred_gender = None
+    
+    preferred_country = message.preferred_country
+    if preferred_country is None or len(preferred_country) != 2:
+        preferred_country = None
+    else:
+        preferred_country = preferred_country.upper()
+    
+    locked = []
+    if preferred_gender and not profile["can_use_gender_filter"]:
+        preferred_gender = None
+        locked.append("gender_filter")
+    if preferred_country and not profile["can_use_country_filter"]:
+        preferred_country = None
+        locked.append("country_filter")
+    
+    return preferred_gender, preferred_country, locked
+
+
+async def handle_join_queue(session_id: UUID, token: str, profile: dict, message: JoinQueueMessage, ws: OutboundSocket):
     """Kuyruğa katıl ve eşleşme varsa başlat"""
+    preferred_gender, preferred_country, locked = _requested_filters(profile, message)
+    if locked:
+        # Filtre hakkı yok: filtresiz devam et, istemciye bildir
+        await send_json(ws, {
+            "type": "ERROR",
+            "code": "FILTER_LOCKED",
+            "message": ",".join(locked)
+        })
+    
+    language = message.language or profile["language"]
+    
     user = QueuedUser(
         session_id=session_id, 
         session_token=token,
-        gender=gender,
-        websocket=ws
+        gender=profile["gender"],
+        preferred_gender=preferred_gender,
+        country=profile["country"],
+        preferred_country=preferred_country,
+        language=language,
+        websocket=ws,
+        priority=profile["priority"],
     )
     
-    match_result = await mm_service.join_queue(user)
+    try:
+        match_result = await mm_service.join_queue(user)
+    except QueueFullError as e:
+        # Admission control: kuyruk/kova dolu, istemci retry_after_sec sonra tekrar denesin
+        await send_json(ws, {
+            "type": "QUEUE_BUSY",
+            "scope": e.scope,
+            "retry_after_sec": e.retry_after
+        })
+        return
     
     if match_result:
         # Eşleşme oldu!
@@ -178,35 +314,21 @@ async def handle_join_queue(session_id: UUID, token: str, gender: str, ws: WebSo
             "is_initiator": is_initiator
         })
         
-        # Partnera bildir
-        partner_ws = mm_service.get_websocket(partner_id)
-        if partner_ws:
-            await send_json(partner_ws, {
-                "type": "MATCH_FOUND",
-                "connection_id": str(connection_id),
-                "is_initiator": not is_initiator
-            })
+        # Partnera bildir (Redis modunda başka worker'da olabilir)
+        await mm_service.deliver(partner_id, {
+            "type": "MATCH_FOUND",
+            "connection_id": str(connection_id),
+            "is_initiator": not is_initiator
+        })
     else:
-        # Kuyruğa alındık
+        # Kuyruğa alındık (diğer socket'lere sayı broadcast_online_count ile toplu gider)
         position = await mm_service.get_queue_position(session_id)
-        online_count = mm_service.online_count
         await send_json(ws, {
             "type": "QUEUE_POSITION",
             "position": position or 1,
-            "online_count": online_count
+            "estimated_wait_sec": mm_service.estimated_wait(session_id),
+            "online_count": mm_service.online_count
         })
-        
-        # Tüm bağlı WebSocket'lere online count güncellemesi gönder
-        all_websockets = mm_service.get_all_websockets()
-        for sid, other_ws in all_websockets.items():
-            if sid != session_id:
-                try:
-                    await send_json(other_ws, {
-                        "type": "ONLINE_COUNT_UPDATE",
-                        "count": online_count
-                    })
-                except Exception:
-                    pass  # Ignore errors
 
 
 async def handle_next(session_id: UUID):
@@ -225,44 +347,236 @@ async def handle_next(session_id: UUID):
         })
 
 
+async def handle_reconnect(session_id: UUID, profile: dict, ws: OutboundSocket):
+    """Son partnerle kuyruğu atlayarak tekrar bağlan (reconnect_unlocked / premium)"""
+    if not profile["can_use_reconnect"]:
+        await send_json(ws, {
+            "type": "ERROR",
+            "code": "FEATURE_LOCKED",
+            "message": "reconnect"
+        })
+        return
+    
+    result = await mm_service.reconnect(session_id)
+    if not result:
+        # Pencere geçti, partner çevrimdışı veya başka biriyle eşleşmiş
+        await send_json(ws, {
+            "type": "ERROR",
+            "code": "RECONNECT_UNAVAILABLE",
+            "message": "Previous partner is not available"
+        })
+        return
+    
+    connection_id, partner_id, is_initiator = result
+    await send_json(ws, {
+        "type": "MATCH_FOUND",
+        "connection_id": str(connection_id),
+        "is_initiator": is_initiator,
+        "reconnect": True
+    })
+    await mm_service.deliver(partner_id, {
+        "type": "MATCH_FOUND",
+        "connection_id": str(connection_id),
+        "is_initiator": not is_initiator,
+        "reconnect": True
+    })
+
+
 async def forward_signal(session_id: UUID, message: dict):
-    """WebRTC sinyalini partnera ilet"""
+    """WebRTC sinyalini (Partner*Message biçiminde) partnera ilet"""
     partner_id = await mm_service.get_partner_session_id(session_id)
     if not partner_id:
         return
         
-    partner_ws = mm_service.get_websocket(partner_id)
-    if partner_ws:
-        await send_json(partner_ws, message)
+    await mm_service.deliver(partner_id, message)
 
 
-async def forward_chat(session_id: UUID, message: dict):
+async def forward_chat(session_id: UUID, message: ChatMessageSend):
     """Chat mesajını partnera ilet"""
     partner_id = await mm_service.get_partner_session_id(session_id)
     if not partner_id:
         return
         
-    partner_ws = mm_service.get_websocket(partner_id)
-    if partner_ws:
-        # Mesaj güvenliği/filtreleme burada yapılabilir
-        await send_json(partner_ws, {
-            "type": "CHAT_MESSAGE",
-            "text": message.get("text", "")
-        })
+    # Mesaj güvenliği/filtreleme burada yapılabilir
+    await mm_service.deliver(partner_id, {
+        "type": "CHAT_MESSAGE",
+        "text": message.text
+    })
+
+
+async def _forward_sdp(client: SignalingClient, message: Union[OfferMessage, AnswerMessage]):
+    # Önceki adaylar SDP'den önce gitmeli (sıra korunur)
+    async with client.signal_lock:
+        await flush_ice_candidates(client)
+        await forward_signal(client.session_id, {"type": message.type, "sdp": message.sdp})
+
+
+async def _forward_ice_candidate(client: SignalingClient, message: IceCandidateMessage):
+    """
+    ICE_BATCH_WINDOW_MS > 0 ise MATCH_FOUND sonrası gelen aday patlaması
+    pencere boyunca biriktirilir ve tek partner/socket araması ve tek
+    yazımla ICE_CANDIDATES olarak iletilir.
+    """
+    window = settings.ICE_BATCH_WINDOW_MS
+    if window <= 0:
+        await forward_signal(client.session_id, {"type": message.type, "candidate": message.candidate})
+        return
+    client.ice_pending.append(message.candidate)
+    if client.ice_flush is None:
+        client.ice_flush = asyncio.create_task(_flush_ice_after(client, window / 1000))
+
+
+async def _flush_ice_after(client: SignalingClient, delay: float):
+    await asyncio.sleep(delay)
+    try:
+        async with client.signal_lock:
+            client.ice_flush = None
+            await flush_ice_candidates(client)
+    except Exception as e:
+        print(f"ICE flush error for {client.session_id}: {e}")
+
+
+async def flush_ice_candidates(client: SignalingClient):
+    """Biriken adayları eşe ilet (tek aday ise ICE_CANDIDATE olarak); signal_lock altında çağrılır"""
+    if client.ice_flush is not None:
+        client.ice_flush.cancel()
+        client.ice_flush = None
+    if not client.ice_pending:
+        return
+    candidates, client.ice_pending = client.ice_pending, []
+    if len(candidates) == 1:
+        await forward_signal(client.session_id, {"type": "ICE_CANDIDATE", "candidate": candidates[0]})
+    else:
+        await forward_signal(client.session_id, {"type": "ICE_CANDIDATES", "candidates": candidates})
+
+
+def _changes_match(handler):
+    """Eşleşmeyi değiştiren mesajlar: önceki eşe ait bekleyen adaylar atılır"""
+    async def run(client: SignalingClient, message):
+        client.discard_ice_candidates()
+        await handler(client, message)
+    return run
+
+
+# Mesaj tipi -> handler(client, doğrulanmış mesaj)
+SIGNALING_HANDLERS: Dict[str, Callable[[SignalingClient, Any], Awaitable[Any]]] = {
+    "JOIN_QUEUE": _changes_match(lambda c, m: handle_join_queue(c.session_id, c.session_token, c.profile, m, c.ws)),
+    "LEAVE_QUEUE": lambda c, m: mm_service.leave_queue(c.session_id),
+    "NEXT": _changes_match(lambda c, m: handle_next(c.session_id)),
+    "RECONNECT": _changes_match(lambda c, m: handle_reconnect(c.session_id, c.profile, c.ws)),
+    "OFFER": _forward_sdp,
+    "ANSWER": _forward_sdp,
+    "ICE_CANDIDATE": _forward_ice_candidate,
+    "CHAT_MESSAGE": lambda c, m: forward_chat(c.session_id, m),
+}
 
 
 async def notify_partner_end(partner_id: UUID, reason: str):
     """Partnera eşleşmenin bittiğini bildir"""
-    partner_ws = mm_service.get_websocket(partner_id)
-    if partner_ws:
-        await send_json(partner_ws, {
-            "type": "MATCH_ENDED",
-            "reason": reason
-        })
+    await mm_service.deliver(partner_id, {
+        "type": "MATCH_ENDED",
+        "reason": reason
+    })
+
+
+async def run_match_rounds():
+    """
+    Toplu eşleştirme modu (MATCHING_MODE=batch): her MATCH_ROUND_INTERVAL_MS'de
+    bir tur çalıştır ve eşleşenlere MATCH_FOUND gönder.
+    """
+    interval = settings.MATCH_ROUND_INTERVAL_MS / 1000
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for connection_id, initiator_id, partner_id in await mm_service.run_match_round():
+                await mm_service.deliver(initiator_id, {
+                    "type": "MATCH_FOUND",
+                    "connection_id": str(connection_id),
+                    "is_initiator": True
+                })
+                await mm_service.deliver(partner_id, {
+                    "type": "MATCH_FOUND",
+                    "connection_id": str(connection_id),
+                    "is_initiator": False
+                })
+        except Exception as e:
+            print(f"Match round error: {e}")
+
 
+async def push_queue_positions():
+    """
+    Öndekiler ayrıldıkça değişen sıraları periyodik ve toplu gönder.
+    Lifespan'da tek bir background task olarak başlatılır.
+    """
+    interval = settings.QUEUE_POSITION_PUSH_INTERVAL_MS / 1000
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for session_id, position in await mm_service.drain_position_updates():
+                ws = mm_service.get_websocket(session_id)
+                if ws:
+                    await send_json(ws, {
+                        "type": "QUEUE_POSITION",
+                        "position": position,
+                        "estimated_wait_sec": mm_service.estimated_wait(session_id)
+                    }, critical=False)
+        except Exception as e:
+            print(f"Queue position push error: {e}")
 
-async def send_json(ws: WebSocket, data: dict):
+
+async def broadcast_online_count():
+    """
+    ONLINE_COUNT_UPDATE'i her join'de tüm socket'lere sırayla göndermek yerine
+    periyodik ve sadece sayı değiştiğinde gönder. Mesaj bir kez serileştirilir.
+    Her web worker kendi socket'lerine gönderir (lifespan'da başlatılır).
+    """
+    interval = settings.ONLINE_COUNT_BROADCAST_INTERVAL_MS / 1000
+    last_count = None
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            count = mm_service.online_count
+            if count == last_count:
+                continue
+            last_count = count
+            await fanout(
+                mm_service.get_all_websockets().values(),
+                {"type": "ONLINE_COUNT_UPDATE", "count": count},
+                settings.BROADCAST_CONCURRENCY,
+                critical=False,
+            )
+        except Exception as e:
+            print(f"Online count broadcast error: {e}")
+
+
+async def expire_queue_entries():
+    """
+    MATCH_TIMEOUT_SECONDS boyunca eşleşemeyenleri kuyruktan çıkar ve
+    QUEUE_TIMEOUT gönder. Yarı kopmuş socket'ler kuyrukta kalıp gerçek bir
+    kullanıcının eşleşmesini harcamasın; canlı istemci tekrar JOIN_QUEUE gönderir.
+    """
+    while True:
+        await asyncio.sleep(1)
+        try:
+            for session_id in await mm_service.expire_queue():
+                await mm_service.deliver(session_id, {
+                    "type": "QUEUE_TIMEOUT",
+                    "waited_sec": settings.MATCH_TIMEOUT_SECONDS,
+                    "requeue": True
+                })
+            # Snapshot'tan dönüp grace süresinde bağlanmayanlar
+            for partner_id in await mm_service.expire_restored():
+                await notify_partner_end(partner_id, "DISCONNECTED")
+        except Exception as e:
+            print(f"Queue expiry error: {e}")
+
+
+async def send_json(ws: OutboundSocket, data: dict, critical: bool = True):
+    """
+    Kayıtlı socket'in (OutboundSocket) kuyruğuna ekle. critical=False mesajlar
+    yavaş istemcide yenisi için atılabilir (sıra/sayı güncellemeleri).
+    """
     try:
-        await ws.send_text(json.dumps(data))
+        await ws.send_frame(Frame(data), critical=critical)
     except Exception:
         pass  # Connection might be closed, ignore
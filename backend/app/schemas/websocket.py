@@ -2,55 +2,113 @@
 WebSocket Message Schemas - Message types for signaling protocol
 Tüm WebSocket mesajlarının JSON formatı burada tanımlı.
 """
-from pydantic import BaseModel
-from typing import Optional, Any, Dict
+from pydantic import AliasChoices, BaseModel, ConfigDict, Field
+from typing import Annotated, Optional, Any, Dict, List, Literal, Union
+
+# MessagePack alt protokolünde (omechat.msgpack.v1) "type" alanı bu kısa
+# kodlarla taşınır; JSON'da isimler kullanılır. Kodlar değiştirilmez, sadece eklenir.
+MESSAGE_TYPE_CODES: Dict[str, int] = {
+    # Client → Server (OFFER/ANSWER/ICE_CANDIDATE/CHAT_MESSAGE eşe de aynı kodla gider)
+    "JOIN_QUEUE": 1,
+    "LEAVE_QUEUE": 2,
+    "NEXT": 3,
+    "RECONNECT": 4,
+    "OFFER": 5,
+    "ANSWER": 6,
+    "ICE_CANDIDATE": 7,
+    "CHAT_MESSAGE": 8,
+    "ICE_CANDIDATES": 9,
+    # Server → Client
+    "MATCH_FOUND": 20,
+    "MATCH_ENDED": 21,
+    "QUEUE_POSITION": 22,
+    "QUEUE_TIMEOUT": 23,
+    "QUEUE_BUSY": 24,
+    "BANNED": 25,
+    "ERROR": 26,
+    "ONLINE_COUNT": 27,
+    "ONLINE_COUNT_UPDATE": 28,
+}
+MESSAGE_TYPE_NAMES: Dict[int, str] = {code: name for name, code in MESSAGE_TYPE_CODES.items()}
+
+# Mobil istemci connectionId (camelCase) gönderiyor; iki yazım da kabul edilir
+ConnectionIdField = Field(default=None, validation_alias=AliasChoices("connection_id", "connectionId"))
 
 
 # === Client → Server Mesajları ===
 
-class JoinQueueMessage(BaseModel):
-    """Eşleşme kuyruğuna katıl"""
-    type: str = "JOIN_QUEUE"
+class ClientMessageModel(BaseModel):
+    """İstemci mesajlarının tabanı: tanımsız alan içeren mesaj geçersizdir (INVALID_MESSAGE)"""
+    model_config = ConfigDict(extra="forbid")
 
 
-class LeaveQueueMessage(BaseModel):
+class JoinQueueMessage(ClientMessageModel):
+    """Eşleşme kuyruğuna katıl (filtreler premium/satın alınmış haklara bağlı)"""
+    type: Literal["JOIN_QUEUE"] = "JOIN_QUEUE"
+    preferred_gender: Optional[str] = None  # MALE, FEMALE, OTHER
+    preferred_country: Optional[str] = None  # ISO 3166-1 alpha-2
+    language: Optional[str] = None  # ISO 639-1
+
+
+class LeaveQueueMessage(ClientMessageModel):
     """Kuyruktan ayrıl"""
-    type: str = "LEAVE_QUEUE"
+    type: Literal["LEAVE_QUEUE"] = "LEAVE_QUEUE"
 
 
-class NextMessage(BaseModel):
+class NextMessage(ClientMessageModel):
     """Sonraki eşe geç"""
-    type: str = "NEXT"
+    type: Literal["NEXT"] = "NEXT"
+
 
+class ReconnectMessage(ClientMessageModel):
+    """Son partnerle tekrar bağlan (reconnect_unlocked veya premium)"""
+    type: Literal["RECONNECT"] = "RECONNECT"
 
-class OfferMessage(BaseModel):
+
+class OfferMessage(ClientMessageModel):
     """WebRTC SDP offer gönder"""
-    type: str = "OFFER"
-    connection_id: str
+    type: Literal["OFFER"] = "OFFER"
+    connection_id: Optional[str] = ConnectionIdField
     sdp: str
 
 
-class AnswerMessage(BaseModel):
+class AnswerMessage(ClientMessageModel):
     """WebRTC SDP answer gönder"""
-    type: str = "ANSWER"
-    connection_id: str
+    type: Literal["ANSWER"] = "ANSWER"
+    connection_id: Optional[str] = ConnectionIdField
     sdp: str
 
 
-class IceCandidateMessage(BaseModel):
+class IceCandidateMessage(ClientMessageModel):
     """WebRTC ICE candidate gönder"""
-    type: str = "ICE_CANDIDATE"
-    connection_id: str
+    type: Literal["ICE_CANDIDATE"] = "ICE_CANDIDATE"
+    connection_id: Optional[str] = ConnectionIdField
     candidate: Dict[str, Any]
 
 
-class ChatMessageSend(BaseModel):
+class ChatMessageSend(ClientMessageModel):
     """Metin mesajı gönder"""
-    type: str = "CHAT_MESSAGE"
-    connection_id: str
+    type: Literal["CHAT_MESSAGE"] = "CHAT_MESSAGE"
+    connection_id: Optional[str] = ConnectionIdField
     text: str
 
 
+# /ws/signaling'e gelebilecek tüm mesajlar ("type" alanına göre ayrışır)
+ClientMessage = Annotated[
+    Union[
+        JoinQueueMessage,
+        LeaveQueueMessage,
+        NextMessage,
+        ReconnectMessage,
+        OfferMessage,
+        AnswerMessage,
+        IceCandidateMessage,
+        ChatMessageSend,
+    ],
+    Field(discriminator="type"),
+]
+
+
 # === Server → Client Mesajları ===
 
 class MatchFoundMessage(BaseModel):
@@ -58,6 +116,7 @@ class MatchFoundMessage(BaseModel):
     type: str = "MATCH_FOUND"
     connection_id: str
     is_initiator: bool
+    reconnect: bool = False  # RECONNECT ile son partnerle yeniden eşleşme
 
 
 class MatchEndedMessage(BaseModel):
@@ -73,6 +132,20 @@ class QueuePositionMessage(BaseModel):
     estimated_wait_sec: Optional[int] = None
 
 
+class QueueTimeoutMessage(BaseModel):
+    """Kuyruk süresi doldu, istemci isterse tekrar JOIN_QUEUE gönderir"""
+    type: str = "QUEUE_TIMEOUT"
+    waited_sec: int
+    requeue: bool = True
+
+
+class QueueBusyMessage(BaseModel):
+    """Kuyruk dolu (admission control): istemci retry_after_sec sonra tekrar dener"""
+    type: str = "QUEUE_BUSY"
+    scope: str  # "bucket" (aynı filtre/özellik grubu) veya "global"
+    retry_after_sec: int
+
+
 class PartnerOfferMessage(BaseModel):
     """Eşten gelen offer"""
     type: str = "OFFER"
@@ -91,6 +164,12 @@ class PartnerIceCandidateMessage(BaseModel):
     candidate: Dict[str, Any]
 
 
+class PartnerIceCandidatesMessage(BaseModel):
+    """Eşten kısa bir pencerede gelen ICE candidate'ler, sırasıyla (ICE_BATCH_WINDOW_MS > 0)"""
+    type: str = "ICE_CANDIDATES"
+    candidates: List[Dict[str, Any]]
+
+
 class PartnerChatMessage(BaseModel):
     """Eşten gelen mesaj"""
     type: str = "CHAT_MESSAGE"
@@ -68,9 +68,38 @@ def create_ban(
     db.add(ban)
     db.commit()
     db.refresh(ban)
+    
+    deactivate_banned_sessions(db, ip_address=ip_address, device_fingerprint=device_fingerprint)
     return ban
 
 
+def deactivate_banned_sessions(db: Session, ip_address: str = None, device_fingerprint: str = None) -> int:
+    """
+    Ban'a takılan açık session'ları kapat (is_active=False) ve token
+    cache'ten düşür; /ws/signaling yeniden bağlanmayı reddeder.
+    """
+    from app.models.user_session import UserSession
+    from app.services.session_cache import get_session_cache
+    
+    if not ip_address and not device_fingerprint:
+        return 0
+    
+    conditions = []
+    if ip_address:
+        conditions.append(UserSession.ip_address == ip_address)
+    if device_fingerprint:
+        conditions.append(UserSession.device_fingerprint == device_fingerprint)
+    
+    count = db.query(UserSession).filter(
+        UserSession.is_active == True,
+        or_(*conditions)
+    ).update({UserSession.is_active: False}, synchronize_session=False)
+    db.commit()
+    
+    get_session_cache().invalidate_matching(ip_address=ip_address, device_fingerprint=device_fingerprint)
+    return count
+
+
 def deactivate_ban(db: Session, ban_id: UUID):
     """Ban'ı deaktif et"""
     from app.models.ban import Ban
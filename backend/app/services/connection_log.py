@@ -0,0 +1,231 @@
+"""
+Connection Log - connections tablosuna write-behind kayıt
+
+Eşleşme başlangıç/bitişleri hot path'te sadece bellekteki tampona
+eklenir (O(1), await yok). Tek bir background task tamponu her
+flush_interval'da veya batch_size olaya ulaşınca boşaltır ve DB'ye
+toplu yazar:
+
+    başlangıçlar -> tek çok satırlı INSERT (executemany)
+    bitişler     -> tek UPDATE ... WHERE id = :id (executemany)
+
+Aynı tampondaki başlangıç+bitiş çifti INSERT'e katlanır (UPDATE yok).
+DB yazımı to_thread ile event loop dışında yapılır. DB erişilemezse
+olaylar tamponda bekler; max_pending aşılırsa en eskiler atılır ve
+`dropped` sayacı artar (eşleştirme asla DB'yi beklemez).
+
+Aynı batch MAX_FLUSH_ATTEMPTS kez yazılamazsa ikiye bölünerek yazılır:
+sadece tek başına da yazılamayan satırlar (ör. silinmiş session'a FK)
+atılır ve loglanır. Bağlantı hatasında (OperationalError) bölme durur,
+yazılmayanlar tamponda kalır.
+"""
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from sqlalchemy import bindparam, insert, update
+from sqlalchemy.exc import OperationalError
+
+from app.models.connection import Connection, EndedReason
+
+
+# Aynı batch bu kadar denendikten sonra satır satır ayıklanır
+MAX_FLUSH_ATTEMPTS = 3
+
+
+class ConnectionLog:
+    """Connection satırları için asenkron write-behind tampon"""
+
+    def __init__(
+        self,
+        engine_factory=None,
+        flush_interval: float = 0.25,
+        batch_size: int = 500,
+        max_pending: int = 100_000,
+    ):
+        if engine_factory is None:
+            from app.database import get_engine
+            engine_factory = get_engine
+        self._engine_factory = engine_factory
+        self._flush_interval = flush_interval
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+
+        # connection_id -> INSERT satırı (sıra korunur)
+        self._starts: "OrderedDict[UUID, dict]" = OrderedDict()
+        # connection_id -> UPDATE satırı
+        self._ends: "OrderedDict[UUID, dict]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+
+        self.flushed_rows = 0
+        self.dropped = 0
+        self._failures = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._starts) + len(self._ends)
+
+    def record_start(self, connection_id: UUID, session_a_id: UUID, session_b_id: UUID, started_at: datetime) -> None:
+        """Eşleşme başladı (beklemez)"""
+        self._starts[connection_id] = {
+            "id": connection_id,
+            "session_a_id": session_a_id,
+            "session_b_id": session_b_id,
+            "started_at": started_at,
+            "ended_at": None,
+            "ended_reason": None,
+            "reported": False,
+        }
+        self._after_record()
+
+    def record_end(self, connection_id: UUID, reason: str, ended_at: Optional[datetime] = None) -> None:
+        """Eşleşme bitti (beklemez)"""
+        try:
+            ended_reason = EndedReason(reason)
+        except ValueError:
+            ended_reason = EndedReason.NORMAL
+        ended_at = ended_at or datetime.utcnow()
+
+        start = self._starts.get(connection_id)
+        if start is not None:
+            # Henüz yazılmamış: INSERT'e katla
+            start["ended_at"] = ended_at
+            start["ended_reason"] = ended_reason
+        else:
+            self._ends[connection_id] = {
+                "b_id": connection_id,
+                "b_ended_at": ended_at,
+                "b_ended_reason": ended_reason,
+            }
+        self._after_record()
+
+    def _after_record(self) -> None:
+        while self.pending > self._max_pending:
+            # DB uzun süre yazılamadı: en eski olayı at
+            (self._starts or self._ends).popitem(last=False)
+            self.dropped += 1
+        if self.pending >= self._batch_size:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """Background flush döngüsü (lifespan'da tek task)"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Connection log flush error: {e}")
+
+    async def flush(self) -> int:
+        """Tamponu DB'ye yaz, yazılan satır sayısını döner"""
+        if not self._starts and not self._ends:
+            return 0
+        starts, self._starts = self._starts, OrderedDict()
+        ends, self._ends = self._ends, OrderedDict()
+        try:
+            await asyncio.to_thread(self._write, list(starts.values()), list(ends.values()))
+        except Exception:
+            self._failures += 1
+            if self._failures >= MAX_FLUSH_ATTEMPTS:
+                self._failures = 0
+                return await self._flush_isolated(starts, ends)
+            self._requeue(starts, ends)
+            raise
+        self._failures = 0
+        written = len(starts) + len(ends)
+        self.flushed_rows += written
+        return written
+
+    async def _flush_isolated(self, starts: OrderedDict, ends: OrderedDict) -> int:
+        """Kalıcı hata şüphesi: batch'i bölerek yaz, sadece yazılamayan satırları at"""
+        total = len(starts) + len(ends)
+        dropped: List[Tuple[UUID, str]] = []
+        try:
+            await asyncio.to_thread(self._write_isolated, starts, ends, dropped)
+        finally:
+            # starts/ends'te sadece (bağlantı hatası yüzünden) denenmeyenler kaldı
+            written = total - len(starts) - len(ends) - len(dropped)
+            self.flushed_rows += written
+            self.dropped += len(dropped)
+            for connection_id, error in dropped:
+                print(f"Connection log dropped row {connection_id}: {error}")
+            self._requeue(starts, ends)
+        return written
+
+    def _requeue(self, starts: OrderedDict, ends: OrderedDict) -> None:
+        """Yazılamayan olayları sıranın başına geri koy, sonraki turda tekrar denenir"""
+        if not starts and not ends:
+            return
+        starts.update(self._starts)
+        ends.update(self._ends)
+        self._starts, self._ends = starts, ends
+        self._after_record()
+
+    async def close(self) -> None:
+        """Kapanışta kalanları yaz"""
+        try:
+            await self.flush()
+        except Exception as e:
+            print(f"Connection log final flush error: {e}")
+
+    def _write_isolated(self, starts: OrderedDict, ends: OrderedDict, dropped: list) -> None:
+        """
+        Satırları ikiye bölerek yaz (thread'de). Yazılan ve tek başına
+        yazılamayıp atılan satırlar sözlüklerden çıkarılır, atılanlar
+        `dropped`a eklenir. OperationalError (DB erişilemiyor) yukarı çıkar.
+        """
+        for pending, key, write in (
+            (starts, "id", lambda rows: self._write(rows, [])),
+            (ends, "b_id", lambda rows: self._write([], rows)),
+        ):
+            stack = [list(pending.values())]
+            while stack:
+                rows = stack.pop()
+                try:
+                    write(rows)
+                except OperationalError:
+                    raise
+                except Exception as e:
+                    if len(rows) > 1:
+                        middle = len(rows) // 2
+                        stack += [rows[middle:], rows[:middle]]
+                        continue
+                    dropped.append((rows[0][key], str(e).splitlines()[0]))
+                for row in rows:
+                    del pending[row[key]]
+
+    def _write(self, starts: list, ends: list) -> None:
+        table = Connection.__table__
+        with self._engine_factory().begin() as conn:
+            if starts:
+                conn.execute(insert(table), starts)
+            if ends:
+                conn.execute(
+                    update(table)
+                    .where(table.c.id == bindparam("b_id"))
+                    .values(ended_at=bindparam("b_ended_at"), ended_reason=bindparam("b_ended_reason")),
+                    ends,
+                )
+
+
+# Global singleton instance
+_connection_log: Optional[ConnectionLog] = None
+
+
+def get_connection_log() -> ConnectionLog:
+    global _connection_log
+    if _connection_log is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _connection_log = ConnectionLog(
+            flush_interval=settings.CONNECTION_LOG_FLUSH_INTERVAL_MS / 1000,
+            batch_size=settings.CONNECTION_LOG_BATCH_SIZE,
+            max_pending=settings.CONNECTION_LOG_MAX_PENDING,
+        )
+    return _connection_log
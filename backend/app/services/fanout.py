@@ -0,0 +1,57 @@
+"""
+Fan-out - Aynı mesajı birden çok WebSocket'e gönder
+
+Mesaj tek bir signaling_codec.Frame olarak tüm alıcılarda paylaşılır:
+JSON metni ve msgpack baytları alt protokol başına en fazla bir kez
+üretilir (karışık JSON/msgpack alıcılarda da). Gönderimler en fazla
+`concurrency` eşzamanlı bekler; yavaş bir socket diğerlerini sıraya sokmaz. Hem OutboundSocket
+(signaling) hem de sarılmış chat socket'leri (JsonSocket/MsgpackSocket) ile çalışır.
+"""
+import asyncio
+from typing import Iterable, Union
+
+from app.services.signaling_codec import Frame
+
+
+DEFAULT_CONCURRENCY = 64
+
+
+async def fanout(
+    websockets: Iterable,
+    message: Union[dict, Frame],
+    concurrency: int = DEFAULT_CONCURRENCY,
+    critical: bool = True,
+) -> int:
+    """
+    Mesajı (dict ise tek bir Frame'e sararak) socket'lere gönder.
+    critical=False sadece OutboundSocket'lere verilir (yavaş istemcide atılabilir).
+    Başarılı gönderim sayısını döner.
+    """
+    targets = [ws for ws in websockets if ws is not None]
+    if not targets:
+        return 0
+    frame = message if isinstance(message, Frame) else Frame(message)
+    kwargs = {} if critical else {"critical": False}
+    sent = 0
+
+    async def send(ws) -> None:
+        nonlocal sent
+        try:
+            await ws.send_frame(frame, **kwargs)
+            sent += 1
+        except Exception:
+            pass  # Connection might be closed, ignore
+
+    if len(targets) == 1:
+        await send(targets[0])
+        return sent
+
+    pending = iter(targets)
+
+    async def sender() -> None:
+        # Ortak iterator: her sender boşalan sıradaki socket'i alır
+        for ws in pending:
+            await send(ws)
+
+    await asyncio.gather(*(sender() for _ in range(min(concurrency, len(targets)))))
+    return sent
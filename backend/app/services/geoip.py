@@ -0,0 +1,113 @@
+"""
+GeoIP Service - Yerel MaxMind (.mmdb) veritabanından ülke çözümleme
+
+Veritabanı MODE_MMAP ile açılır: dosya belleğe eşlenir, sayfalar işletim
+sistemi tarafından paylaşılır (worker başına kopya yok). Önünde IP
+anahtarlı sınırlı bir LRU vardır; tekrar eden IP'ler (NAT, yeniden
+bağlanma) veritabanına hiç inmez.
+
+Dosya yoksa veya geoip2 kurulu değilse servis sessizce devre dışıdır
+(country=None), uygulama çalışmaya devam eder.
+
+GeoLite2-Country sadece ülke, GeoLite2-City ayrıca koordinat döner.
+"""
+import ipaddress
+import os
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple, Optional
+
+
+class GeoResult(NamedTuple):
+    """Çözümleme sonucu (bilinmeyen alanlar None)"""
+    country: Optional[str] = None  # ISO 3166-1 alpha-2
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+
+_UNKNOWN = GeoResult()
+
+
+class GeoIPResolver:
+    """mmap'li .mmdb okuyucu + IP anahtarlı LRU"""
+
+    def __init__(self, db_path: Optional[str], cache_size: int = 65536):
+        self._cache_size = cache_size
+        self._cache: "OrderedDict[str, GeoResult]" = OrderedDict()
+        # Senkron endpoint'ler threadpool'da çalışır: LRU güncellemesi kilitli
+        self._lock = Lock()
+        self._reader = None
+        self._city = False
+
+        if not db_path or not os.path.exists(db_path):
+            print(f"GeoIP disabled: database not found ({db_path})")
+            return
+        try:
+            import geoip2.database
+            from maxminddb import MODE_MMAP
+        except ImportError:
+            print("GeoIP disabled: geoip2 is not installed")
+            return
+        self._reader = geoip2.database.Reader(db_path, mode=MODE_MMAP)
+        self._city = "City" in self._reader.metadata().database_type
+
+    @property
+    def enabled(self) -> bool:
+        return self._reader is not None
+
+    def lookup(self, ip: str) -> GeoResult:
+        """IP'yi çözümle (önce LRU)"""
+        if self._reader is None or not ip:
+            return _UNKNOWN
+        with self._lock:
+            result = self._cache.get(ip)
+            if result is not None:
+                self._cache.move_to_end(ip)
+                return result
+
+        result = self._resolve(ip)
+
+        with self._lock:
+            self._cache[ip] = result
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def _resolve(self, ip: str) -> GeoResult:
+        import geoip2.errors
+
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return _UNKNOWN
+        if address.is_private or address.is_loopback:
+            return _UNKNOWN
+        try:
+            if self._city:
+                response = self._reader.city(ip)
+                return GeoResult(
+                    country=response.country.iso_code,
+                    latitude=response.location.latitude,
+                    longitude=response.location.longitude,
+                )
+            return GeoResult(country=self._reader.country(ip).country.iso_code)
+        except (geoip2.errors.AddressNotFoundError, ValueError):
+            return _UNKNOWN
+
+    def close(self) -> None:
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+
+
+# Global singleton instance
+_resolver: Optional[GeoIPResolver] = None
+
+
+def get_geoip_resolver() -> GeoIPResolver:
+    global _resolver
+    if _resolver is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _resolver = GeoIPResolver(settings.GEOIP_DB_PATH, cache_size=settings.GEOIP_CACHE_SIZE)
+    return _resolver
@@ -0,0 +1,300 @@
+"""
+Match Index - Özellik bazlı (bucket) eşleşme kuyruğu
+
+Kuyruk tek bir dict yerine şu hiyerarşide tutulur:
+
+    (preferred_gender, preferred_country)   # bekleyenin talebi
+        -> gender
+            -> country
+                -> language
+                    -> PriorityLanes (öncelikli + normal FIFO şerit)
+
+Gelen kullanıcı için uyumlu eş ararken yalnızca sabit sayıda anahtara
+bakılır (talep: en fazla 4 kombinasyon, cinsiyet: en fazla 4 değer,
+ülke/dil: tercih edilen + herhangi biri). Boşalan kovalar silinir, bu
+yüzden "herhangi biri" seçimi de O(1)'dir. Maliyet kuyruk uzunluğundan
+bağımsızdır.
+
+Öncelik şeritleri: premium/VIP kullanıcılar kovanın öncelikli şeridine
+girer. Sıralama `rank_at` (efektif kuyruğa giriş zamanı) ile yapılır;
+öncelikli kullanıcının rank_at'i gerçek giriş zamanından öncelik süresi
+(priority_boost) kadar öndedir. Her şerit kendi içinde FIFO olduğundan
+kovanın en iyisi iki şerit başından biridir (O(1)). Yaşlanma bundan
+gelir: normal bir kullanıcıyı ancak kendisinden en fazla priority_boost
+saniye sonra gelen öncelikliler geçebilir, daha eskisi kalmaz; yani
+kimse FIFO'ya göre priority_boost saniyeden fazla geciktirilmez.
+
+Bu sınır kova başınadır: aynı kovadaki (aynı talep, cinsiyet, ülke, dil)
+bekleyenler arasında geçerlidir. Farklı kovalar arasında sıra
+match_rank'e göredir (önce gelenle aynı dil, sonra rank_at); gelenle
+aynı dili konuşan kovadaki biri daha eski bir başka dil kovasını her
+durumda geçer. Yakın zamanda eşleşilen kişinin atlanması (avoid) da
+şerit başını geçmek sayılmaz.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, TYPE_CHECKING
+from uuid import UUID
+
+if TYPE_CHECKING:
+    from app.services.matchmaking import QueuedUser
+
+
+# Kaçınılacak çift kontrolü: avoid(session_a, session_b) -> True ise eşleşme
+AvoidFn = Callable[[UUID, UUID], bool]
+
+# Kova başında kaçınılan (yakın zamanda eşleşmiş) kişiler atlanırken
+# bakılacak en fazla kayıt; maliyet sabit kalır
+MAX_SKIP_PER_BUCKET = 4
+
+
+class BucketKey(NamedTuple):
+    """Bir kuyruk kovasının tam anahtarı"""
+    preferred_gender: Optional[str]
+    preferred_country: Optional[str]
+    gender: str
+    country: Optional[str]
+    language: Optional[str]
+
+
+def bucket_key(user: "QueuedUser") -> BucketKey:
+    """Kullanıcının ait olduğu kova"""
+    return BucketKey(
+        preferred_gender=user.preferred_gender,
+        preferred_country=user.preferred_country,
+        gender=user.gender,
+        country=user.country,
+        language=user.language,
+    )
+
+
+def is_compatible(a: "QueuedUser", b: "QueuedUser") -> bool:
+    """İki kullanıcı birbirinin filtrelerini karşılıyor mu?"""
+    if a.preferred_gender and b.gender != a.preferred_gender:
+        return False
+    if b.preferred_gender and a.gender != b.preferred_gender:
+        return False
+    if a.preferred_country and b.country != a.preferred_country:
+        return False
+    if b.preferred_country and a.country != b.preferred_country:
+        return False
+    return True
+
+
+def match_rank(user: "QueuedUser", candidate: "QueuedUser") -> tuple:
+    """Küçük olan daha iyi: önce aynı dil, sonra en eski efektif giriş (öncelik dahil)"""
+    return (candidate.language != user.language, candidate.rank_at)
+
+
+def demand_of(user: "QueuedUser") -> tuple:
+    """Kullanıcının talep grubu (ilk seviye anahtar)"""
+    return (user.preferred_gender, user.preferred_country)
+
+
+def compatible_demands(user: "QueuedUser") -> List[tuple]:
+    """Bu kullanıcıyı kabul edebilecek bekleyenlerin talep grupları"""
+    countries = (None, user.country) if user.country else (None,)
+    return [(gender, country) for gender in (None, user.gender) for country in countries]
+
+
+class PriorityLanes:
+    """Bir kovanın iki FIFO şeridi: öncelikli (premium/VIP) ve normal"""
+
+    __slots__ = ("priority", "normal")
+
+    def __init__(self):
+        self.priority: "OrderedDict[UUID, QueuedUser]" = OrderedDict()
+        self.normal: "OrderedDict[UUID, QueuedUser]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.priority) + len(self.normal)
+
+    def __getitem__(self, session_id: UUID) -> "QueuedUser":
+        user = self.priority.get(session_id)
+        return user if user is not None else self.normal[session_id]
+
+    def add(self, user: "QueuedUser") -> None:
+        lane = self.priority if user.priority else self.normal
+        lane[user.session_id] = user
+
+    def pop(self, session_id: UUID) -> "QueuedUser":
+        user = self.priority.pop(session_id, None)
+        return user if user is not None else self.normal.pop(session_id)
+
+
+class MatchIndex:
+    """
+    Kova bazlı FIFO kuyruk.
+    add/remove/find_match kuyruktaki kişi sayısından bağımsız çalışır.
+    """
+
+    def __init__(self):
+        # (preferred_gender, preferred_country) -> gender -> country -> language -> şeritler
+        self._demands: Dict[tuple, Dict[str, Dict[Optional[str], Dict[Optional[str], PriorityLanes]]]] = {}
+        # session_id -> BucketKey (O(1) silme için); aynı kovadakiler tek
+        # BucketKey nesnesini paylaşır, kova boşalınca bırakılır
+        self._locations: Dict[UUID, BucketKey] = {}
+        self._keys: Dict[BucketKey, BucketKey] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, session_id: UUID) -> bool:
+        return session_id in self._locations
+
+    def __iter__(self) -> Iterator[UUID]:
+        return iter(self._locations)
+
+    def get(self, session_id: UUID) -> Optional["QueuedUser"]:
+        """Kuyruktaki kullanıcıyı al"""
+        key = self._locations.get(session_id)
+        if key is None:
+            return None
+        return self._bucket(key)[session_id]
+
+    def users(self) -> Iterator["QueuedUser"]:
+        """Tüm bekleyenler (sıra garantisi yok, admin/debug için)"""
+        for session_id in list(self._locations):
+            user = self.get(session_id)
+            if user is not None:
+                yield user
+
+    def add(self, user: "QueuedUser") -> None:
+        """Kullanıcıyı kendi kovasının sonuna ekle"""
+        key = bucket_key(user)
+        key = self._keys.setdefault(key, key)
+        genders = self._demands.setdefault((key.preferred_gender, key.preferred_country), {})
+        countries = genders.setdefault(key.gender, {})
+        languages = countries.setdefault(key.country, {})
+        bucket = languages.get(key.language)
+        if bucket is None:
+            bucket = languages[key.language] = PriorityLanes()
+        bucket.add(user)
+        self._locations[user.session_id] = key
+
+    def remove(self, session_id: UUID) -> Optional["QueuedUser"]:
+        """Kullanıcıyı kuyruktan çıkar, boşalan kovaları temizle"""
+        key = self._locations.pop(session_id, None)
+        if key is None:
+            return None
+
+        demand = (key.preferred_gender, key.preferred_country)
+        genders = self._demands[demand]
+        countries = genders[key.gender]
+        languages = countries[key.country]
+        bucket = languages[key.language]
+        user = bucket.pop(session_id)
+
+        if not bucket:
+            del self._keys[key]
+            del languages[key.language]
+            if not languages:
+                del countries[key.country]
+                if not countries:
+                    del genders[key.gender]
+                    if not genders:
+                        del self._demands[demand]
+        return user
+
+    def bucket_size(self, user: "QueuedUser") -> int:
+        """Kullanıcının gireceği kovada bekleyen sayısı, O(1)"""
+        genders = self._demands.get(demand_of(user))
+        countries = genders.get(user.gender) if genders else None
+        languages = countries.get(user.country) if countries else None
+        bucket = languages.get(user.language) if languages else None
+        return len(bucket) if bucket else 0
+
+    def find_match(self, user: "QueuedUser", avoid: Optional[AvoidFn] = None) -> Optional["QueuedUser"]:
+        """
+        Kullanıcıyla karşılıklı uyumlu, en uygun bekleyeni bul (kuyruktan çıkarmaz).
+        Öncelik: aynı dil, sonra en uzun bekleyen. `avoid` ile işaretlenen
+        kişiler atlanır.
+        """
+        best = None
+        best_rank = None
+        for candidate in self._candidates(user, avoid):
+            rank = match_rank(user, candidate)
+            if best_rank is None or rank < best_rank:
+                best, best_rank = candidate, rank
+        return best
+
+    def overtaken_by(self, candidate: "QueuedUser") -> Optional[float]:
+        """
+        Öncelikli aday eşleşirse kovasındaki daha eski normal bekleyeni
+        geçmiş olur: aradaki giriş farkı (saniye, <= priority_boost), yoksa None.
+        Aday kuyruktan çıkarılmadan önce çağrılmalı.
+        """
+        if not candidate.priority:
+            return None
+        key = self._locations.get(candidate.session_id)
+        if key is None:
+            return None
+        normal = self._bucket(key).normal
+        if not normal:
+            return None
+        head = next(iter(normal.values()))
+        if head.joined_at >= candidate.joined_at:
+            return None
+        return candidate.joined_at - head.joined_at
+
+    def _bucket(self, key: BucketKey) -> PriorityLanes:
+        demand = (key.preferred_gender, key.preferred_country)
+        return self._demands[demand][key.gender][key.country][key.language]
+
+    def _candidates(self, user: "QueuedUser", avoid: Optional[AvoidFn] = None) -> Iterator["QueuedUser"]:
+        """Her uyumlu kova grubundan baştaki (en eski, kaçınılmayan) kişiyi üret"""
+        # Bekleyenin talebi: filtresiz veya bu kullanıcıyı kabul eden
+        for demand in compatible_demands(user):
+            genders = self._demands.get(demand)
+            if not genders:
+                continue
+
+            if user.preferred_gender:
+                gender_keys = (user.preferred_gender,)
+            else:
+                gender_keys = tuple(genders)
+
+            for gender in gender_keys:
+                countries = genders.get(gender)
+                if not countries:
+                    continue
+                languages = self._pick_country(countries, user)
+                if languages is None:
+                    continue
+                bucket = languages.get(user.language) or next(iter(languages.values()))
+                head = self._head(bucket, user, avoid)
+                if head is not None:
+                    yield head
+
+    @classmethod
+    def _head(cls, bucket: PriorityLanes, user: "QueuedUser", avoid: Optional[AvoidFn]) -> Optional["QueuedUser"]:
+        """İki şerit başından efektif girişi (rank_at) daha eski olan"""
+        priority = cls._lane_head(bucket.priority, user, avoid)
+        normal = cls._lane_head(bucket.normal, user, avoid)
+        if priority is None:
+            return normal
+        if normal is None or priority.rank_at <= normal.rank_at:
+            return priority
+        return normal
+
+    @staticmethod
+    def _lane_head(lane: "OrderedDict[UUID, QueuedUser]", user: "QueuedUser", avoid: Optional[AvoidFn]) -> Optional["QueuedUser"]:
+        if not lane:
+            return None
+        if avoid is None:
+            return next(iter(lane.values()))
+        for checked, candidate in enumerate(lane.values()):
+            if checked >= MAX_SKIP_PER_BUCKET:
+                return None
+            if not avoid(user.session_id, candidate.session_id):
+                return candidate
+        return None
+
+    @staticmethod
+    def _pick_country(countries: dict, user: "QueuedUser") -> Optional[dict]:
+        """Ülke filtresi varsa sadece o ülke; yoksa önce aynı ülke, sonra herhangi biri"""
+        if user.preferred_country:
+            return countries.get(user.preferred_country)
+        if user.country in countries:
+            return countries[user.country]
+        return next(iter(countries.values()))
+
@@ -0,0 +1,148 @@
+"""
+Matching Rounds - Toplu eşleştirme turları (NumPy)
+
+Greedy FIFO yerine kuyruk her N milisaniyede bir toplanır ve tüm aday
+çiftler tek bir vektörel geçişte puanlanır:
+
+    puan(i, j) = W_WAIT   * (bekleme_i + bekleme_j)
+               + W_FILTER * (filtreli_i + filtreli_j)   # az adaylı kullanıcılar öne
+               + W_REGION * aynı_ülke
+               + W_LANG   * aynı_dil
+               - W_RECENT * yakın_zamanda_eşleşmiş
+
+Uyumsuz çiftler (iki yönlü cinsiyet/ülke filtresi) -inf alır.
+Eşleştirme "locally dominant edge" yöntemiyle yapılır: her turda
+karşılıklı en iyi adayı birbiri olan düğümler eşlenir. Sonuç greedy
+maksimum ağırlıklı eşleştirmenin aynısıdır (optimumun en az yarısı)
+ve her adım O(n^2) vektörel işlemdir; Blossom'un O(n^3) maliyeti
+yüksek varış hızlarında tur süresini aşar.
+"""
+import time
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple, TYPE_CHECKING
+from uuid import UUID
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from app.services.matchmaking import QueuedUser
+
+
+W_WAIT = 1.0
+W_FILTER = 15.0
+W_REGION = 5.0
+W_LANG = 10.0
+W_RECENT = 1000.0
+
+
+def _encode(values: Sequence[Optional[str]], vocabulary: dict) -> np.ndarray:
+    """String değerleri int'e çevir (None -> -1)"""
+    return np.fromiter(
+        (-1 if value is None else vocabulary.setdefault(value, len(vocabulary)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+
+
+def score_pairs(
+    users: Sequence["QueuedUser"],
+    now: Optional[float] = None,
+    recent_partners: Optional[Callable[[UUID], Iterable[UUID]]] = None,
+) -> np.ndarray:
+    """n x n puan matrisi (simetrik, uyumsuz/kendi ile -inf)"""
+    now = now or time.monotonic()
+    n = len(users)
+    genders, countries, languages = {}, {}, {}
+
+    gender = _encode([u.gender for u in users], genders)
+    pref_gender = _encode([u.preferred_gender for u in users], genders)
+    country = _encode([u.country for u in users], countries)
+    pref_country = _encode([u.preferred_country for u in users], countries)
+    language = _encode([u.language for u in users], languages)
+    # Efektif bekleme: öncelikli şerittekiler priority_boost kadar fazla beklemiş sayılır
+    wait = np.fromiter((now - u.rank_at for u in users), dtype=np.float32, count=n)
+
+    # İki yönlü filtre uyumu: i'nin filtresi j'yi, j'nin filtresi i'yi kabul etmeli
+    gender_ok = (pref_gender[:, None] == -1) | (pref_gender[:, None] == gender[None, :])
+    country_ok = (pref_country[:, None] == -1) | (pref_country[:, None] == country[None, :])
+    accepts = gender_ok & country_ok
+    compatible = accepts & accepts.T
+    np.fill_diagonal(compatible, False)
+
+    filtered = ((pref_gender != -1) | (pref_country != -1)).astype(np.float32)
+    same_country = (country[:, None] == country[None, :]) & (country[:, None] != -1)
+    same_language = (language[:, None] == language[None, :]) & (language[:, None] != -1)
+
+    # Kişi başı terimler önce toplanır, n^2 geçiş sayısı az tutulur (float32)
+    per_user = W_WAIT * wait + W_FILTER * filtered
+    scores = per_user[:, None] + per_user[None, :]
+    scores += np.float32(W_REGION) * same_country
+    scores += np.float32(W_LANG) * same_language
+
+    if recent_partners is not None:
+        # Kişi başına birkaç kayıt: O(n * k)
+        index = {u.session_id: i for i, u in enumerate(users)}
+        for i, u in enumerate(users):
+            for partner_id in recent_partners(u.session_id):
+                j = index.get(partner_id)
+                if j is not None:
+                    scores[i, j] -= W_RECENT
+                    scores[j, i] -= W_RECENT
+
+    return np.where(compatible, scores, np.float32(-np.inf))
+
+
+def greedy_max_weight_matching(scores: np.ndarray) -> List[Tuple[int, int]]:
+    """
+    Karşılıklı en iyi aday (locally dominant edge) turlarıyla eşleştir.
+    Eşitlikte argmax en küçük indeksi seçer: en büyük puanlı kenara sahip
+    en küçük indeksli düğüm ile onun adayı birbirini seçtiği için her
+    turda en az bir çift eşlenir. Eşit puanlı adaylardan küçük indeksli
+    olan kazanır (plan_round'da en uzun bekleyen). En iyi adayı eşlenen
+    satırlar yeniden hesaplanır, diğer satırların argmax'ı korunur.
+    """
+    scores = scores.copy()
+    best = scores.argmax(axis=1)
+    alive = np.ones(scores.shape[0], dtype=bool)
+    pairs: List[Tuple[int, int]] = []
+    while True:
+        nodes = np.nonzero(alive)[0]
+        targets = best[nodes]
+        valid = np.isfinite(scores[nodes, targets])
+        mutual = valid & (best[targets] == nodes) & (nodes < targets)
+        chosen = nodes[mutual]
+        if not len(chosen):
+            break
+        partners = best[chosen]
+        pairs.extend(zip(chosen.tolist(), partners.tolist()))
+
+        matched = np.concatenate([chosen, partners])
+        alive[matched] = False
+        scores[:, matched] = -np.inf
+        stale = np.nonzero(alive & np.isin(best, matched))[0]
+        if len(stale):
+            best[stale] = scores[stale].argmax(axis=1)
+    return pairs
+
+
+def plan_round(
+    users: Sequence["QueuedUser"],
+    recent_partners: Optional[Callable[[UUID], Iterable[UUID]]] = None,
+) -> List[Tuple["QueuedUser", "QueuedUser"]]:
+    """
+    Bir tur için eşleşecek (initiator, partner) çiftleri. Kullanıcılar
+    efektif bekleme sırasına (rank_at) dizilir; eşit puanlı adaylardan
+    en uzun bekleyen seçilir.
+    """
+    if len(users) < 2:
+        return []
+    # Çağıran zaten sıralı verirse timsort tek geçişte biter
+    users = sorted(users, key=lambda u: u.rank_at)
+    scores = score_pairs(users, recent_partners=recent_partners)
+    pairs = []
+    for i, j in greedy_max_weight_matching(scores):
+        # Daha uzun bekleyen taraf offer oluşturmasın, yeni gelen initiator olsun
+        a, b = users[i], users[j]
+        if a.joined_at < b.joined_at:
+            a, b = b, a
+        pairs.append((a, b))
+    return pairs
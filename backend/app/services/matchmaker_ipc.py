@@ -0,0 +1,460 @@
+"""
+Matchmaker IPC - Ayrı matchmaker süreci ile Unix domain socket üzerinden iletişim
+
+`uvicorn --workers N` ile her worker kendi in-memory kuyruğunu tutarsa
+farklı worker'lardaki kullanıcılar hiç eşleşemez. Bu modda (MATCHMAKER_SOCKET)
+kuyruk ve bağlantı durumu tek bir matchmaker sürecindeki MatchmakingService'te
+durur; web worker'ları IpcMatchmakingService ile ona bağlanır.
+
+Çerçeve (frame) formatı:
+
+    [u32 uzunluk][u8 tür][u32 istek no][gövde: kompakt JSON]
+
+    REQUEST  {"m": metod, "a": [argümanlar]}
+    RESPONSE {"r": sonuç} veya {"e": hata}
+    EVENT    {"s": session_id, "m": mesaj, "d": 1 atılabilir}  (sunucu -> worker)
+
+WebSocket nesneleri süreç dışına taşınamaz: sunucu tarafında her session için
+bir _WorkerSocket vekili kaydedilir, `send_frame` çağrısı sahibi olan worker'a
+EVENT olarak gider (mesaj dict olarak; worker socket'inin alt protokolüne
+göre orada bir kez kodlanır). Böylece MatchmakingService.deliver ve route'lardaki
+background loop'lar (QUEUE_POSITION, QUEUE_TIMEOUT, toplu turlar) matchmaker
+sürecinde değişmeden çalışır.
+
+Worker okumayı bırakırsa (takılan event loop) yazma tamponu sınırsız büyümez:
+tampon WORKER_BUFFER_LIMIT'i aşınca atılabilir EVENT'ler atılır, kritik
+olanlar en fazla WORKER_DRAIN_TIMEOUT bekler. Tampon o sürede boşalmazsa
+worker bağlantısı kapatılır (OutboundSocket'teki yavaş istemci politikası);
+session'ları temizlenir, worker yeniden bağlanıp socket'lerini tekrar kaydeder.
+"""
+import asyncio
+import os
+import struct
+from dataclasses import asdict
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+
+from app.services.matchmaking import ActiveConnection, MatchmakingService, QueueFullError, QueuedUser
+from app.services.matchmaking_stats import MatchmakingStats
+from app.services.signaling_codec import Frame, dumps, loads
+
+
+REQUEST = 1
+RESPONSE = 2
+EVENT = 3
+
+_HEADER = struct.Struct(">IBI")
+MAX_FRAME_SIZE = 1 << 20
+
+# Worker bağlantısı başına bekleyen yazma tamponu (bayt)
+WORKER_BUFFER_LIMIT = 4 << 20
+WORKER_DRAIN_TIMEOUT = 5.0
+# Matchmaker bağlantısı koparsa yeniden deneme aralığı
+RECONNECT_SECONDS = 1.0
+
+
+def encode_frame(kind: int, request_id: int, body: Any) -> bytes:
+    payload = dumps(body).encode()
+    return _HEADER.pack(len(payload), kind, request_id) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple[int, int, Any]:
+    """Tek çerçeve oku (bağlantı kapanırsa IncompleteReadError)"""
+    length, kind, request_id = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame too large: {length}")
+    return kind, request_id, loads(await reader.readexactly(length))
+
+
+def _uuid(value: Optional[str]) -> Optional[UUID]:
+    return UUID(value) if value else None
+
+
+def _str(value: Optional[UUID]) -> Optional[str]:
+    return str(value) if value else None
+
+
+# === Matchmaker süreci tarafı ===
+
+async def _write(writer: asyncio.StreamWriter, data: bytes, critical: bool = True) -> None:
+    """
+    Worker'a çerçeve yaz. Tampon dolunca atılabilir çerçeve sessizce atılır,
+    kritik çerçeve drain'i sınırlı süre bekler; worker okumuyorsa bağlantı
+    kapatılır ve ConnectionError.
+    """
+    if writer.is_closing():
+        raise ConnectionError("Worker disconnected")
+    transport = writer.transport
+    if transport.get_write_buffer_size() >= WORKER_BUFFER_LIMIT and not critical:
+        return
+    writer.write(data)
+    if not critical or transport.get_write_buffer_size() < WORKER_BUFFER_LIMIT:
+        return
+    try:
+        await asyncio.wait_for(writer.drain(), WORKER_DRAIN_TIMEOUT)
+    except (asyncio.TimeoutError, ConnectionError):
+        print("Matchmaker worker stalled, closing its connection")
+        # close() dolu tamponun boşalmasını bekler; abort hemen koparır
+        transport.abort()
+        raise ConnectionError("Worker stalled")
+
+
+class _WorkerSocket:
+    """Sunucu tarafında bir worker'daki WebSocket'in vekili"""
+
+    __slots__ = ("_writer", "_session_id")
+
+    def __init__(self, writer: asyncio.StreamWriter, session_id: str):
+        self._writer = writer
+        self._session_id = session_id
+
+    async def send_frame(self, frame: Frame, critical: bool = True) -> None:
+        event = {"s": self._session_id, "m": frame.message}
+        if not critical:
+            event["d"] = 1
+        await _write(self._writer, encode_frame(EVENT, 0, event), critical)
+
+
+class MatchmakerServer:
+    """Tek MatchmakingService'i Unix socket üzerinden worker'lara açar"""
+
+    def __init__(self, service: MatchmakingService, path: str):
+        self.service = service
+        self.path = path
+        self._server = None
+
+    async def start(self) -> None:
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # Önceki çalışmadan kalan socket dosyası
+        self._server = await asyncio.start_unix_server(self._handle_worker, path=self.path)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Bu worker'a bağlı session'lar: worker düşerse temizlenir
+        owned = set()
+        tasks = set()
+        try:
+            while True:
+                kind, request_id, body = await read_frame(reader)
+                if kind != REQUEST:
+                    continue
+                # İstekler paralel işlenir: lock bekleyen bir join diğerlerini tutmaz
+                task = asyncio.create_task(self._serve(writer, owned, request_id, body))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            print(f"Matchmaker worker connection error: {e}")
+        finally:
+            writer.close()
+            for session_id in list(owned):
+                partner_id = await self.service.cleanup_session(UUID(session_id))
+                if partner_id:
+                    await self.service.deliver(partner_id, {"type": "MATCH_ENDED", "reason": "DISCONNECTED"})
+
+    async def _serve(self, writer: asyncio.StreamWriter, owned: set, request_id: int, body: dict) -> None:
+        try:
+            result = await self._dispatch(writer, owned, body["m"], body.get("a", []))
+            response = {"r": result}
+        except Exception as e:
+            response = {"e": f"{type(e).__name__}: {e}"}
+        try:
+            await _write(writer, encode_frame(RESPONSE, request_id, response))
+        except ConnectionError:
+            pass  # Worker gitti; bağlantı temizliği _handle_worker'da
+
+    async def _dispatch(self, writer, owned: set, method: str, args: list):
+        service = self.service
+
+        if method == "join":
+            user = QueuedUser(**{**args[0], "session_id": UUID(args[0]["session_id"])})
+            try:
+                result = await service.join_queue(user)
+            except QueueFullError as e:
+                return {"busy": [e.scope, e.retry_after]}
+            if result:
+                return [str(result[0]), str(result[1]), result[2]]
+            return {"eta": service.estimated_wait(user.session_id)}
+        if method == "reconnect":
+            result = await service.reconnect(UUID(args[0]))
+            return [str(result[0]), str(result[1]), result[2]] if result else None
+        if method == "leave":
+            return await service.leave_queue(UUID(args[0]))
+        if method == "end":
+            return _str(await service.end_connection(UUID(args[0]), args[1]))
+        if method == "cleanup":
+            owned.discard(args[0])
+            return _str(await service.cleanup_session(UUID(args[0])))
+        if method == "register":
+            owned.add(args[0])
+            await service.register_websocket(UUID(args[0]), _WorkerSocket(writer, args[0]))
+            return True
+        if method == "unregister":
+            owned.discard(args[0])
+            await service.unregister_websocket(UUID(args[0]))
+            return True
+        if method == "deliver":
+            return await service.deliver(UUID(args[0]), args[1])
+        if method == "connection":
+            connection = await service.get_connection(UUID(args[0]))
+            if connection is None:
+                return None
+            return [
+                str(connection.connection_id), str(connection.session_a_id),
+                str(connection.session_b_id), connection.started_at,
+            ]
+        if method == "partner":
+            return _str(await service.get_partner_session_id(UUID(args[0])))
+        if method == "position":
+            session_id = UUID(args[0])
+            return [await service.get_queue_position(session_id), service.estimated_wait(session_id)]
+        if method == "stats":
+            return asdict(service.stats())
+        raise ValueError(f"Unknown method: {method}")
+
+
+# === Web worker tarafı ===
+
+class IpcMatchmakingService:
+    """
+    MatchmakingService ile aynı arayüz; durum matchmaker sürecinde.
+    Periyodik işler (sıra bildirimi, süre dolumu, toplu turlar) matchmaker
+    sürecinde çalışır, bu yüzden worker tarafındaki karşılıkları boş döner.
+    """
+
+    def __init__(self, path: str, stats_interval: float = 1.0, request_timeout: float = 5.0):
+        self._path = path
+        self._stats_interval = stats_interval
+        self._request_timeout = request_timeout
+        self.batch_matching = False
+        # Snapshot matchmaker sürecinde; worker yeniden başlarken session'ları temizlenir
+        self.restores_sessions = False
+        self.shutting_down = False
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._connected = asyncio.Event()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._next_id = 0
+        self._tasks = []
+
+        # Bu worker'a bağlı socket'ler: session_id -> websocket
+        self._session_websockets: Dict[UUID, Any] = {}
+        # Join/position yanıtlarından gelen son tahmini bekleme
+        self._estimates: Dict[UUID, Optional[int]] = {}
+        self._stats = MatchmakingStats(0, 0, 0, 0, 0, 0, 0, 0)
+
+    async def start(self) -> None:
+        """Matchmaker'a bağlan, okuma ve sayaç döngülerini başlat"""
+        await self._connect()
+        self._tasks = [
+            asyncio.create_task(self._read_loop()),
+            asyncio.create_task(self._stats_loop()),
+        ]
+        await self.refresh_stats()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._connected.clear()
+
+    async def _connect(self) -> None:
+        self._reader, self._writer = await asyncio.open_unix_connection(self._path)
+        self._connected.set()
+
+    async def _read_loop(self) -> None:
+        """Yanıtları ilgili isteğe, EVENT'leri yerel socket'lere ilet; koparsa yeniden bağlan"""
+        while True:
+            try:
+                kind, request_id, body = await read_frame(self._reader)
+            except (asyncio.IncompleteReadError, ConnectionError) as e:
+                print(f"Matchmaker connection lost: {e}")
+                await self._reconnect()
+                continue
+
+            if kind == RESPONSE:
+                future = self._pending.pop(request_id, None)
+                if future is not None and not future.done():
+                    if "e" in body:
+                        future.set_exception(RuntimeError(body["e"]))
+                    else:
+                        future.set_result(body.get("r"))
+            elif kind == EVENT:
+                ws = self._session_websockets.get(UUID(body["s"]))
+                if ws is not None:
+                    try:
+                        await ws.send_frame(Frame(body["m"]), critical=not body.get("d"))
+                    except Exception:
+                        pass  # Connection might be closed
+
+    async def _reconnect(self) -> None:
+        self._connected.clear()
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Matchmaker connection lost"))
+        self._pending.clear()
+        while True:
+            await asyncio.sleep(RECONNECT_SECONDS)
+            try:
+                await self._connect()
+            except OSError:
+                continue
+            # Matchmaker yeniden başladıysa yerel socket'leri tekrar kaydet
+            for session_id in list(self._session_websockets):
+                self._writer.write(encode_frame(REQUEST, self._new_id(), {"m": "register", "a": [str(session_id)]}))
+            return
+
+    async def _stats_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._stats_interval)
+            try:
+                await self.refresh_stats()
+            except Exception as e:
+                print(f"Matchmaker stats refresh error: {e}")
+
+    def _new_id(self) -> int:
+        self._next_id = (self._next_id + 1) & 0xFFFFFFFF
+        return self._next_id
+
+    async def _call(self, method: str, *args):
+        await asyncio.wait_for(self._connected.wait(), self._request_timeout)
+        request_id = self._new_id()
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self._writer.write(encode_frame(REQUEST, request_id, {"m": method, "a": list(args)}))
+        try:
+            await self._writer.drain()
+            return await asyncio.wait_for(future, self._request_timeout)
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def refresh_stats(self) -> MatchmakingStats:
+        self._stats = MatchmakingStats(**await self._call("stats"))
+        return self._stats
+
+    def stats(self) -> MatchmakingStats:
+        """Son okunan anlık görüntü (en fazla stats_interval kadar eski)"""
+        return self._stats
+
+    @property
+    def online_count(self) -> int:
+        return self._stats.online_users
+
+    @property
+    def queue_size(self) -> int:
+        return self._stats.in_queue
+
+    @property
+    def active_connections_count(self) -> int:
+        return self._stats.active_connections
+
+    async def register_websocket(self, session_id: UUID, websocket) -> None:
+        self._session_websockets[session_id] = websocket
+        await self._call("register", str(session_id))
+
+    async def unregister_websocket(self, session_id: UUID) -> None:
+        self._session_websockets.pop(session_id, None)
+        self._estimates.pop(session_id, None)
+        await self._call("unregister", str(session_id))
+
+    def get_websocket(self, session_id: UUID):
+        """Sadece bu worker'a bağlı socket'i döner"""
+        return self._session_websockets.get(session_id)
+
+    def get_all_websockets(self):
+        """Bu worker'a bağlı socket'ler"""
+        return dict(self._session_websockets)
+
+    async def deliver(self, session_id: UUID, message: dict) -> bool:
+        """Session yerelse doğrudan, değilse matchmaker üzerinden sahibi olan worker'a"""
+        ws = self._session_websockets.get(session_id)
+        if ws is not None:
+            try:
+                await ws.send_frame(Frame(message))
+            except Exception:
+                return False
+            return True
+        return bool(await self._call("deliver", str(session_id), message))
+
+    async def join_queue(self, user: QueuedUser) -> Optional[Tuple[UUID, UUID, bool]]:
+        result = await self._call("join", {
+            "session_id": str(user.session_id),
+            "session_token": user.session_token,
+            "gender": user.gender,
+            "preferred_gender": user.preferred_gender,
+            "country": user.country,
+            "preferred_country": user.preferred_country,
+            "language": user.language,
+            "priority": user.priority,
+        })
+        if isinstance(result, dict):
+            if "busy" in result:
+                raise QueueFullError(*result["busy"])
+            self._estimates[user.session_id] = result.get("eta")
+            return None
+        self._estimates.pop(user.session_id, None)
+        return (UUID(result[0]), UUID(result[1]), result[2])
+
+    async def reconnect(self, session_id: UUID) -> Optional[Tuple[UUID, UUID, bool]]:
+        result = await self._call("reconnect", str(session_id))
+        if not result:
+            return None
+        self._estimates.pop(session_id, None)
+        return (UUID(result[0]), UUID(result[1]), result[2])
+
+    async def leave_queue(self, session_id: UUID) -> bool:
+        self._estimates.pop(session_id, None)
+        return await self._call("leave", str(session_id))
+
+    async def expire_queue(self):
+        """Süre dolumu matchmaker sürecinde yapılır"""
+        return []
+
+    async def expire_restored(self):
+        """Snapshot/restore matchmaker sürecinde yapılır"""
+        return []
+
+    async def end_connection(self, session_id: UUID, reason: str = "NEXTED") -> Optional[UUID]:
+        return _uuid(await self._call("end", str(session_id), reason))
+
+    async def get_connection(self, session_id: UUID) -> Optional[ActiveConnection]:
+        row = await self._call("connection", str(session_id))
+        if not row:
+            return None
+        return ActiveConnection(
+            connection_id=UUID(row[0]),
+            session_a_id=UUID(row[1]),
+            session_b_id=UUID(row[2]),
+            started_at=row[3],
+        )
+
+    async def get_partner_session_id(self, session_id: UUID) -> Optional[UUID]:
+        return _uuid(await self._call("partner", str(session_id)))
+
+    async def get_queue_position(self, session_id: UUID) -> Optional[int]:
+        position, eta = await self._call("position", str(session_id))
+        self._estimates[session_id] = eta
+        return position
+
+    def estimated_wait(self, session_id: UUID) -> Optional[int]:
+        """Son join/position yanıtındaki tahmin"""
+        return self._estimates.get(session_id)
+
+    async def drain_position_updates(self):
+        """QUEUE_POSITION bildirimleri matchmaker sürecinden EVENT olarak gelir"""
+        return []
+
+    async def cleanup_session(self, session_id: UUID) -> Optional[UUID]:
+        self._session_websockets.pop(session_id, None)
+        self._estimates.pop(session_id, None)
+        return _uuid(await self._call("cleanup", str(session_id)))
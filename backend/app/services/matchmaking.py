@@ -12,86 +12,330 @@ AKIŞ:
 7. NEXT veya disconnect olduğunda bağlantı sonlandırılır
 """
 import asyncio
+import random
+import sys
+import time
 from datetime import datetime
-from typing import Dict, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any
 from uuid import UUID, uuid4
 from dataclasses import dataclass, field
 
+from app.services.match_index import MatchIndex, bucket_key, is_compatible
+from app.services.queue_position import QueuePositionTracker
+from app.services.matchmaking_stats import MatchmakingCounters, MatchmakingStats
+from app.services.recent_partners import RecentPartners
+from app.services.recent_connections import RecentConnections
+from app.services.timing_wheel import TimingWheel
+from app.services.wait_estimator import WaitEstimator
+from app.services.signaling_codec import Frame
 
-@dataclass
+
+@dataclass(slots=True)
 class QueuedUser:
-    """Kuyrukta bekleyen kullanıcı"""
+    """
+    Kuyrukta bekleyen kullanıcı.
+    __slots__ ile instance dict'i yok; joined_at monotonic saniye (float).
+    Kısa özellik string'leri intern edilir: 100k bekleyende "TR", "MALE"
+    gibi değerlerin tek kopyası tutulur.
+    """
     session_id: UUID
     session_token: str
     gender: str = "UNSPECIFIED"
     preferred_gender: Optional[str] = None
-    joined_at: datetime = field(default_factory=datetime.utcnow)
+    country: Optional[str] = None
+    preferred_country: Optional[str] = None
+    language: Optional[str] = None
+    joined_at: float = field(default_factory=time.monotonic)
     websocket: Any = None
+    # Premium/VIP: kovanın öncelikli şeridine girer
+    priority: bool = False
+    # Efektif giriş zamanı (öncelikliler için priority_boost kadar önde), sıralama anahtarı
+    rank_at: float = field(init=False, default=0.0)
+
+    def __post_init__(self):
+        self.rank_at = self.joined_at
+        self.gender = _intern(self.gender)
+        self.preferred_gender = _intern(self.preferred_gender)
+        self.country = _intern(self.country)
+        self.preferred_country = _intern(self.preferred_country)
+        self.language = _intern(self.language)
 
 
-@dataclass 
+@dataclass(slots=True)
 class ActiveConnection:
-    """Aktif video sohbet bağlantısı"""
+    """Aktif video sohbet bağlantısı (started_at: epoch saniye, DB ve istemci için duvar saati)"""
     connection_id: UUID
     session_a_id: UUID
     session_b_id: UUID
-    started_at: datetime = field(default_factory=datetime.utcnow)
+    started_at: float = field(default_factory=time.time)
+
+    @property
+    def started_at_datetime(self) -> datetime:
+        return datetime.utcfromtimestamp(self.started_at)
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class QueueFullError(Exception):
+    """Admission control: kuyruk (global) veya kullanıcının kovası dolu, JOIN reddedildi"""
+
+    def __init__(self, scope: str, retry_after: int):
+        super().__init__(f"{scope} queue is full")
+        self.scope = scope
+        self.retry_after = retry_after
+
+
+def busy_retry_after(base: int) -> int:
+    """Önerilen tekrar deneme süresi: base..2*base arası dağıtılır (reddedilenler aynı anda dönmesin)"""
+    return random.randint(max(base, 1), max(base, 1) * 2)
 
 
 class MatchmakingService:
     """
     In-memory matchmaking servisi.
-    Production'da Redis Pub/Sub ile değiştirilmeli.
+    Çok worker/node için RedisMatchmakingService kullanılır (USE_REDIS).
+    
+    Kuyruk ve bağlantı haritası tek bir lock ile korunur. Kritik bölgeler
+    await içermez (sadece in-memory işlemler), bu yüzden lock'u parçalamak
+    tek event loop'ta çekişmeyi azaltmaz, sadece maliyet ekler; parçalı
+    lock denendi, daha yavaştı ve JOIN/RECONNECT yarışına yol açtı
+    (ölçümler benchmarks/matchmaking_contention.py'de).
+    
+    Fenwick tree ve sayaçlar await içermeyen senkron adımlarla güncellenir;
+    tek event loop'ta bu adımlar bölünmez, ayrıca lock gerektirmez.
+    WebSocket kaydı matchmaking lock'unu almaz (snapshot'tan dönen kuyruk
+    kaydı olan session hariç, o join_queue ile aynı yoldan geçer).
     """
     
-    def __init__(self):
-        # Kuyruk: session_id -> QueuedUser
-        self._queue: Dict[UUID, QueuedUser] = {}
+    def __init__(
+        self,
+        lock_factory=asyncio.Lock,
+        batch_matching: bool = False,
+        max_round_size: int = 1000,
+        recent_partners: Optional[RecentPartners] = None,
+        queue_timeout: Optional[float] = None,
+        connection_log=None,
+        recent_connections: Optional[RecentConnections] = None,
+        priority_boost: float = 15.0,
+        snapshot_path: Optional[str] = None,
+        restore_grace: float = 30.0,
+        max_queue_size: int = 0,
+        max_bucket_size: int = 0,
+        busy_retry_after: int = 5,
+        wait_estimator: Optional[WaitEstimator] = None,
+    ):
+        # Kuyruk: (talep, cinsiyet, ülke, dil) kovalarına ayrılmış FIFO index
+        self._queue = MatchIndex()
+        
+        # Kuyruk ve bağlantı haritası için tek lock
+        self._lock = lock_factory()
+        
+        # Kuyruk sırası: bilet numarası üzerinde Fenwick tree
+        self._positions = QueuePositionTracker()
         
         # Aktif bağlantılar: connection_id -> ActiveConnection
         self._connections: Dict[UUID, ActiveConnection] = {}
         
-        # Session -> Connection mapping: session_id -> connection_id
-        self._session_connections: Dict[UUID, UUID] = {}
+        # Session -> Connection mapping: session_id -> ActiveConnection
+        # (ara connection_id araması yok)
+        self._session_connections: Dict[UUID, ActiveConnection] = {}
         
         # Session -> WebSocket mapping: session_id -> websocket
         self._session_websockets: Dict[UUID, Any] = {}
         
-        # Thread-safe için lock
-        self._lock = asyncio.Lock()
+        # Session handle'ları: her istekte yeniden çözülen UUID'lerin yerine
+        # kayıtlı tek nesne saklanır (kuyruk, index ve bağlantı yapıları aynı
+        # nesneyi paylaşır)
+        self._handles: Dict[UUID, UUID] = {}
+        
+        # Canlı sayaçlar (join/match/end/disconnect anında O(1) güncellenir)
+        self._counters = MatchmakingCounters()
+        
+        # Toplu eşleştirme modu: join sadece kuyruğa ekler, eşleşmeler
+        # run_match_round() turlarında yapılır
+        self.batch_matching = batch_matching
+        self._max_round_size = max_round_size
+        
+        # Yakın zamanda eşleşilenler (NEXT sonrası aynı kişiyle tekrar eşleşmeyi önler),
+        # bellek kullanımı session sayısından bağımsız olarak sınırlı
+        self._recent_partners = recent_partners if recent_partners is not None else RecentPartners()
+        
+        # Kuyruk süresi (MATCH_TIMEOUT_SECONDS): bekleyenler timing wheel'de,
+        # expire_queue() sadece süresi dolan yuvaya bakar
+        self.queue_timeout = queue_timeout
+        self._expiry = TimingWheel()
+        
+        # Kova bazlı varış/eşleşme hızları -> tahmini bekleme süresi
+        # (boş estimator falsy, `or` ile değiştirilmesin)
+        self._wait_estimator = wait_estimator if wait_estimator is not None else WaitEstimator()
+        
+        # connections tablosuna write-behind kayıt (ConnectionLog), hot path beklemez
+        self._connection_log = connection_log
+        
+        # Son partner index'i (RECONNECT, reconnect_unlocked kullanıcılar için)
+        self._recent_connections = recent_connections if recent_connections is not None else RecentConnections()
+        # Session'ın son JOIN isteği (filtreler): RECONNECT iki yönlü filtre kontrolünü bununla yapar
+        self._requests: Dict[UUID, QueuedUser] = {}
+        
+        # Öncelik şeritleri: premium/VIP bekleyen priority_boost saniye önce
+        # gelmiş sayılır; aynı kovadaki normal kullanıcıyı FIFO'ya göre en
+        # fazla bu kadar geciktirir (kovalar arası sıra: match_index)
+        self.priority_boost = priority_boost
+        
+        # Yeniden başlatmada durum snapshot'ı (stop'ta yazılır, start'ta okunur).
+        # Geri yüklenen session'lar restore_grace içinde socket'i dönmezse düşer;
+        # kuyruktakiler socket dönene kadar eşleşmeye açılmaz (hayalet eşleşme olmasın)
+        self.snapshot_path = snapshot_path
+        self.restore_grace = restore_grace
+        # Sunucu kapanıyor (sinyal alındı); istemcinin gönderdiği 1012 bunu değiştirmez
+        self.shutting_down = False
+        self._restored: Dict[UUID, QueuedUser] = {}
+        self._restore_grace = TimingWheel()
+        
+        # Admission control (0 = sınırsız): dolu kuyruğa/kovaya JOIN reddedilir
+        # (QueueFullError), eşleşmeyle hemen sonuçlanan JOIN'ler etkilenmez
+        self.max_queue_size = max_queue_size
+        self.max_bucket_size = max_bucket_size
+        self.busy_retry_after = busy_retry_after
+    
+    @property
+    def restores_sessions(self) -> bool:
+        """Kapanışta durum snapshot'a yazılıyor mu (sunucu kapanışındaki 1012'de route temizlik yapmaz)"""
+        return bool(self.snapshot_path)
+    
+    async def start(self) -> None:
+        """Lifespan başlangıcı: varsa snapshot'ı geri yükle"""
+        if not self.snapshot_path:
+            return
+        from app.services import matchmaking_snapshot
+        
+        snapshot = matchmaking_snapshot.load(self.snapshot_path)
+        if snapshot is not None:
+            self.restore_state(snapshot.queued, snapshot.connections)
+            print(f"Matchmaking restored: {len(snapshot.queued)} queued, {len(snapshot.connections)} connections")
+    
+    async def stop(self) -> None:
+        """Lifespan kapanışı: kuyruk ve bağlantıları snapshot'a yaz"""
+        if not self.snapshot_path:
+            return
+        from app.services import matchmaking_snapshot
+        
+        queued, connections = self.export_state()
+        if not queued and not connections:
+            return
+        size = matchmaking_snapshot.save(self.snapshot_path, queued, connections)
+        print(f"Matchmaking snapshot saved: {len(queued)} queued, {len(connections)} connections, {size} bytes")
+    
+    def export_state(self) -> Tuple[List[QueuedUser], List[ActiveConnection]]:
+        """Kuyruk (giriş sırasıyla, socket'i henüz dönmemiş restore kayıtları dahil) ve bağlantılar"""
+        queued = sorted(
+            [*self._queue.users(), *self._restored.values()],
+            key=lambda u: u.joined_at,
+        )
+        return queued, list(self._connections.values())
+    
+    def restore_state(self, queued: List[QueuedUser], connections: List[ActiveConnection]) -> None:
+        """
+        Snapshot'tan geri yükle (açılışta, trafik başlamadan).
+        Bağlantılar hemen yerine konur (connections tablosuna tekrar yazılmaz);
+        kuyruktakiler socket'leri kaydolunca kuyruğa döner. Hepsi grace
+        süresine alınır, expire_restored() dönmeyenleri düşürür.
+        """
+        for user in queued:
+            self._restored[user.session_id] = user
+            self._restore_grace.schedule(user.session_id, self.restore_grace)
+        for connection in connections:
+            self._connections[connection.connection_id] = connection
+            self._session_connections[connection.session_a_id] = connection
+            self._session_connections[connection.session_b_id] = connection
+            self._counters.active_connections += 1
+            self._restore_grace.schedule(connection.session_a_id, self.restore_grace)
+            self._restore_grace.schedule(connection.session_b_id, self.restore_grace)
+    
+    async def expire_restored(self) -> List[UUID]:
+        """
+        Grace süresinde socket'i dönmeyen restore kayıtlarını düşür.
+        Bağlantısı bu yüzden biten ve bağlı olan partner'ları döner (MATCH_ENDED için).
+        """
+        partners = []
+        for session_id in self._restore_grace.advance():
+            if session_id in self._session_websockets:
+                continue
+            self._restored.pop(session_id, None)
+            partner_id = await self.end_connection(session_id, "DISCONNECTED")
+            if partner_id is not None and partner_id in self._session_websockets:
+                partners.append(partner_id)
+        return partners
+    
+    def stats(self) -> MatchmakingStats:
+        """Sayaçların anlık görüntüsü (O(1))"""
+        priority_wait, normal_wait = self._wait_estimator.lane_waits()
+        return self._counters.snapshot(self._wait_estimator.typical_wait(), priority_wait, normal_wait)
     
     @property
     def online_count(self) -> int:
         """Toplam online kullanıcı (kuyruk + aktif bağlantılardakiler)"""
-        # Kuyruktakiler + Aktif bağlantılardaki tüm session'lar
-        unique_sessions = set()
-        # Kuyruktakiler
-        unique_sessions.update(self._queue.keys())
-        # Aktif bağlantılardakiler
-        for connection in self._connections.values():
-            unique_sessions.add(connection.session_a_id)
-            unique_sessions.add(connection.session_b_id)
-        return len(unique_sessions)
+        return self._counters.online_users
     
     @property
     def queue_size(self) -> int:
         """Kuyrukta bekleyenler"""
-        return len(self._queue)
+        return self._counters.in_queue
     
     @property
     def active_connections_count(self) -> int:
         """Aktif bağlantı sayısı"""
-        return len(self._connections)
+        return self._counters.active_connections
     
     async def register_websocket(self, session_id: UUID, websocket) -> None:
-        """WebSocket bağlantısını kaydet"""
-        async with self._lock:
-            self._session_websockets[session_id] = websocket
+        """
+        WebSocket bağlantısını kaydet (lock'suz, tek adımlı dict işlemi).
+        Snapshot'tan dönen kuyruk kaydı varsa session kuyruğa geri alınır.
+        """
+        session_id = self._handles.setdefault(session_id, session_id)
+        if session_id not in self._session_websockets:
+            self._counters.connected_sockets += 1
+        self._session_websockets[session_id] = websocket
+        if self._restored:
+            await self._resume_restored(session_id)
+    
+    async def _resume_restored(self, session_id: UUID) -> None:
+        """
+        Snapshot'tan gelen session'ın socket'i döndü: bekleyen kaydı normal
+        join ile kuyruğa geri koy. Orijinal giriş zamanı korunur (bekleme ve
+        öncelik hesabı kesintiyi de sayar); eşleşirse iki taraf burada bilgilendirilir.
+        """
+        self._restore_grace.cancel(session_id)
+        user = self._restored.pop(session_id, None)
+        if user is None:
+            return
+        user.session_id = session_id
+        try:
+            result = await self.join_queue(user)
+        except QueueFullError as e:
+            await self.deliver(session_id, {"type": "QUEUE_BUSY", "scope": e.scope, "retry_after_sec": e.retry_after})
+            return
+        if result is None:
+            return
+        connection_id, partner_id, is_initiator = result
+        for target, initiator in ((session_id, is_initiator), (partner_id, not is_initiator)):
+            await self.deliver(target, {
+                "type": "MATCH_FOUND",
+                "connection_id": str(connection_id),
+                "is_initiator": initiator,
+            })
     
     async def unregister_websocket(self, session_id: UUID) -> None:
-        """WebSocket bağlantısını kaldır"""
-        async with self._lock:
-            self._session_websockets.pop(session_id, None)
+        """WebSocket bağlantısını kaldır (lock'suz)"""
+        self._handles.pop(session_id, None)
+        if self._session_websockets.pop(session_id, None) is not None:
+            self._counters.connected_sockets -= 1
+    
+    def _handle(self, session_id: UUID) -> UUID:
+        """Kayıtlı session için paylaşılan UUID nesnesi (yoksa kendisi)"""
+        return self._handles.get(session_id, session_id)
     
     def get_websocket(self, session_id: UUID):
         """Session için WebSocket al"""
@@ -101,62 +345,241 @@ class MatchmakingService:
         """Tüm WebSocket'leri al (broadcast için)"""
         return dict(self._session_websockets)  # Return copy
     
+    async def deliver(self, session_id: UUID, message: dict) -> bool:
+        """
+        Session'a mesaj gönder. Redis modunda session başka worker'daysa
+        pub/sub ile iletilir; in-memory'de sadece yerel socket'e yazılır.
+        """
+        ws = self._session_websockets.get(session_id)
+        if ws is None:
+            return False
+        try:
+            await ws.send_frame(Frame(message))
+        except Exception:
+            return False  # Connection might be closed
+        return True
+    
     async def join_queue(self, user: QueuedUser) -> Optional[Tuple[UUID, UUID, bool]]:
         """
         Kuyruğa katıl ve eşleşme dene.
         Eşleşme olursa: (connection_id, partner_session_id, is_initiator) döner
         Kuyruğa eklendiyse: None döner
+        Kuyruk/kova doluysa ve eşleşme yoksa: QueueFullError
         """
+        user.session_id = self._handle(user.session_id)
         async with self._lock:
             # Zaten kuyrukta veya bağlantıda mı?
             if user.session_id in self._queue:
                 return None
             if user.session_id in self._session_connections:
                 return None
+            self._requests[user.session_id] = user
             
-            # Eşleşme ara
-            match = self._find_match(user)
+            # Eşleşme ara (toplu modda eşleşme tur sırasında yapılır)
+            match = None if self.batch_matching else self._find_match(user)
+            if not match:
+                self._admit(user)
             
-            if match:
-                # Bağlantı oluştur
-                connection_id = uuid4()
-                connection = ActiveConnection(
-                    connection_id=connection_id,
-                    session_a_id=user.session_id,
-                    session_b_id=match.session_id
-                )
-                
-                # Eşleşen kullanıcıyı kuyruktan çıkar
-                del self._queue[match.session_id]
-                
-                # Bağlantıyı kaydet
-                self._connections[connection_id] = connection
-                self._session_connections[user.session_id] = connection_id
-                self._session_connections[match.session_id] = connection_id
-                
-                # Yeni gelen initiator olsun (offer oluşturacak)
-                return (connection_id, match.session_id, True)
-            else:
+            self._counters.total_joins += 1
+            
+            if not match:
                 # Kuyruğa ekle
-                self._queue[user.session_id] = user
+                self._enqueue(user)
                 return None
+            
+            # Bağlantı oluştur
+            connection_id = uuid4()
+            connection = ActiveConnection(
+                connection_id=connection_id,
+                session_a_id=user.session_id,
+                session_b_id=match.session_id
+            )
+            
+            # Eşleşen kullanıcıyı kuyruktan çıkar
+            self._record_overtake(match)
+            self._dequeue(match.session_id, matched=True)
+            
+            # Bağlantıyı kaydet
+            self._add_connection(connection)
+            
+            # Yeni gelen initiator olsun (offer oluşturacak)
+            return (connection_id, match.session_id, True)
+    
+    def _admit(self, user: QueuedUser) -> None:
+        """
+        Kuyruğa giriş kontrolü (lock altında).
+        """
+        if self.max_queue_size and self._counters.in_queue >= self.max_queue_size:
+            self._counters.rejected_global += 1
+            raise QueueFullError("global", busy_retry_after(self.busy_retry_after))
+        if self.max_bucket_size and self._queue.bucket_size(user) >= self.max_bucket_size:
+            self._counters.rejected_bucket += 1
+            raise QueueFullError("bucket", busy_retry_after(self.busy_retry_after))
+    
+    def _enqueue(self, user: QueuedUser) -> None:
+        """
+        Kuyruk index'i, sıra takibi ve sayaçları birlikte güncelle (lock altında).
+        Öncelikli kullanıcı kovasında priority_boost öne yazılır; geçme sınırı kova içindir.
+        """
+        if user.priority:
+            user.rank_at = user.joined_at - self.priority_boost
+        self._queue.add(user)
+        self._positions.add(user.session_id)
+        self._counters.in_queue += 1
+        if self.queue_timeout:
+            self._expiry.schedule(user.session_id, self.queue_timeout)
+        self._wait_estimator.add(user.session_id, bucket_key(user), user.priority)
+    
+    def _dequeue(self, session_id: UUID, matched: bool = False) -> Optional[QueuedUser]:
+        """Kuyruktan çıkar (lock altında)"""
+        user = self._queue.remove(session_id)
+        if user is not None:
+            self._positions.remove(session_id)
+            self._counters.in_queue -= 1
+            self._expiry.cancel(session_id)
+            self._wait_estimator.remove(session_id, matched)
+        return user
+    
+    def _record_overtake(self, matched: QueuedUser) -> None:
+        """Öncelikli eşleşme daha eski bir normal bekleyeni geçtiyse say (çıkarmadan önce)"""
+        lead = self._queue.overtaken_by(matched)
+        if lead is not None:
+            self._counters.total_overtakes += 1
+            self._counters.max_overtake_sec = max(self._counters.max_overtake_sec, lead)
+    
+    def _add_connection(self, connection: ActiveConnection) -> None:
+        """Bağlantıyı kaydet (lock altında)"""
+        self._connections[connection.connection_id] = connection
+        self._session_connections[connection.session_a_id] = connection
+        self._session_connections[connection.session_b_id] = connection
+        self._counters.active_connections += 1
+        self._counters.total_matches += 1
+        if self._connection_log is not None:
+            self._connection_log.record_start(
+                connection.connection_id, connection.session_a_id, connection.session_b_id,
+                connection.started_at_datetime,
+            )
+    
+    def _remove_connection(self, connection: ActiveConnection) -> None:
+        """Bağlantıyı sil (lock altında)"""
+        self._recent_partners.record(connection.session_a_id, connection.session_b_id)
+        self._recent_connections.record(connection.session_a_id, connection.session_b_id)
+        del self._connections[connection.connection_id]
+        self._session_connections.pop(connection.session_a_id, None)
+        self._session_connections.pop(connection.session_b_id, None)
+        self._counters.active_connections -= 1
+        self._counters.total_ended += 1
     
     def _find_match(self, user: QueuedUser) -> Optional[QueuedUser]:
-        """Kuyruktan eşleşecek birini bul (FIFO)"""
-        for session_id, queued_user in self._queue.items():
-            if session_id != user.session_id:
-                # Basit FIFO eşleştirme
-                # İleride: cinsiyet filtresi, ülke filtresi eklenebilir
-                return queued_user
-        return None
+        """
+        Kuyruktan karşılıklı uyumlu birini bul.
+        Cinsiyet/ülke filtreleri iki yönlü uygulanır, kova başına FIFO.
+        """
+        return self._queue.find_match(user, avoid=self._recent_partners.was_recent)
+    
+    async def run_match_round(self) -> List[Tuple[UUID, UUID, UUID]]:
+        """
+        Toplu eşleştirme turu: kuyruğun (en eski max_round_size kişisi)
+        tek NumPy geçişinde puanlanır ve eşleştirilir.
+        Puanlama lock'suz ve ayrı thread'de yapılır; sonra lock altında
+        hâlâ kuyrukta olan çiftler bağlanır.
+        Dönüş: [(connection_id, initiator_session_id, partner_session_id), ...]
+        """
+        from app.services.matching_rounds import plan_round
+        
+        if len(self._queue) < 2:
+            return []
+        
+        users = sorted(self._queue.users(), key=lambda u: u.rank_at)[:self._max_round_size]
+        recent = {u.session_id: self._recent_partners.partners(u.session_id) for u in users}
+        pairs = await asyncio.to_thread(plan_round, users, recent.get)
+        if not pairs:
+            return []
+        
+        matches = []
+        async with self._lock:
+            for initiator, partner in pairs:
+                # Puanlama sırasında ayrılan/eşleşen olduysa çifti atla
+                if self._queue.get(initiator.session_id) is not initiator:
+                    continue
+                if self._queue.get(partner.session_id) is not partner:
+                    continue
+                self._record_overtake(initiator)
+                self._record_overtake(partner)
+                self._dequeue(initiator.session_id, matched=True)
+                self._dequeue(partner.session_id, matched=True)
+                connection = ActiveConnection(
+                    connection_id=uuid4(),
+                    session_a_id=initiator.session_id,
+                    session_b_id=partner.session_id
+                )
+                self._add_connection(connection)
+                matches.append((connection.connection_id, initiator.session_id, partner.session_id))
+        return matches
+    
+    async def reconnect(self, session_id: UUID) -> Optional[Tuple[UUID, UUID, bool]]:
+        """
+        Son partnerle kuyruğu atlayarak yeniden eşleş (RECONNECT).
+        İki taraf da pencere içinde birbirinin son partneriyse, partner hâlâ
+        bağlıysa, ikisi de başka bir bağlantıda değilse ve son JOIN
+        filtreleri birbirini hâlâ kabul ediyorsa bağlanırlar (kuyruktaysalar
+        çıkarılır). Partner o arada başkasıyla eşleştiyse veya filtresini
+        değiştirdiyse RECONNECT onu zorla geri çekemez.
+        Dönüş join_queue ile aynı: (connection_id, partner_session_id, True) veya None
+        """
+        session_id = self._handle(session_id)
+        partner_id = self._recent_connections.partner_of(session_id)
+        if partner_id is None or partner_id not in self._session_websockets:
+            return None
+        
+        async with self._lock:
+            if session_id in self._session_connections or partner_id in self._session_connections:
+                return None
+            if self._recent_connections.partner_of(session_id) != partner_id:
+                return None
+            if self._recent_connections.partner_of(partner_id) != session_id:
+                return None
+            request, partner_request = self._requests.get(session_id), self._requests.get(partner_id)
+            if request is not None and partner_request is not None and not is_compatible(request, partner_request):
+                return None
+            
+            self._dequeue(session_id)
+            self._dequeue(partner_id)
+            connection = ActiveConnection(
+                connection_id=uuid4(),
+                session_a_id=session_id,
+                session_b_id=partner_id
+            )
+            self._add_connection(connection)
+            self._recent_connections.consume(session_id, partner_id)
+            return (connection.connection_id, partner_id, True)
     
     async def leave_queue(self, session_id: UUID) -> bool:
         """Kuyruktan ayrıl"""
-        async with self._lock:
-            if session_id in self._queue:
-                del self._queue[session_id]
-                return True
+        if session_id not in self._queue:
             return False
+        async with self._lock:
+            return self._dequeue(session_id) is not None
+    
+    async def expire_queue(self) -> List[UUID]:
+        """
+        Süresi (queue_timeout) dolan bekleyenleri kuyruktan çıkar.
+        Timing wheel sayesinde kuyruk taranmaz, maliyet kayıt başına O(1) amortize.
+        Çıkarılan session_id'leri döner (istemciye QUEUE_TIMEOUT gönderilir).
+        """
+        expired = []
+        for session_id in self._expiry.advance():
+            if session_id not in self._queue:
+                continue
+            async with self._lock:
+                # Lock beklerken eşleşip yeniden kuyruğa girmiş olabilir (yeni süre)
+                if session_id in self._expiry:
+                    continue
+                if self._dequeue(session_id) is None:
+                    continue
+            self._counters.total_expired += 1
+            expired.append(session_id)
+        return expired
     
     async def end_connection(self, session_id: UUID, reason: str = "NEXTED") -> Optional[UUID]:
         """
@@ -164,11 +587,7 @@ class MatchmakingService:
         Partner'ın session_id'sini döner (varsa).
         """
         async with self._lock:
-            connection_id = self._session_connections.get(session_id)
-            if not connection_id:
-                return None
-            
-            connection = self._connections.get(connection_id)
+            connection = self._session_connections.get(session_id)
             if not connection:
                 return None
             
@@ -179,18 +598,15 @@ class MatchmakingService:
                 partner_id = connection.session_a_id
             
             # Temizlik
-            del self._connections[connection_id]
-            self._session_connections.pop(session_id, None)
-            self._session_connections.pop(partner_id, None)
+            self._remove_connection(connection)
+            if self._connection_log is not None:
+                self._connection_log.record_end(connection.connection_id, reason)
             
             return partner_id
     
     async def get_connection(self, session_id: UUID) -> Optional[ActiveConnection]:
         """Session için aktif bağlantıyı al"""
-        connection_id = self._session_connections.get(session_id)
-        if connection_id:
-            return self._connections.get(connection_id)
-        return None
+        return self._session_connections.get(session_id)
     
     async def get_partner_session_id(self, session_id: UUID) -> Optional[UUID]:
         """Partner'ın session_id'sini al"""
@@ -203,19 +619,27 @@ class MatchmakingService:
         return None
     
     async def get_queue_position(self, session_id: UUID) -> Optional[int]:
-        """Kuyruktaki pozisyonu al (1'den başlar)"""
-        position = 1
-        for sid in self._queue.keys():
-            if sid == session_id:
-                return position
-            position += 1
-        return None
+        """Kuyruktaki pozisyonu al (1'den başlar), O(log n)"""
+        return self._positions.position(session_id)
+    
+    def estimated_wait(self, session_id: UUID) -> Optional[int]:
+        """Kuyruktaki session için tahmini kalan bekleme (saniye), O(1)"""
+        return self._wait_estimator.estimate(session_id)
+    
+    async def drain_position_updates(self):
+        """
+        Öndekiler ayrıldığı için sırası değişenler: [(session_id, position), ...]
+        Periyodik olarak toplu QUEUE_POSITION göndermek için kullanılır.
+        """
+        return self._positions.drain_updates()
     
     async def cleanup_session(self, session_id: UUID) -> Optional[UUID]:
         """
         Disconnect olan session için temizlik yap.
         Partner varsa partner_id döner.
         """
+        self._counters.total_disconnects += 1
+        
         # Kuyruktan çıkar
         await self.leave_queue(session_id)
         
@@ -224,6 +648,9 @@ class MatchmakingService:
         
         # WebSocket'i kaldır
         await self.unregister_websocket(session_id)
+        self._recent_partners.forget(session_id)
+        self._recent_connections.forget(session_id)
+        self._requests.pop(session_id, None)
         
         return partner_id
 
@@ -232,9 +659,65 @@ class MatchmakingService:
 _matchmaking_service = None
 
 
+def create_local_matchmaking_service(settings) -> MatchmakingService:
+    """Ayarlara göre in-memory servis (tek süreç veya matchmaker süreci)"""
+    from app.services.connection_log import get_connection_log
+    return MatchmakingService(
+        batch_matching=settings.MATCHING_MODE == "batch",
+        max_round_size=settings.MATCH_ROUND_MAX_SIZE,
+        recent_partners=RecentPartners(
+            per_session=settings.RECENT_PARTNERS_PER_SESSION,
+            max_sessions=settings.RECENT_PARTNERS_MAX_SESSIONS,
+            window_seconds=settings.RECENT_PARTNER_WINDOW_SECONDS,
+        ),
+        queue_timeout=settings.MATCH_TIMEOUT_SECONDS,
+        connection_log=get_connection_log(),
+        recent_connections=RecentConnections(window_seconds=settings.RECONNECT_WINDOW_SECONDS),
+        priority_boost=settings.MATCH_PRIORITY_BOOST_SECONDS,
+        snapshot_path=settings.MATCHMAKING_SNAPSHOT_PATH or None,
+        restore_grace=settings.MATCHMAKING_RESTORE_GRACE_SECONDS,
+        max_queue_size=settings.MATCH_QUEUE_MAX_SIZE,
+        max_bucket_size=settings.MATCH_BUCKET_MAX_SIZE,
+        busy_retry_after=settings.QUEUE_BUSY_RETRY_AFTER_SECONDS,
+    )
+
+
+def use_matchmaking_service(service) -> None:
+    """Singleton'ı dışarıdan ayarla (matchmaker süreci kendi in-memory servisini kullanır)"""
+    global _matchmaking_service
+    _matchmaking_service = service
+
+
 def get_matchmaking_service() -> MatchmakingService:
-    """Matchmaking servis instance'ını al"""
+    """
+    Matchmaking servis instance'ını al.
+    USE_REDIS=true ise tüm worker/node'lar Redis üzerinden ortak kuyruğu kullanır.
+    MATCHMAKER_SOCKET ayarlıysa worker'lar ayrı matchmaker sürecine bağlanır.
+    """
     global _matchmaking_service
     if _matchmaking_service is None:
-        _matchmaking_service = MatchmakingService()
+        from app.config import get_settings
+        from app.services.connection_log import get_connection_log
+        settings = get_settings()
+        if settings.MATCHMAKER_SOCKET:
+            from app.services.matchmaker_ipc import IpcMatchmakingService
+            _matchmaking_service = IpcMatchmakingService(settings.MATCHMAKER_SOCKET)
+        elif settings.USE_REDIS:
+            import redis.asyncio as aioredis
+            from app.services.redis_matchmaking import RedisMatchmakingService
+            client = aioredis.from_url(settings.REDIS_URL, decode_responses=True)
+            _matchmaking_service = RedisMatchmakingService(
+                client,
+                queue_timeout=settings.MATCH_TIMEOUT_SECONDS,
+                connection_log=get_connection_log(),
+                reconnect_window=settings.RECONNECT_WINDOW_SECONDS,
+                priority_boost=settings.MATCH_PRIORITY_BOOST_SECONDS,
+                recent_partner_window=settings.RECENT_PARTNER_WINDOW_SECONDS,
+                recent_partners_per_session=settings.RECENT_PARTNERS_PER_SESSION,
+                max_queue_size=settings.MATCH_QUEUE_MAX_SIZE,
+                max_bucket_size=settings.MATCH_BUCKET_MAX_SIZE,
+                busy_retry_after=settings.QUEUE_BUSY_RETRY_AFTER_SECONDS,
+            )
+        else:
+            _matchmaking_service = create_local_matchmaking_service(settings)
     return _matchmaking_service
@@ -0,0 +1,187 @@
+"""
+Matchmaking Snapshot - Yeniden başlatmada kuyruk ve bağlantıları koru
+
+Kapanışta (lifespan shutdown) in-memory kuyruk ve aktif bağlantılar
+yerel bir dosyaya yazılır, açılışta geri okunur. Biçim sabit uzunluklu
+struct kayıtlarıdır (JSON/pickle yok); string'ler (cinsiyet, ülke, dil)
+tek bir tabloda bir kez tutulur ve kayıtlar indeksle başvurur. Kayıtlar
+iter_unpack ile tek geçişte okunur.
+
+    başlık      <4sHdIII     magic, sürüm, kayıt zamanı (epoch), string, kuyruk, bağlantı sayısı
+    string'ler  <nI + UTF-8  bayt uzunlukları, ardından birleşik veri
+    kuyruk      <16sBd5I     session_id, bayraklar (bit0: öncelikli), giriş zamanı (epoch),
+                             gender, pref_gender, country, pref_country, language
+                             (string tablosunda 1'den başlayan indeks, 0 = None)
+    bağlantı    <16s16s16sd  connection_id, session_a, session_b, started_at (epoch)
+
+Kuyruk giriş zamanları monotonic saatten epoch'a çevrilerek yazılır;
+böylece kesinti süresi de bekleme süresine sayılır.
+
+Session token'ları diske yazılmaz: eşleştirme token'ı kullanmaz, geri
+yüklenen kayıtlar boş token ile döner (istemci zaten kendi token'ı ile
+yeniden bağlanır). Dosya yine de sadece sahibi okuyabilecek şekilde
+(0600) oluşturulur.
+"""
+import os
+import struct
+import time
+from typing import Dict, List, NamedTuple, Optional
+from uuid import UUID
+
+from app.services.matchmaking import ActiveConnection, QueuedUser
+
+
+MAGIC = b"OMMS"
+VERSION = 2
+
+# Bundan eski snapshot'lar yüklenmez (istemcilerin session'ları çoktan düşmüştür)
+MAX_SNAPSHOT_AGE_SECONDS = 600
+
+_HEADER = struct.Struct("<4sHdIII")
+_QUEUED = struct.Struct("<16sBd5I")
+_CONNECTION = struct.Struct("<16s16s16sd")
+
+_PRIORITY = 0x01
+
+
+class Snapshot(NamedTuple):
+    saved_at: float
+    queued: List[QueuedUser]
+    connections: List[ActiveConnection]
+
+
+def encode(queued: List[QueuedUser], connections: List[ActiveConnection]) -> bytes:
+    """Kuyruk (sırasıyla) ve bağlantıları ikili biçime çevir"""
+    wall_offset = time.time() - time.monotonic()
+    strings: Dict[str, int] = {}
+
+    def ref(value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings) + 1
+        return index
+
+    records = [
+        _QUEUED.pack(
+            user.session_id.bytes,
+            _PRIORITY if user.priority else 0,
+            user.joined_at + wall_offset,
+            ref(user.gender), ref(user.preferred_gender),
+            ref(user.country), ref(user.preferred_country), ref(user.language),
+        )
+        for user in queued
+    ]
+    records.extend(
+        _CONNECTION.pack(
+            connection.connection_id.bytes,
+            connection.session_a_id.bytes,
+            connection.session_b_id.bytes,
+            connection.started_at,
+        )
+        for connection in connections
+    )
+
+    encoded = [value.encode("utf-8") for value in strings]
+    return b"".join([
+        _HEADER.pack(MAGIC, VERSION, time.time(), len(encoded), len(queued), len(connections)),
+        struct.pack(f"<{len(encoded)}I", *map(len, encoded)),
+        *encoded,
+        *records,
+    ])
+
+
+def decode(data: bytes) -> Snapshot:
+    """encode() çıktısını geri oku; bozuk/uyumsuz dosyada ValueError"""
+    buffer = memoryview(data)
+    try:
+        magic, version, saved_at, string_count, queued_count, connection_count = _HEADER.unpack_from(buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"unsupported snapshot (magic={magic!r}, version={version})")
+        offset = _HEADER.size
+
+        lengths = struct.unpack_from(f"<{string_count}I", buffer, offset)
+        offset += 4 * string_count
+        strings = [None]
+        for length in lengths:
+            strings.append(str(buffer[offset:offset + length], "utf-8"))
+            offset += length
+
+        monotonic_offset = time.monotonic() - time.time()
+
+        end = offset + _QUEUED.size * queued_count
+        queued = [
+            QueuedUser(
+                session_id=UUID(bytes=session_id),
+                session_token="",
+                gender=strings[gender] or "UNSPECIFIED",
+                preferred_gender=strings[preferred_gender],
+                country=strings[country],
+                preferred_country=strings[preferred_country],
+                language=strings[language],
+                joined_at=joined_at + monotonic_offset,
+                priority=bool(flags & _PRIORITY),
+            )
+            for session_id, flags, joined_at, gender, preferred_gender, country, preferred_country, language
+            in _QUEUED.iter_unpack(_exact(buffer, offset, end))
+        ]
+
+        offset, end = end, end + _CONNECTION.size * connection_count
+        connections = [
+            ActiveConnection(
+                connection_id=UUID(bytes=connection_id),
+                session_a_id=UUID(bytes=a),
+                session_b_id=UUID(bytes=b),
+                started_at=started_at,
+            )
+            for connection_id, a, b, started_at in _CONNECTION.iter_unpack(_exact(buffer, offset, end))
+        ]
+    except (struct.error, UnicodeDecodeError, IndexError) as e:
+        raise ValueError(f"corrupt snapshot: {e}") from None
+    return Snapshot(saved_at, queued, connections)
+
+
+def _exact(buffer: memoryview, start: int, end: int) -> memoryview:
+    if end > len(buffer):
+        raise struct.error(f"expected {end} bytes, got {len(buffer)}")
+    return buffer[start:end]
+
+
+def save(path: str, queued: List[QueuedUser], connections: List[ActiveConnection]) -> int:
+    """Atomik yaz (0600 geçici dosya + rename); yazılan bayt sayısını döner"""
+    data = encode(queued, connections)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)  # Eski geçici dosyanın izinleri devralınmasın
+    with os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+def load(path: str, max_age: float = MAX_SNAPSHOT_AGE_SECONDS) -> Optional[Snapshot]:
+    """
+    Snapshot'ı oku ve dosyayı sil (sonraki bir çökme sonrası eski durum
+    tekrar yüklenmesin). Dosya yoksa, bozuksa veya çok eskiyse None.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    os.remove(path)
+
+    try:
+        snapshot = decode(data)
+    except ValueError as e:
+        print(f"Matchmaking snapshot ignored: {e}")
+        return None
+    age = time.time() - snapshot.saved_at
+    if age > max_age:
+        print(f"Matchmaking snapshot ignored: {int(age)}s old")
+        return None
+    return snapshot
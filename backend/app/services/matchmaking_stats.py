@@ -0,0 +1,97 @@
+"""
+Matchmaking Stats - Artımlı sayaçlar ve ucuz anlık görüntü
+
+Sayaçlar join/match/end/disconnect anında O(1) güncellenir.
+Heartbeat ve online-count gibi sık çağrılan endpoint'ler her seferinde
+kuyruk/bağlantı yapılarını gezmek yerine `snapshot()` okur.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class MatchmakingStats:
+    """Sayaçların değişmez anlık görüntüsü"""
+    online_users: int
+    in_queue: int
+    active_connections: int
+    connected_sockets: int
+    total_joins: int
+    total_matches: int
+    total_ended: int
+    total_disconnects: int
+    total_expired: int = 0
+    estimated_wait_sec: Optional[int] = None
+    # Öncelik şeritleri adalet ölçümü: şerit başına gerçekleşen bekleme (EWMA),
+    # öncelikli eşleşmenin daha eski normal bekleyeni geçme sayısı ve en büyük
+    # giriş farkı (priority_boost ile sınırlı olmalı)
+    priority_wait_sec: Optional[float] = None
+    normal_wait_sec: Optional[float] = None
+    total_overtakes: int = 0
+    max_overtake_sec: float = 0.0
+    # Admission control: kuyruk (global) veya kova sınırı dolu olduğu için reddedilen JOIN'ler
+    rejected_global: int = 0
+    rejected_bucket: int = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "online_users": self.online_users,
+            "in_queue": self.in_queue,
+            "active_connections": self.active_connections,
+            "estimated_wait_sec": self.estimated_wait_sec,
+        }
+
+
+class MatchmakingCounters:
+    """Canlı sayaçlar (MatchmakingService içinden güncellenir)"""
+
+    __slots__ = (
+        "in_queue", "active_connections", "connected_sockets",
+        "total_joins", "total_matches", "total_ended", "total_disconnects",
+        "total_expired", "total_overtakes", "max_overtake_sec",
+        "rejected_global", "rejected_bucket",
+    )
+
+    def __init__(self):
+        self.in_queue = 0
+        self.active_connections = 0
+        self.connected_sockets = 0
+        self.total_joins = 0
+        self.total_matches = 0
+        self.total_ended = 0
+        self.total_disconnects = 0
+        self.total_expired = 0
+        self.total_overtakes = 0
+        self.max_overtake_sec = 0.0
+        self.rejected_global = 0
+        self.rejected_bucket = 0
+
+    @property
+    def online_users(self) -> int:
+        # Bir session aynı anda ya kuyrukta ya da tek bir bağlantıda olur
+        return self.in_queue + 2 * self.active_connections
+
+    def snapshot(
+        self,
+        estimated_wait_sec: Optional[int] = None,
+        priority_wait_sec: Optional[float] = None,
+        normal_wait_sec: Optional[float] = None,
+    ) -> MatchmakingStats:
+        return MatchmakingStats(
+            online_users=self.online_users,
+            in_queue=self.in_queue,
+            active_connections=self.active_connections,
+            connected_sockets=self.connected_sockets,
+            total_joins=self.total_joins,
+            total_matches=self.total_matches,
+            total_ended=self.total_ended,
+            total_disconnects=self.total_disconnects,
+            total_expired=self.total_expired,
+            estimated_wait_sec=estimated_wait_sec,
+            priority_wait_sec=priority_wait_sec,
+            normal_wait_sec=normal_wait_sec,
+            total_overtakes=self.total_overtakes,
+            max_overtake_sec=round(self.max_overtake_sec, 3),
+            rejected_global=self.rejected_global,
+            rejected_bucket=self.rejected_bucket,
+        )
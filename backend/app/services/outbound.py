@@ -0,0 +1,158 @@
+"""
+Outbound - WebSocket başına sınırlı giden mesaj kuyruğu
+
+Route'lar ve MatchmakingService.deliver socket'e doğrudan yazmaz: mesaj
+socket'in kuyruğuna eklenir, socket başına tek bir writer task sırayla
+gönderir. Yavaş bir mobil istemci forward_signal, notify_partner_end veya
+broadcast yapan tarafı bekletmez; mesaj sırası socket başına korunur.
+
+Kuyruk dolunca (WS_SLOW_CONSUMER_POLICY):
+
+    drop_oldest  en eski kritik olmayan mesaj atılır (QUEUE_POSITION,
+                 ONLINE_COUNT_UPDATE gibi yenisi gelecek olanlar); atılacak
+                 yoksa yeni kritik olmayan mesaj atılır, kritik mesaja yer
+                 yoksa istemci koparılır
+    disconnect   istemci SLOW_CONSUMER_CLOSE_CODE ile koparılır
+
+Koparılan istemcinin receive döngüsü WebSocketDisconnect alır ve normal
+temizlik (cleanup_session, partnere MATCH_ENDED) çalışır.
+"""
+import asyncio
+from collections import deque
+from typing import Optional
+
+from app.services.signaling_codec import Frame
+
+
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+# 1013 Try Again Later: istemci yeniden bağlanıp devam edebilir
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+
+class OutboundCounters:
+    """Süreç genelinde giden kuyruk sayaçları (admin istatistikleri için)"""
+
+    __slots__ = ("sockets", "queued", "max_depth", "sent", "dropped", "disconnected")
+
+    def __init__(self):
+        self.sockets = 0
+        self.queued = 0  # Tüm kuyruklarda bekleyen mesaj
+        self.max_depth = 0  # Tek bir socket'te görülen en derin kuyruk
+        self.sent = 0
+        self.dropped = 0
+        self.disconnected = 0  # Yavaş istemci olarak koparılanlar
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+_counters = OutboundCounters()
+
+
+def outbound_stats() -> dict:
+    return _counters.as_dict()
+
+
+class OutboundSocket:
+    """
+    WebSocket vekili: send_frame beklemez, mesajı kuyruğa ekler.
+    Kayıtlı socket olarak MatchmakingService'e bu nesne verilir; sarılan
+    socket (JsonSocket/MsgpackSocket) Frame'i kendi protokolünde gönderir.
+    """
+
+    __slots__ = ("websocket", "max_size", "policy", "closed", "_queue", "_wakeup", "_task")
+
+    def __init__(self, websocket, max_size: int = 256, policy: str = DROP_OLDEST):
+        if policy not in (DROP_OLDEST, DISCONNECT):
+            raise ValueError(f"Unknown slow consumer policy: {policy}")
+        self.websocket = websocket
+        self.max_size = max_size
+        self.policy = policy
+        self.closed = False
+        # (Frame, kritik mi)
+        self._queue: deque = deque()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = asyncio.create_task(self._run())
+        _counters.sockets += 1
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    async def send_frame(self, frame: Frame, critical: bool = True) -> None:
+        """
+        Kuyruğa ekle. Socket kapalıysa veya kritik mesaj sığmadığı için
+        istemci koparıldıysa ConnectionError (deliver False döner).
+        """
+        if self.closed:
+            raise ConnectionError("WebSocket closed")
+        if len(self._queue) >= self.max_size and not self._make_room(critical):
+            if critical:
+                raise ConnectionError("Slow consumer disconnected")
+            return
+
+        self._queue.append((frame, critical))
+        _counters.queued += 1
+        if len(self._queue) > _counters.max_depth:
+            _counters.max_depth = len(self._queue)
+        self._wakeup.set()
+
+    def _make_room(self, critical: bool) -> bool:
+        """Kuyruk dolu: politikaya göre yer aç; açılamazsa False"""
+        if self.policy == DROP_OLDEST:
+            for index, (_, queued_critical) in enumerate(self._queue):
+                if not queued_critical:
+                    del self._queue[index]
+                    _counters.queued -= 1
+                    _counters.dropped += 1
+                    return True
+            if not critical:
+                _counters.dropped += 1
+                return False
+        self._disconnect()
+        return False
+
+    async def _run(self) -> None:
+        """Writer task: kuyruğu sırayla socket'e yaz"""
+        queue = self._queue
+        try:
+            while True:
+                if not queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                    continue
+                frame, _ = queue.popleft()
+                _counters.queued -= 1
+                await self.websocket.send_frame(frame)
+                _counters.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # Socket kapandı; receive döngüsü disconnect'i ayrıca görür
+            self._task = None
+            self.close()
+
+    def _disconnect(self) -> None:
+        _counters.disconnected += 1
+        self.close()
+        self._task = asyncio.create_task(self._close_websocket())
+
+    async def _close_websocket(self) -> None:
+        try:
+            await self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Slow consumer")
+        except Exception:
+            pass  # Already closed
+
+    def close(self) -> None:
+        """Writer'ı durdur, bekleyen mesajları bırak (socket kapanırken)"""
+        if self.closed:
+            return
+        self.closed = True
+        _counters.sockets -= 1
+        _counters.queued -= len(self._queue)
+        self._queue.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
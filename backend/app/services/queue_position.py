@@ -0,0 +1,138 @@
+"""
+Queue Position - Kuyruk sırası takibi (Fenwick tree)
+
+Her kuyruğa girişe artan bir bilet numarası verilir. Fenwick tree
+bilet numarası üzerinde "kuyrukta mı" bitini tutar; bir kullanıcının
+sırası kendi biletine kadar olan prefix toplamıdır: O(log n).
+
+Öndeki biri ayrıldığında sadece o biletten sonrakilerin sırası değişir.
+Bu en küçük "kirli" bilet işaretlenir; toplu güncelleme sırasında sadece
+etkilenen kuyruk sonu taranır.
+"""
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+
+class FenwickTree:
+    """1-indexed binary indexed tree (toplam ve nokta güncelleme)"""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._tree = [0] * (size + 1)
+
+    def add(self, index: int, delta: int) -> None:
+        while index <= self.size:
+            self._tree[index] += delta
+            index += index & -index
+
+    def prefix_sum(self, index: int) -> int:
+        total = 0
+        while index > 0:
+            total += self._tree[index]
+            index -= index & -index
+        return total
+
+    @classmethod
+    def from_ones(cls, size: int, count: int) -> "FenwickTree":
+        """İlk `count` indeksi 1 olan ağacı O(size) kur"""
+        tree = cls(size)
+        for i in range(1, count + 1):
+            tree._tree[i] = 1
+        for i in range(1, size + 1):
+            parent = i + (i & -i)
+            if parent <= size:
+                tree._tree[parent] += tree._tree[i]
+        return tree
+
+
+class QueuePositionTracker:
+    """
+    session_id -> bilet eşlemesi ve Fenwick tree.
+    Bilet alanı dolunca canlı kayıtlar yeniden numaralanır (amortize O(1)).
+    """
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._capacity = initial_capacity
+        self._tree = FenwickTree(initial_capacity)
+        # Bilet sırasına göre (ekleme sırası == bilet sırası)
+        self._tickets: "OrderedDict[UUID, int]" = OrderedDict()
+        self._next_ticket = 1
+        # Sırası değişmiş olabilecek en küçük bilet (yoksa None)
+        self._dirty_from: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self._tickets)
+
+    def __contains__(self, session_id: UUID) -> bool:
+        return session_id in self._tickets
+
+    def add(self, session_id: UUID) -> int:
+        """Kuyruğun sonuna ekle, bilet numarasını döner"""
+        if session_id in self._tickets:
+            return self._tickets[session_id]
+        if self._next_ticket > self._capacity:
+            self._compact()
+        ticket = self._next_ticket
+        self._next_ticket += 1
+        self._tickets[session_id] = ticket
+        self._tree.add(ticket, 1)
+        return ticket
+
+    def remove(self, session_id: UUID) -> bool:
+        """Kuyruktan çıkar; arkadakilerin sırası kirli işaretlenir"""
+        ticket = self._tickets.pop(session_id, None)
+        if ticket is None:
+            return False
+        self._tree.add(ticket, -1)
+        if self._dirty_from is None or ticket < self._dirty_from:
+            self._dirty_from = ticket
+        return True
+
+    def position(self, session_id: UUID) -> Optional[int]:
+        """Kuyruktaki sıra (1'den başlar)"""
+        ticket = self._tickets.get(session_id)
+        if ticket is None:
+            return None
+        return self._tree.prefix_sum(ticket)
+
+    def ahead_of(self, session_id: UUID) -> Optional[int]:
+        """Önünde bekleyen kişi sayısı"""
+        position = self.position(session_id)
+        return None if position is None else position - 1
+
+    def drain_updates(self) -> List[Tuple[UUID, int]]:
+        """
+        Son çağrıdan beri sırası değişenleri (session_id, yeni sıra) olarak döner.
+        Sadece kirli biletten sonraki kuyruk sonu gezilir: O(etkilenen).
+        """
+        dirty_from = self._dirty_from
+        self._dirty_from = None
+        if dirty_from is None:
+            return []
+
+        updates = []
+        position = len(self._tickets)
+        for session_id in reversed(self._tickets):
+            if self._tickets[session_id] < dirty_from:
+                break
+            updates.append((session_id, position))
+            position -= 1
+        updates.reverse()
+        return updates
+
+    def _compact(self) -> None:
+        """Canlı biletleri 1..n olarak yeniden numarala, gerekirse kapasiteyi büyüt"""
+        live = len(self._tickets)
+        while live * 2 > self._capacity:
+            self._capacity *= 2
+
+        remapped = {}
+        for new_ticket, session_id in enumerate(self._tickets, start=1):
+            remapped[session_id] = new_ticket
+        self._tickets = OrderedDict(remapped)
+        self._tree = FenwickTree.from_ones(self._capacity, live)
+        self._next_ticket = live + 1
+        # Numaralar değişti; kirli işaret yeni numaralara göre geçersiz
+        if self._dirty_from is not None:
+            self._dirty_from = 1
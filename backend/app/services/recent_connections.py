@@ -0,0 +1,66 @@
+"""
+Recent Connections - Yeniden bağlanma (RECONNECT) için son partner index'i
+
+Bağlantı bittiğinde iki taraf için "son partner" kaydı tutulur:
+
+    session_id -> (partner_id, ended_at)
+
+Sorgu ve kayıt O(1). Kayıtlar eklenme sırasıyla tutulduğu için süresi
+dolanlar baştan temizlenir (amortize O(1)); toplam kayıt sayısı
+max_sessions ile sınırlıdır. Geçmiş tabloları taranmaz.
+"""
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from uuid import UUID
+
+
+class RecentConnections:
+    """Session başına son partner, pencere süresi sonunda geçersiz"""
+
+    def __init__(self, window_seconds: float = 120.0, max_sessions: int = 100_000, clock=time.monotonic):
+        self._window = window_seconds
+        self._max_sessions = max_sessions
+        self._clock = clock
+        self._last: "OrderedDict[UUID, Tuple[UUID, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._last)
+
+    def record(self, a: UUID, b: UUID) -> None:
+        """Biten bağlantıyı iki yönlü kaydet"""
+        now = self._clock()
+        for session_id, partner_id in ((a, b), (b, a)):
+            self._last.pop(session_id, None)
+            self._last[session_id] = (partner_id, now)
+        self._prune(now)
+
+    def partner_of(self, session_id: UUID) -> Optional[UUID]:
+        """Pencere içindeki son partner (yoksa None)"""
+        entry = self._last.get(session_id)
+        if entry is None:
+            return None
+        partner_id, ended_at = entry
+        if self._clock() - ended_at > self._window:
+            del self._last[session_id]
+            return None
+        return partner_id
+
+    def consume(self, a: UUID, b: UUID) -> None:
+        """Yeniden bağlanıldı: iki tarafın kaydını sil"""
+        for session_id, partner_id in ((a, b), (b, a)):
+            entry = self._last.get(session_id)
+            if entry is not None and entry[0] == partner_id:
+                del self._last[session_id]
+
+    def forget(self, session_id: UUID) -> None:
+        """Session kapandı"""
+        self._last.pop(session_id, None)
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self._window
+        while self._last:
+            session_id, (_, ended_at) = next(iter(self._last.items()))
+            if ended_at >= cutoff and len(self._last) <= self._max_sessions:
+                return
+            del self._last[session_id]
@@ -0,0 +1,129 @@
+"""
+Recent Partners - Yakın zamanda eşleşilen kişileri sınırlı bellekle hatırla
+
+NEXT'e basan kullanıcının az önce geçtiği kişiyle tekrar eşleşmemesi için:
+
+1. Session başına küçük bir ring buffer (son K partner), toplam session
+   sayısı LRU ile sınırlı.
+2. Zamanla sönen Bloom filter: iki nesil bit dizisi, her window/2 sürede
+   eski nesil silinir. Ring buffer'dan düşmüş (LRU ile atılmış) çiftler de
+   bir süre yakalanır. Bellek sabit: 2 * bloom_bits bit.
+
+Sorgu O(K + hash_count), yani kuyruk ve geçmiş boyutundan bağımsız.
+Bloom false positive verebilir (sadece gereksiz "atla" kararı). Bir çift
+Bloom'da en az window/2, en fazla window süre kalır; son K partner için
+ring buffer tam pencereyi uygular.
+"""
+import time
+from collections import OrderedDict, deque
+from typing import Iterable
+from uuid import UUID
+
+
+class DecayingBloomFilter:
+    """İki nesilli, zamanla sönen Bloom filter"""
+
+    def __init__(self, bits: int = 1 << 23, hash_count: int = 4, window_seconds: float = 600.0, clock=time.monotonic):
+        self._bits = bits
+        self._hash_count = hash_count
+        self._half_window = window_seconds / 2
+        self._clock = clock
+        self._current = bytearray(bits // 8)
+        self._previous = bytearray(bits // 8)
+        self._rotated_at = clock()
+
+    def _rotate_if_due(self) -> None:
+        now = self._clock()
+        if now - self._rotated_at < self._half_window:
+            return
+        if now - self._rotated_at >= 2 * self._half_window:
+            # İki nesil de süresini doldurdu
+            self._previous = bytearray(len(self._current))
+        else:
+            self._previous = self._current
+        self._current = bytearray(len(self._previous))
+        self._rotated_at = now
+
+    def _indexes(self, key: int) -> Iterable[int]:
+        # Double hashing: h1 + i * h2
+        h1 = key & 0xFFFFFFFF
+        h2 = ((key >> 32) & 0xFFFFFFFF) | 1
+        for i in range(self._hash_count):
+            yield (h1 + i * h2) % self._bits
+
+    def add(self, key: int) -> None:
+        self._rotate_if_due()
+        for index in self._indexes(key):
+            self._current[index >> 3] |= 1 << (index & 7)
+
+    def __contains__(self, key: int) -> bool:
+        self._rotate_if_due()
+        for generation in (self._current, self._previous):
+            if all(generation[i >> 3] & (1 << (i & 7)) for i in self._indexes(key)):
+                return True
+        return False
+
+
+def _pair_key(a: UUID, b: UUID) -> int:
+    """Sıradan bağımsız çift anahtarı"""
+    return hash((a, b) if a.int < b.int else (b, a)) & 0xFFFFFFFFFFFFFFFF
+
+
+class RecentPartners:
+    """Session başına son K partner + global sönen Bloom filter"""
+
+    def __init__(
+        self,
+        per_session: int = 5,
+        max_sessions: int = 100_000,
+        window_seconds: float = 600.0,
+        bloom_bits: int = 1 << 23,
+        clock=time.monotonic,
+    ):
+        self._per_session = per_session
+        self._max_sessions = max_sessions
+        self._window = window_seconds
+        self._clock = clock
+        # session_id -> deque[(partner_id, paired_at)]
+        self._recent: "OrderedDict[UUID, deque]" = OrderedDict()
+        self._bloom = DecayingBloomFilter(bloom_bits, window_seconds=window_seconds, clock=clock)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def record(self, a: UUID, b: UUID) -> None:
+        """Biten eşleşmeyi kaydet (iki yönlü)"""
+        now = self._clock()
+        for session_id, partner_id in ((a, b), (b, a)):
+            ring = self._recent.get(session_id)
+            if ring is None:
+                ring = self._recent[session_id] = deque(maxlen=self._per_session)
+                if len(self._recent) > self._max_sessions:
+                    self._recent.popitem(last=False)
+            else:
+                self._recent.move_to_end(session_id)
+            ring.append((partner_id, now))
+        self._bloom.add(_pair_key(a, b))
+
+    def partners(self, session_id: UUID) -> Iterable[UUID]:
+        """Pencere içindeki son partnerler (ring buffer)"""
+        ring = self._recent.get(session_id)
+        if not ring:
+            return ()
+        cutoff = self._clock() - self._window
+        return [partner_id for partner_id, paired_at in ring if paired_at >= cutoff]
+
+    def was_recent(self, a: UUID, b: UUID) -> bool:
+        """a ve b pencere içinde eşleşmiş mi? O(K)"""
+        ring = self._recent.get(a)
+        if ring:
+            cutoff = self._clock() - self._window
+            for partner_id, paired_at in ring:
+                if partner_id == b and paired_at >= cutoff:
+                    return True
+        # Ring buffer'dan düşmüş veya LRU ile atılmış çiftler
+        return _pair_key(a, b) in self._bloom
+
+    def forget(self, session_id: UUID) -> None:
+        """Session kapandı: ring buffer'ı bırak (Bloom kendiliğinden söner)"""
+        self._recent.pop(session_id, None)
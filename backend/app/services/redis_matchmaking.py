@@ -0,0 +1,747 @@
+"""
+Redis Matchmaking Service - Çok worker / çok node için ortak kuyruk
+
+MatchmakingService ile aynı arayüz. Kuyruk, bağlantı haritası ve partner
+araması Redis üzerinde atomik Lua script'leri ile yapılır; böylece
+`uvicorn --workers N` veya birden fazla node aynı kuyruğu paylaşır.
+
+Redis anahtarları (prefix varsayılan "mm:"):
+    queue               ZSET  session_id -> bilet (global sıra, ZRANK ile O(log n))
+    queued              HASH  session_id -> "{kova}|{şerit}" (şerit p: öncelikli, n: normal)
+    genders:{pg}|{pc}             ZSET  bu talepte bekleyeni olan cinsiyetler
+    countries:{pg}|{pc}|{g}       ZSET  ... ülkeler
+    languages:{pg}|{pc}|{g}|{c}   ZSET  ... diller
+    lane:{pg}|{pc}|{g}|{c}|{l}:p|n  ZSET  kova şeridi (skor = efektif giriş zamanı,
+                                  premium/VIP için priority_boost kadar önde)
+    conn:{connection_id}          HASH  a, b, started_at
+    session_conn        HASH  session_id -> connection_id
+    session_worker      HASH  session_id -> WebSocket'in bağlı olduğu worker
+    recent:{session_id} STRING son partner (RECONNECT için, TTL = pencere)
+    filters             HASH  session_id -> "{g}|{pg}|{c}|{pc}" son JOIN isteği
+                              (RECONNECT iki yönlü filtre kontrolü)
+    expiry              ZSET  session_id -> kuyruk süresinin dolduğu an (epoch)
+    partners:{session_id}  ZSET  son K partner -> bitiş zamanı (tekrar eşleşme
+                                 önleme, TTL = RECENT_PARTNER_WINDOW_SECONDS)
+    stats               HASH  sayaçlar
+    worker:{worker_id}  pub/sub kanalı (worker'lar arası sinyal iletimi)
+
+Kova index'i in-memory MatchIndex ile aynı hiyerarşidir (talep -> cinsiyet
+-> ülke -> dil). İndex ZSET'lerinin skoru o dalın ilk bekleyeninin giriş
+zamanıdır; "herhangi biri" seçimi ZRANGE 0 0 ile en eski dala gider.
+JOIN sabit sayıda anahtara bakar (en fazla 4 talep x 4 cinsiyet, şerit
+başına en fazla MAX_SKIP_PER_BUCKET aday), maliyet kova sayısından bağımsızdır.
+
+In-memory servisten farklar: toplu eşleştirme turları (MATCHING_MODE=batch)
+ve kapanış snapshot'ı yoktur (durum zaten Redis'te). Yakın partner kaydı
+Bloom filter yerine session başına TTL'li ZSET'tir.
+
+WebSocket nesneleri süreç dışına taşınamaz; her worker kendi socket'lerini
+tutar, başka worker'daki session'a giden mesajlar o worker'ın kanalına
+publish edilir. Pub/sub bağlantısı koparsa (reset, failover) dinleyici
+artan beklemeyle yeniden abone olur.
+
+Kuyruk süreleri de Redis'tedir (expiry ZSET): süresi dolanları herhangi
+bir worker atomik olarak çıkarır, böylece çöken/yeniden başlayan bir
+worker'ın bekleyenleri kuyrukta sahipsiz kalmaz.
+
+NOT: Lua script'leri anahtarları kendisi oluşturur, bu yüzden Redis Cluster
+yerine tek instance (veya Sentinel) ile kullanılmalıdır.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID, uuid4
+
+from app.services.match_index import MAX_SKIP_PER_BUCKET
+from app.services.matchmaking import ActiveConnection, QueueFullError, QueuedUser, busy_retry_after
+from app.services.matchmaking_stats import MatchmakingStats
+from app.services.wait_estimator import WaitEstimator
+from app.services.signaling_codec import Frame
+
+
+logger = logging.getLogger(__name__)
+
+# Pub/sub yeniden bağlanma beklemesi (saniye, her denemede iki katı)
+RELAY_RETRY_MIN_SECONDS = 0.5
+RELAY_RETRY_MAX_SECONDS = 10.0
+
+_LUA_HELPERS = """
+local P = ARGV[1]
+
+local function split(s)
+    local parts = {}
+    local start = 1
+    while true do
+        local i = string.find(s, '|', start, true)
+        if not i then
+            table.insert(parts, string.sub(s, start))
+            return parts
+        end
+        table.insert(parts, string.sub(s, start, i - 1))
+        start = i + 1
+    end
+end
+
+-- Boşalan kovayı ve boşalan üst dalları index'ten çıkar
+local function prune(pg, pc, g, c, l)
+    local key = pg .. '|' .. pc .. '|' .. g .. '|' .. c .. '|' .. l
+    if redis.call('ZCARD', P .. 'lane:' .. key .. ':p') > 0 then return end
+    if redis.call('ZCARD', P .. 'lane:' .. key .. ':n') > 0 then return end
+    local languages = P .. 'languages:' .. pg .. '|' .. pc .. '|' .. g .. '|' .. c
+    redis.call('ZREM', languages, l)
+    if redis.call('ZCARD', languages) > 0 then return end
+    local countries = P .. 'countries:' .. pg .. '|' .. pc .. '|' .. g
+    redis.call('ZREM', countries, c)
+    if redis.call('ZCARD', countries) > 0 then return end
+    redis.call('ZREM', P .. 'genders:' .. pg .. '|' .. pc, g)
+end
+
+local function dequeue(sid)
+    local entry = redis.call('HGET', P .. 'queued', sid)
+    if not entry then
+        return false
+    end
+    local p = split(entry)
+    redis.call('ZREM', P .. 'lane:' .. p[1] .. '|' .. p[2] .. '|' .. p[3] .. '|' .. p[4] .. '|' .. p[5] .. ':' .. p[6], sid)
+    prune(p[1], p[2], p[3], p[4], p[5])
+    redis.call('ZREM', P .. 'queue', sid)
+    redis.call('ZREM', P .. 'expiry', sid)
+    redis.call('HDEL', P .. 'queued', sid)
+    redis.call('HINCRBY', P .. 'stats', 'in_queue', -1)
+    return true
+end
+"""
+
+# ARGV: prefix, sid, gender, pref_gender, country, pref_country, language, connection_id, now, rank_at,
+#       max_queue_size, max_bucket_size (0 = sınırsız), priority (1/0), priority_boost,
+#       partner_window (sn, 0 = kapalı), max_skip, expires_at (epoch, 0 = süresiz)
+# Dönüş: {0} zaten kuyrukta/bağlantıda, {1, connection_id, partner_id} eşleşti, {2} kuyruğa eklendi,
+#        {3, 'global'|'bucket'} sınır dolu, reddedildi
+JOIN_SCRIPT = _LUA_HELPERS + """
+local sid, gender, pg, country, pc, lang, cid, now, rank_at =
+    ARGV[2], ARGV[3], ARGV[4], ARGV[5], ARGV[6], ARGV[7], ARGV[8], ARGV[9], ARGV[10]
+local max_queue, max_bucket = tonumber(ARGV[11]), tonumber(ARGV[12])
+local priority, boost = ARGV[13] == '1', tonumber(ARGV[14])
+local partner_window, max_skip = tonumber(ARGV[15]), tonumber(ARGV[16])
+local expires_at = tonumber(ARGV[17])
+
+if redis.call('HEXISTS', P .. 'queued', sid) == 1 then return {0} end
+if redis.call('HEXISTS', P .. 'session_conn', sid) == 1 then return {0} end
+redis.call('HSET', P .. 'filters', sid, gender .. '|' .. pg .. '|' .. country .. '|' .. pc)
+
+-- Pencere içinde eşleşilmiş kişi mi? (bitişte iki tarafa da yazılır)
+local partners = P .. 'partners:' .. sid
+local cutoff = tonumber(now) - partner_window
+local function recent(candidate)
+    if partner_window <= 0 then return false end
+    local ended_at = redis.call('ZSCORE', partners, candidate)
+    return ended_at and tonumber(ended_at) >= cutoff
+end
+
+-- Şeridin baştan ilk max_skip kişisinden kaçınılmayan ilki
+local function lane_head(lane)
+    local members = redis.call('ZRANGE', lane, 0, max_skip - 1, 'WITHSCORES')
+    for i = 1, #members, 2 do
+        if not recent(members[i]) then
+            return members[i], tonumber(members[i + 1])
+        end
+    end
+    return nil
+end
+
+local function pick(index, preferred)
+    if redis.call('ZSCORE', index, preferred) then return preferred end
+    return redis.call('ZRANGE', index, 0, 0)[1]
+end
+
+local demand_genders = {'', gender}
+local demand_countries = {''}
+if country ~= '' then demand_countries = {'', country} end
+
+local best_sid, best_miss, best_score, best_key, best_lane
+for _, dg in ipairs(demand_genders) do
+    for _, dc in ipairs(demand_countries) do
+        local demand = dg .. '|' .. dc
+        local genders
+        if pg ~= '' then
+            genders = {}
+            if redis.call('ZSCORE', P .. 'genders:' .. demand, pg) then genders = {pg} end
+        else
+            genders = redis.call('ZRANGE', P .. 'genders:' .. demand, 0, -1)
+        end
+        for _, g in ipairs(genders) do
+            local countries = P .. 'countries:' .. demand .. '|' .. g
+            local c
+            if pc ~= '' then
+                if redis.call('ZSCORE', countries, pc) then c = pc end
+            else
+                c = pick(countries, country)
+            end
+            local l = c and pick(P .. 'languages:' .. demand .. '|' .. g .. '|' .. c, lang)
+            if l then
+                local key = demand .. '|' .. g .. '|' .. c .. '|' .. l
+                local miss = 0
+                if l ~= lang then miss = 1 end
+                for _, lane in ipairs({'p', 'n'}) do
+                    local head, score = lane_head(P .. 'lane:' .. key .. ':' .. lane)
+                    if head and (not best_sid or miss < best_miss or (miss == best_miss and score < best_score)) then
+                        best_sid, best_miss, best_score, best_key, best_lane = head, miss, score, key, lane
+                    end
+                end
+            end
+        end
+    end
+end
+
+if best_sid then
+    redis.call('HINCRBY', P .. 'stats', 'total_joins', 1)
+    if best_lane == 'p' then
+        -- Öncelikli eşleşme kovasındaki daha eski normal bekleyeni geçti mi?
+        local normal = redis.call('ZRANGE', P .. 'lane:' .. best_key .. ':n', 0, 0, 'WITHSCORES')
+        local joined_at = best_score + boost
+        if normal[1] and tonumber(normal[2]) < joined_at then
+            local lead_ms = math.floor((joined_at - tonumber(normal[2])) * 1000)
+            redis.call('HINCRBY', P .. 'stats', 'total_overtakes', 1)
+            if lead_ms > tonumber(redis.call('HGET', P .. 'stats', 'max_overtake_ms') or '0') then
+                redis.call('HSET', P .. 'stats', 'max_overtake_ms', lead_ms)
+            end
+        end
+    end
+    dequeue(best_sid)
+    redis.call('HSET', P .. 'conn:' .. cid, 'a', sid, 'b', best_sid, 'started_at', now)
+    redis.call('HSET', P .. 'session_conn', sid, cid, best_sid, cid)
+    redis.call('HINCRBY', P .. 'stats', 'active_connections', 1)
+    redis.call('HINCRBY', P .. 'stats', 'total_matches', 1)
+    return {1, cid, best_sid}
+end
+
+local demand = pg .. '|' .. pc
+local key = demand .. '|' .. gender .. '|' .. country .. '|' .. lang
+local lane = 'n'
+if priority then lane = 'p' end
+if max_queue > 0 and tonumber(redis.call('HGET', P .. 'stats', 'in_queue') or '0') >= max_queue then
+    redis.call('HINCRBY', P .. 'stats', 'rejected_global', 1)
+    return {3, 'global'}
+end
+if max_bucket > 0
+    and redis.call('ZCARD', P .. 'lane:' .. key .. ':p') + redis.call('ZCARD', P .. 'lane:' .. key .. ':n') >= max_bucket then
+    redis.call('HINCRBY', P .. 'stats', 'rejected_bucket', 1)
+    return {3, 'bucket'}
+end
+
+redis.call('HINCRBY', P .. 'stats', 'total_joins', 1)
+local ticket = redis.call('INCR', P .. 'ticket')
+redis.call('ZADD', P .. 'lane:' .. key .. ':' .. lane, rank_at, sid)
+redis.call('ZADD', P .. 'languages:' .. demand .. '|' .. gender .. '|' .. country, 'NX', rank_at, lang)
+redis.call('ZADD', P .. 'countries:' .. demand .. '|' .. gender, 'NX', rank_at, country)
+redis.call('ZADD', P .. 'genders:' .. demand, 'NX', rank_at, gender)
+redis.call('ZADD', P .. 'queue', ticket, sid)
+if expires_at > 0 then redis.call('ZADD', P .. 'expiry', expires_at, sid) end
+redis.call('HSET', P .. 'queued', sid, key .. '|' .. lane)
+redis.call('HINCRBY', P .. 'stats', 'in_queue', 1)
+return {2}
+"""
+
+# ARGV: prefix, sid
+LEAVE_SCRIPT = _LUA_HELPERS + """
+if dequeue(ARGV[2]) then return 1 end
+return 0
+"""
+
+# ARGV: prefix, now, limit -> süresi dolup kuyruktan çıkarılan session'lar
+EXPIRE_SCRIPT = _LUA_HELPERS + """
+local due = redis.call('ZRANGEBYSCORE', P .. 'expiry', '-inf', ARGV[2], 'LIMIT', 0, tonumber(ARGV[3]))
+local expired = {}
+for _, sid in ipairs(due) do
+    if dequeue(sid) then
+        table.insert(expired, sid)
+    else
+        redis.call('ZREM', P .. 'expiry', sid)
+    end
+end
+if #expired > 0 then redis.call('HINCRBY', P .. 'stats', 'total_expired', #expired) end
+return expired
+"""
+
+# ARGV: prefix, sid, reconnect_window_ms, now, partner_window_ms (0 = kapalı), partners_per_session
+#       -> {partner_id, connection_id} veya nil
+END_SCRIPT = """
+local P, sid, window = ARGV[1], ARGV[2], tonumber(ARGV[3])
+local now, partner_window, per_session = ARGV[4], tonumber(ARGV[5]), tonumber(ARGV[6])
+local cid = redis.call('HGET', P .. 'session_conn', sid)
+if not cid then return false end
+local conn = redis.call('HMGET', P .. 'conn:' .. cid, 'a', 'b')
+redis.call('DEL', P .. 'conn:' .. cid)
+if not conn[1] then
+    redis.call('HDEL', P .. 'session_conn', sid)
+    return false
+end
+redis.call('HDEL', P .. 'session_conn', conn[1], conn[2])
+redis.call('HINCRBY', P .. 'stats', 'active_connections', -1)
+redis.call('HINCRBY', P .. 'stats', 'total_ended', 1)
+if window > 0 then
+    redis.call('SET', P .. 'recent:' .. conn[1], conn[2], 'PX', window)
+    redis.call('SET', P .. 'recent:' .. conn[2], conn[1], 'PX', window)
+end
+if partner_window > 0 then
+    for _, pair in ipairs({{conn[1], conn[2]}, {conn[2], conn[1]}}) do
+        local partners = P .. 'partners:' .. pair[1]
+        redis.call('ZADD', partners, now, pair[2])
+        redis.call('ZREMRANGEBYRANK', partners, 0, -(per_session + 1))
+        redis.call('PEXPIRE', partners, partner_window)
+    end
+end
+if conn[1] == sid then return {conn[2], cid} end
+return {conn[1], cid}
+"""
+
+# ARGV: prefix, sid, connection_id, now -> partner_id veya nil
+# İki taraf birbirinin son partneri olmalı ve son JOIN filtreleri birbirini kabul etmeli
+RECONNECT_SCRIPT = _LUA_HELPERS + """
+local sid, cid, now = ARGV[2], ARGV[3], ARGV[4]
+local partner = redis.call('GET', P .. 'recent:' .. sid)
+if not partner then return false end
+if redis.call('GET', P .. 'recent:' .. partner) ~= sid then return false end
+if redis.call('HEXISTS', P .. 'session_worker', partner) == 0 then return false end
+if redis.call('HEXISTS', P .. 'session_conn', sid) == 1 then return false end
+if redis.call('HEXISTS', P .. 'session_conn', partner) == 1 then return false end
+
+-- f: {cinsiyet, tercih edilen cinsiyet, ülke, tercih edilen ülke}; kayıt yoksa filtresiz
+local function accepts(f, other)
+    if f[2] ~= '' and f[2] ~= other[1] then return false end
+    if f[4] ~= '' and f[4] ~= other[3] then return false end
+    return true
+end
+local filters = redis.call('HMGET', P .. 'filters', sid, partner)
+local mine, theirs = split(filters[1] or '|||'), split(filters[2] or '|||')
+if not (accepts(mine, theirs) and accepts(theirs, mine)) then return false end
+dequeue(sid)
+dequeue(partner)
+redis.call('DEL', P .. 'recent:' .. sid, P .. 'recent:' .. partner)
+redis.call('HSET', P .. 'conn:' .. cid, 'a', sid, 'b', partner, 'started_at', now)
+redis.call('HSET', P .. 'session_conn', sid, cid, partner, cid)
+redis.call('HINCRBY', P .. 'stats', 'active_connections', 1)
+redis.call('HINCRBY', P .. 'stats', 'total_matches', 1)
+return partner
+"""
+
+# ARGV: prefix, sid -> {connection_id, a, b, started_at} veya nil
+CONNECTION_SCRIPT = """
+local P, sid = ARGV[1], ARGV[2]
+local cid = redis.call('HGET', P .. 'session_conn', sid)
+if not cid then return false end
+local conn = redis.call('HMGET', P .. 'conn:' .. cid, 'a', 'b', 'started_at')
+if not conn[1] then return false end
+return {cid, conn[1], conn[2], conn[3]}
+"""
+
+# ARGV: prefix, sid, worker_id
+UNREGISTER_SCRIPT = """
+local P, sid, wid = ARGV[1], ARGV[2], ARGV[3]
+if redis.call('HGET', P .. 'session_worker', sid) == wid then
+    redis.call('HDEL', P .. 'session_worker', sid)
+    return 1
+end
+return 0
+"""
+
+
+def _field(value: Optional[str]) -> str:
+    """Kova anahtarında ayraç olarak kullanılan '|' karakterini temizle"""
+    return (value or "").replace("|", "")
+
+
+class RedisMatchmakingService:
+    """
+    Redis destekli matchmaking servisi (MatchmakingService ile aynı arayüz).
+    Her worker süreci kendi instance'ını oluşturur; durum Redis'te ortaktır.
+    """
+
+    def __init__(
+        self,
+        client,
+        prefix: str = "mm:",
+        stats_interval: float = 1.0,
+        queue_timeout: Optional[float] = None,
+        connection_log=None,
+        reconnect_window: float = 120.0,
+        priority_boost: float = 15.0,
+        recent_partner_window: float = 600.0,
+        recent_partners_per_session: int = 5,
+        max_queue_size: int = 0,
+        max_bucket_size: int = 0,
+        busy_retry_after: int = 5,
+    ):
+        # decode_responses=True ile oluşturulmuş redis.asyncio client
+        self._redis = client
+        self._prefix = prefix
+        self._stats_interval = stats_interval
+        self.worker_id = uuid4().hex
+        # Toplu eşleştirme turları sadece in-memory serviste var
+        self.batch_matching = False
+        # Durum Redis'te; worker yeniden başlarken session'lar temizlenir
+        # (kuyruk süresi worker'da tutulduğu için sahipsiz kayıt kalmasın)
+        self.restores_sessions = False
+        self.shutting_down = False
+
+        self._join = client.register_script(JOIN_SCRIPT)
+        self._leave = client.register_script(LEAVE_SCRIPT)
+        self._expire = client.register_script(EXPIRE_SCRIPT)
+        self._end = client.register_script(END_SCRIPT)
+        self._reconnect = client.register_script(RECONNECT_SCRIPT)
+        self._connection = client.register_script(CONNECTION_SCRIPT)
+        self._unregister = client.register_script(UNREGISTER_SCRIPT)
+
+        # Bu worker'a bağlı socket'ler: session_id -> websocket
+        self._session_websockets: Dict[UUID, Any] = {}
+
+        # Bu worker'da kuyrukta bekleyenler: session_id -> son gönderilen sıra
+        self._local_queued: Dict[UUID, Optional[int]] = {}
+
+        # Kuyruk süresi: son tarih Redis'te (expiry ZSET), her worker süresi dolanları çıkarabilir
+        self.queue_timeout = queue_timeout
+
+        # Tahmini bekleme: bu worker'ın kendi bekleyenlerinden öğrenilen hızlar
+        self._wait_estimator = WaitEstimator()
+
+        # Bağlantı başlangıç/bitişleri bu worker'ın ConnectionLog'u ile yazılır
+        self._connection_log = connection_log
+        self._reconnect_window_ms = int(reconnect_window * 1000)
+        self.priority_boost = priority_boost
+        
+        # Yakın zamanda eşleşilenlerle tekrar eşleşme yok (0 = kapalı)
+        self._recent_partner_window = recent_partner_window
+        self._recent_partners_per_session = recent_partners_per_session
+        
+        # Admission control (0 = sınırsız); sınırlar Lua içinde atomik kontrol edilir
+        self.max_queue_size = max_queue_size
+        self.max_bucket_size = max_bucket_size
+        self.busy_retry_after = busy_retry_after
+
+        self._stats = MatchmakingStats(0, 0, 0, 0, 0, 0, 0, 0)
+        self._tasks = []
+        self._pubsub = None
+
+    @property
+    def _channel(self) -> str:
+        return f"{self._prefix}worker:{self.worker_id}"
+
+    async def start(self) -> None:
+        """Pub/sub dinleyicisini ve sayaç yenileyiciyi başlat"""
+        await self._subscribe()
+        self._tasks = [
+            asyncio.create_task(self._relay_loop()),
+            asyncio.create_task(self._stats_loop()),
+        ]
+        await self.refresh_stats()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        await self._close_pubsub()
+
+    async def _subscribe(self) -> None:
+        self._pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        await self._pubsub.subscribe(self._channel)
+
+    async def _close_pubsub(self) -> None:
+        pubsub, self._pubsub = self._pubsub, None
+        if pubsub is None:
+            return
+        try:
+            await pubsub.unsubscribe(self._channel)
+        except Exception:
+            pass  # Bağlantı zaten kopmuş olabilir
+        await pubsub.aclose()
+
+    async def _relay_loop(self) -> None:
+        """
+        Diğer worker'lardan gelen mesajları yerel socket'lere ilet.
+        listen() hata verirse (bağlantı koptu, failover) artan beklemeyle
+        yeniden abone olunur; döngü süreç boyunca ayakta kalır.
+        """
+        retry = RELAY_RETRY_MIN_SECONDS
+        while True:
+            try:
+                if self._pubsub is None:
+                    await self._subscribe()
+                    logger.info("Redis relay resubscribed to %s", self._channel)
+                retry = RELAY_RETRY_MIN_SECONDS
+                async for item in self._pubsub.listen():
+                    await self._relay(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Redis relay connection lost, retrying in %.1fs: %s", retry, e)
+            try:
+                await self._close_pubsub()
+            except Exception:
+                pass
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, RELAY_RETRY_MAX_SECONDS)
+
+    async def _relay(self, item: dict) -> None:
+        try:
+            envelope = json.loads(item["data"])
+            await self._deliver_local(UUID(envelope["session_id"]), envelope["message"])
+        except Exception:
+            logger.exception("Redis relay error")
+
+    async def _stats_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._stats_interval)
+            try:
+                await self.refresh_stats()
+            except Exception as e:
+                logger.warning("Redis stats refresh error: %s", e)
+
+    async def refresh_stats(self) -> MatchmakingStats:
+        """Sayaçları Redis'ten okuyup yerel anlık görüntüyü güncelle"""
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hgetall(self._prefix + "stats")
+        pipe.hlen(self._prefix + "session_worker")
+        raw, sockets = await pipe.execute()
+        counters = {k: int(v) for k, v in raw.items()}
+        in_queue = counters.get("in_queue", 0)
+        active = counters.get("active_connections", 0)
+        priority_wait, normal_wait = self._wait_estimator.lane_waits()
+        self._stats = MatchmakingStats(
+            online_users=in_queue + 2 * active,
+            in_queue=in_queue,
+            active_connections=active,
+            connected_sockets=sockets,
+            total_joins=counters.get("total_joins", 0),
+            total_matches=counters.get("total_matches", 0),
+            total_ended=counters.get("total_ended", 0),
+            total_disconnects=counters.get("total_disconnects", 0),
+            total_expired=counters.get("total_expired", 0),
+            estimated_wait_sec=self._wait_estimator.typical_wait(),
+            priority_wait_sec=priority_wait,
+            normal_wait_sec=normal_wait,
+            total_overtakes=counters.get("total_overtakes", 0),
+            max_overtake_sec=counters.get("max_overtake_ms", 0) / 1000,
+            rejected_global=counters.get("rejected_global", 0),
+            rejected_bucket=counters.get("rejected_bucket", 0),
+        )
+        return self._stats
+
+    def stats(self) -> MatchmakingStats:
+        """Son okunan anlık görüntü (en fazla stats_interval kadar eski)"""
+        return self._stats
+
+    @property
+    def online_count(self) -> int:
+        return self._stats.online_users
+
+    @property
+    def queue_size(self) -> int:
+        return self._stats.in_queue
+
+    @property
+    def active_connections_count(self) -> int:
+        return self._stats.active_connections
+
+    async def register_websocket(self, session_id: UUID, websocket) -> None:
+        """WebSocket'i yerel olarak kaydet ve session'ın bu worker'da olduğunu yayınla"""
+        self._session_websockets[session_id] = websocket
+        await self._redis.hset(self._prefix + "session_worker", str(session_id), self.worker_id)
+
+    async def unregister_websocket(self, session_id: UUID) -> None:
+        self._session_websockets.pop(session_id, None)
+        self._local_queued.pop(session_id, None)
+        self._wait_estimator.remove(session_id)
+        await self._unregister(args=[self._prefix, str(session_id), self.worker_id])
+
+    def get_websocket(self, session_id: UUID):
+        """Sadece bu worker'a bağlı socket'i döner"""
+        return self._session_websockets.get(session_id)
+
+    def get_all_websockets(self):
+        """Bu worker'a bağlı socket'ler (broadcast her worker'da yerel yapılır)"""
+        return dict(self._session_websockets)
+
+    async def deliver(self, session_id: UUID, message: dict) -> bool:
+        """Session yerelse doğrudan, değilse sahibi olan worker'ın kanalına gönder"""
+        if session_id in self._session_websockets:
+            return await self._deliver_local(session_id, message)
+        worker_id = await self._redis.hget(self._prefix + "session_worker", str(session_id))
+        if not worker_id:
+            return False
+        envelope = json.dumps({"session_id": str(session_id), "message": message})
+        receivers = await self._redis.publish(f"{self._prefix}worker:{worker_id}", envelope)
+        return receivers > 0
+
+    async def _deliver_local(self, session_id: UUID, message: dict) -> bool:
+        ws = self._session_websockets.get(session_id)
+        if ws is None:
+            return False
+        try:
+            await ws.send_frame(Frame(message))
+        except Exception:
+            return False
+        return True
+
+    async def join_queue(self, user: QueuedUser) -> Optional[Tuple[UUID, UUID, bool]]:
+        """
+        Kuyruğa katıl ve eşleşme dene (tek atomik Lua çağrısı).
+        Eşleşme olursa: (connection_id, partner_session_id, is_initiator) döner
+        Kuyruk/kova doluysa ve eşleşme yoksa: QueueFullError
+        """
+        now = time.time()
+        rank_at = now - self.priority_boost if user.priority else now
+        result = await self._join(args=[
+            self._prefix,
+            str(user.session_id),
+            _field(user.gender),
+            _field(user.preferred_gender),
+            _field(user.country),
+            _field(user.preferred_country),
+            _field(user.language),
+            str(uuid4()),
+            repr(now),
+            repr(rank_at),
+            self.max_queue_size,
+            self.max_bucket_size,
+            1 if user.priority else 0,
+            repr(float(self.priority_boost)),
+            repr(float(self._recent_partner_window)),
+            MAX_SKIP_PER_BUCKET,
+            repr(now + self.queue_timeout) if self.queue_timeout else 0,
+        ])
+        status = int(result[0])
+        if status == 3:
+            raise QueueFullError(result[1], busy_retry_after(self.busy_retry_after))
+        if status == 1:
+            self._local_queued.pop(user.session_id, None)
+            connection_id, partner_id = UUID(result[1]), UUID(result[2])
+            if self._connection_log is not None:
+                self._connection_log.record_start(connection_id, user.session_id, partner_id, datetime.utcnow())
+            return (connection_id, partner_id, True)
+        if status == 2:
+            self._local_queued[user.session_id] = None
+            self._wait_estimator.add(user.session_id, (
+                user.preferred_gender, user.preferred_country, user.gender, user.country, user.language,
+            ), user.priority)
+        return None
+
+    async def leave_queue(self, session_id: UUID) -> bool:
+        self._local_queued.pop(session_id, None)
+        self._wait_estimator.remove(session_id)
+        return bool(await self._leave(args=[self._prefix, str(session_id)]))
+
+    async def expire_queue(self, limit: int = 1000):
+        """
+        Süresi dolan bekleyenleri çıkar (tek atomik Lua çağrısı). Hangi worker'a
+        bağlı olduklarına bakılmaz: çöken bir worker'ın bekleyenleri de düşer.
+        QUEUE_TIMEOUT deliver ile sahibi olan worker'a gider.
+        """
+        due = await self._expire(args=[self._prefix, repr(time.time()), limit])
+        expired = [UUID(sid) for sid in due]
+        for session_id in expired:
+            self._local_queued.pop(session_id, None)
+            self._wait_estimator.remove(session_id)
+        return expired
+
+    async def expire_restored(self):
+        """Snapshot/restore sadece in-memory serviste var"""
+        return []
+
+    async def reconnect(self, session_id: UUID) -> Optional[Tuple[UUID, UUID, bool]]:
+        """Son partnerle kuyruğu atlayarak eşleş (tek atomik Lua çağrısı)"""
+        connection_id = uuid4()
+        partner = await self._reconnect(args=[self._prefix, str(session_id), str(connection_id), repr(time.time())])
+        if not partner:
+            return None
+        partner_id = UUID(partner)
+        for sid in (session_id, partner_id):
+            # Kuyruktan çıkarılmış olabilirler (yerel olanların takibini bırak)
+            self._local_queued.pop(sid, None)
+            self._wait_estimator.remove(sid)
+        if self._connection_log is not None:
+            self._connection_log.record_start(connection_id, session_id, partner_id, datetime.utcnow())
+        return (connection_id, partner_id, True)
+
+    async def end_connection(self, session_id: UUID, reason: str = "NEXTED") -> Optional[UUID]:
+        result = await self._end(args=[
+            self._prefix,
+            str(session_id),
+            self._reconnect_window_ms,
+            repr(time.time()),
+            int(self._recent_partner_window * 1000),
+            self._recent_partners_per_session,
+        ])
+        if not result:
+            return None
+        partner, connection_id = result
+        if self._connection_log is not None:
+            self._connection_log.record_end(UUID(connection_id), reason)
+        return UUID(partner)
+
+    async def get_connection(self, session_id: UUID) -> Optional[ActiveConnection]:
+        row = await self._connection(args=[self._prefix, str(session_id)])
+        if not row:
+            return None
+        connection_id, a, b, started_at = row
+        return ActiveConnection(
+            connection_id=UUID(connection_id),
+            session_a_id=UUID(a),
+            session_b_id=UUID(b),
+            started_at=float(started_at),
+        )
+
+    async def get_partner_session_id(self, session_id: UUID) -> Optional[UUID]:
+        connection = await self.get_connection(session_id)
+        if connection:
+            if connection.session_a_id == session_id:
+                return connection.session_b_id
+            return connection.session_a_id
+        return None
+
+    async def get_queue_position(self, session_id: UUID) -> Optional[int]:
+        """Global sıra (ZRANK, O(log n))"""
+        rank = await self._redis.zrank(self._prefix + "queue", str(session_id))
+        if rank is None:
+            return None
+        if session_id in self._local_queued:
+            self._local_queued[session_id] = rank + 1
+        return rank + 1
+
+    def estimated_wait(self, session_id: UUID) -> Optional[int]:
+        """Bu worker'daki bekleyen için tahmini kalan süre (saniye)"""
+        return self._wait_estimator.estimate(session_id)
+
+    async def drain_position_updates(self):
+        """Bu worker'daki bekleyenlerden sırası değişenler"""
+        if not self._local_queued:
+            return []
+        session_ids = list(self._local_queued)
+        pipe = self._redis.pipeline(transaction=False)
+        for session_id in session_ids:
+            pipe.zrank(self._prefix + "queue", str(session_id))
+        ranks = await pipe.execute()
+
+        updates = []
+        for session_id, rank in zip(session_ids, ranks):
+            if rank is None:
+                # Başka worker'daki biriyle eşleşti
+                self._local_queued.pop(session_id, None)
+                self._wait_estimator.remove(session_id, matched=True)
+                continue
+            position = rank + 1
+            if self._local_queued.get(session_id) != position:
+                if session_id in self._local_queued:
+                    self._local_queued[session_id] = position
+                updates.append((session_id, position))
+        return updates
+
+    async def cleanup_session(self, session_id: UUID) -> Optional[UUID]:
+        await self._redis.hincrby(self._prefix + "stats", "total_disconnects", 1)
+        await self._redis.hdel(self._prefix + "filters", str(session_id))
+        await self.leave_queue(session_id)
+        partner_id = await self.end_connection(session_id, "DISCONNECTED")
+        await self.unregister_websocket(session_id)
+        return partner_id
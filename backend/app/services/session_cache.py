@@ -0,0 +1,144 @@
+"""
+Session Token Cache - /ws/signaling el sıkışmasında DB'ye inmeden doğrulama
+
+/public/session/start yeni session'ı token anahtarıyla buraya yazar;
+WebSocket bağlantısı token'ı önce burada arar. Kaçarsa (başka worker'da
+açılmış veya süresi dolmuş kayıt) DB sorgusu event loop dışında yapılır
+ve sonuç cache'lenir. Bilinmeyen token'lar cache'lenmez.
+
+Kayıtlar SESSION_CACHE_TTL_SECONDS sonra düşer; ban veya session kapatma
+bu worker'da kaydı hemen siler. Diğer worker'lardaki kopyalar en fazla
+TTL kadar eski kalabilir (DB'deki is_active tek doğru kaynaktır).
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import List, Optional
+from uuid import UUID
+
+
+class CachedSession:
+    """El sıkışma için gereken session alanları"""
+
+    __slots__ = ("session_id", "gender", "country", "is_active", "ip_address", "device_fingerprint", "expires_at")
+
+    def __init__(
+        self,
+        session_id: UUID,
+        gender: str,
+        country: Optional[str],
+        is_active: bool,
+        ip_address: Optional[str] = None,
+        device_fingerprint: Optional[str] = None,
+    ):
+        self.session_id = session_id
+        self.gender = gender
+        self.country = country
+        self.is_active = is_active
+        self.ip_address = ip_address
+        self.device_fingerprint = device_fingerprint
+        self.expires_at = 0.0
+
+    @classmethod
+    def from_model(cls, session) -> "CachedSession":
+        """UserSession satırından"""
+        return cls(
+            session_id=session.id,
+            gender=session.gender.value if session.gender else "UNSPECIFIED",
+            country=session.country,
+            is_active=session.is_active,
+            ip_address=session.ip_address,
+            device_fingerprint=session.device_fingerprint,
+        )
+
+
+class SessionTokenCache:
+    """token -> CachedSession, TTL'li ve boyutu sınırlı LRU"""
+
+    def __init__(self, ttl: float = 300.0, max_size: int = 100000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, CachedSession]" = OrderedDict()
+        # Senkron endpoint'ler (session/start, admin) threadpool'da çalışır
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def put(self, token: str, session: CachedSession) -> CachedSession:
+        session.expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[token] = session
+            self._entries.move_to_end(token)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return session
+
+    def get(self, token: str) -> Optional[CachedSession]:
+        """Geçerli kayıt veya None (yok / süresi dolmuş)"""
+        with self._lock:
+            session = self._entries.get(token)
+            if session is None:
+                self.misses += 1
+                return None
+            if session.expires_at <= time.monotonic():
+                del self._entries[token]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return session
+
+    def invalidate(self, token: str) -> bool:
+        with self._lock:
+            return self._entries.pop(token, None) is not None
+
+    def invalidate_matching(self, ip_address: Optional[str] = None, device_fingerprint: Optional[str] = None) -> int:
+        """Ban: IP veya cihaz parmak izi eşleşen kayıtları sil (nadir işlem, O(n))"""
+        if not ip_address and not device_fingerprint:
+            return 0
+        with self._lock:
+            tokens: List[str] = [
+                token for token, session in self._entries.items()
+                if (ip_address and session.ip_address == ip_address)
+                or (device_fingerprint and session.device_fingerprint == device_fingerprint)
+            ]
+            for token in tokens:
+                del self._entries[token]
+        return len(tokens)
+
+    async def get_or_load(self, token: str) -> Optional[CachedSession]:
+        """Cache'te yoksa DB'den (thread'de, event loop bloklanmaz)"""
+        session = self.get(token)
+        if session is not None:
+            return session
+        return await asyncio.to_thread(self._load, token)
+
+    def _load(self, token: str) -> Optional[CachedSession]:
+        from app.database import get_session_local
+        from app.models.user_session import UserSession
+
+        db = get_session_local()()
+        try:
+            row = db.query(UserSession).filter(UserSession.session_token == token).first()
+            if row is None:
+                return None
+            return self.put(token, CachedSession.from_model(row))
+        finally:
+            db.close()
+
+
+# Global singleton instance
+_cache: Optional[SessionTokenCache] = None
+
+
+def get_session_cache() -> SessionTokenCache:
+    global _cache
+    if _cache is None:
+        from app.config import get_settings
+        settings = get_settings()
+        _cache = SessionTokenCache(settings.SESSION_CACHE_TTL_SECONDS, settings.SESSION_CACHE_MAX_SIZE)
+    return _cache
@@ -0,0 +1,147 @@
+"""
+Signaling Codec - WebSocket mesajlarının serileştirilmesi ve doğrulanması
+
+Giden mesajlar orjson ile (kuruluysa) serileştirilir, yoksa stdlib json'a
+düşülür; iki yol da aynı kompakt çıktıyı üretir. Gelen /ws/signaling
+mesajları önceden derlenmiş bir pydantic TypeAdapter ile tek geçişte
+ayrıştırılır ve "type" alanına göre ayrışan ClientMessage birleşimine
+göre doğrulanır (JSON ayrıştırma pydantic-core içinde yapılır, ara dict
+oluşmaz). Geçersiz mesajda ValueError (pydantic ValidationError) yükselir.
+
+MessagePack alt protokolü (msgpack kuruluysa): istemci
+`Sec-WebSocket-Protocol: omechat.msgpack.v1` isterse bağlantı binary
+frame'lerle konuşur; mesajlar aynı alanlara sahip msgpack map'leridir,
+sadece "type" MESSAGE_TYPE_CODES'taki kısa tamsayı koduyla taşınır.
+İstemci istemezse veya msgpack yoksa JSON (varsayılan) kullanılır.
+
+Giden mesajlar Frame olarak taşınır; socket'ler (JsonSocket, MsgpackSocket)
+Frame'den kendi protokollerinin kodlamasını alır. Böylece mesaj bir kez
+dict olarak kurulur, JSON'a çevrilip tekrar ayrıştırılmaz.
+"""
+import json
+from typing import Any, Optional, Union
+
+from pydantic import TypeAdapter
+
+from app.schemas.websocket import ClientMessage, MESSAGE_TYPE_CODES, MESSAGE_TYPE_NAMES
+
+try:
+    import orjson
+except ImportError:  # Opsiyonel hızlı yol
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Opsiyonel alt protokol
+    msgpack = None
+
+
+MSGPACK_SUBPROTOCOL = "omechat.msgpack.v1"
+
+_client_message_adapter: TypeAdapter = TypeAdapter(ClientMessage)
+
+
+if orjson is not None:
+    def dumps(message: Any) -> str:
+        return orjson.dumps(message).decode()
+
+    loads = orjson.loads
+else:
+    def dumps(message: Any) -> str:
+        return json.dumps(message, separators=(",", ":"), ensure_ascii=False)
+
+    loads = json.loads
+
+
+def decode_client_message(data: Union[str, bytes]) -> ClientMessage:
+    """İstemci mesajını ayrıştır ve doğrula (bilinmeyen tip/eksik alan: ValueError)"""
+    return _client_message_adapter.validate_json(data)
+
+
+# === MessagePack ===
+
+def negotiate_subprotocol(websocket) -> Optional[str]:
+    """İstemcinin istediği alt protokollerden desteklenen (yoksa None = JSON)"""
+    if msgpack is not None and MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", ()):
+        return MSGPACK_SUBPROTOCOL
+    return None
+
+
+def pack(message: dict) -> bytes:
+    """Mesajı msgpack'e çevir ("type" kısa koda)"""
+    code = MESSAGE_TYPE_CODES.get(message.get("type"))
+    if code is not None:
+        message = {**message, "type": code}
+    return msgpack.packb(message)
+
+
+def unpack(data: bytes) -> Any:
+    """msgpack frame'i çöz ("type" kodu isme); bozuk veride ValueError"""
+    try:
+        message = msgpack.unpackb(data)
+    except (msgpack.UnpackException, ValueError, TypeError) as e:
+        raise ValueError(f"invalid msgpack frame: {e}") from None
+    if isinstance(message, dict) and type(message.get("type")) is int:
+        message["type"] = MESSAGE_TYPE_NAMES.get(message["type"], message["type"])
+    return message
+
+
+def decode_client_msgpack(data: bytes) -> ClientMessage:
+    """decode_client_message'ın msgpack karşılığı"""
+    return _client_message_adapter.validate_python(unpack(data))
+
+
+class Frame:
+    """
+    Giden mesaj: her alt protokol için en fazla bir kez kodlanır.
+    JSON metni ve msgpack baytları ilk ihtiyaçta üretilip saklanır; aynı
+    Frame birden çok socket'e verildiğinde (fan-out) kodlama paylaşılır.
+    """
+
+    __slots__ = ("message", "_text", "_binary")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self._text: Optional[str] = None
+        self._binary: Optional[bytes] = None
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = dumps(self.message)
+        return self._text
+
+    @property
+    def binary(self) -> bytes:
+        if self._binary is None:
+            self._binary = pack(self.message)
+        return self._binary
+
+
+class JsonSocket:
+    """JSON (varsayılan) socket: Frame'in metnini text frame olarak gönderir"""
+
+    __slots__ = ("websocket",)
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+
+    async def send_frame(self, frame: Frame) -> None:
+        await self.websocket.send_text(frame.text)
+
+    async def close(self, code: int = 1000, reason: Optional[str] = None) -> None:
+        await self.websocket.close(code=code, reason=reason)
+
+
+class MsgpackSocket(JsonSocket):
+    """msgpack alt protokolündeki socket: Frame'in msgpack baytlarını binary frame olarak gönderir"""
+
+    __slots__ = ()
+
+    async def send_frame(self, frame: Frame) -> None:
+        await self.websocket.send_bytes(frame.binary)
+
+
+def wrap_socket(websocket, subprotocol: Optional[str]) -> JsonSocket:
+    """Kabul edilmiş WebSocket'i anlaşılan alt protokolün gönderim sınıfına sar"""
+    return MsgpackSocket(websocket) if subprotocol == MSGPACK_SUBPROTOCOL else JsonSocket(websocket)
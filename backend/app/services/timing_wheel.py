@@ -0,0 +1,100 @@
+"""
+Timing Wheel - Hiyerarşik zamanlayıcı çarkı
+
+Kuyruktaki binlerce kaydın süresini tek bir background task ile takip
+etmek için. Her seviye `slots` yuvalıdır; seviye L'deki bir yuva
+slots^L tick'lik bir aralığı kapsar. Kayıt, son tarihine olan uzaklığa
+göre uygun seviyeye konur; üst seviye yuvası sırası gelince alt
+seviyelere dağıtılır (cascade).
+
+    schedule / cancel : O(1)
+    advance           : tick başına O(1) + süresi dolan/dağıtılan kayıtlar
+                        (her kayıt en fazla `levels` kez dağıtılır)
+
+Tüm kuyruğu taramak yerine sadece o tick'in yuvasına bakılır.
+"""
+import math
+import time
+from typing import Dict, Hashable, List, Tuple
+
+
+class TimingWheel:
+    """Anahtar bazlı hiyerarşik timing wheel"""
+
+    def __init__(self, tick_seconds: float = 1.0, slots: int = 64, levels: int = 3, clock=time.monotonic):
+        self._tick = tick_seconds
+        self._slots = slots
+        self._levels = levels
+        self._clock = clock
+        # wheels[level][slot] = {key: deadline_tick}
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        # key -> (level, slot)
+        self._locations: Dict[Hashable, Tuple[int, int]] = {}
+        self._current = int(clock() / tick_seconds)
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._locations
+
+    def schedule(self, key: Hashable, delay_seconds: float) -> None:
+        """`delay_seconds` sonra süresi dolacak şekilde (yeniden) planla"""
+        self.cancel(key)
+        deadline = self._current + max(1, math.ceil(delay_seconds / self._tick))
+        self._place(key, deadline)
+
+    def cancel(self, key: Hashable) -> bool:
+        location = self._locations.pop(key, None)
+        if location is None:
+            return False
+        level, slot = location
+        del self._wheels[level][slot][key]
+        return True
+
+    def advance(self, now: float = None) -> List[Hashable]:
+        """Saati `now`'a kadar ilerlet, süresi dolan anahtarları döner"""
+        target = int((self._clock() if now is None else now) / self._tick)
+        expired = []
+        while self._current < target:
+            self._current += 1
+            self._cascade()
+            slot = self._wheels[0][self._current % self._slots]
+            if slot:
+                due = list(slot)
+                slot.clear()
+                for key in due:
+                    del self._locations[key]
+                expired.extend(due)
+        return expired
+
+    def _place(self, key: Hashable, deadline: int) -> None:
+        distance = deadline - self._current
+        span = 1
+        for level in range(self._levels):
+            if distance < span * self._slots or level == self._levels - 1:
+                if distance >= span * self._slots:
+                    # Çarkın kapsamından uzak: en üst seviyenin en uzak yuvası,
+                    # oradan tekrar dağıtılır
+                    slot = (self._current // span - 1) % self._slots
+                else:
+                    slot = (deadline // span) % self._slots
+                self._wheels[level][slot][key] = deadline
+                self._locations[key] = (level, slot)
+                return
+            span *= self._slots
+
+    def _cascade(self) -> None:
+        """Sırası gelen üst seviye yuvalarını alt seviyelere dağıt"""
+        span = self._slots
+        for level in range(1, self._levels):
+            if self._current % span:
+                return
+            slot = self._wheels[level][(self._current // span) % self._slots]
+            if slot:
+                entries = list(slot.items())
+                slot.clear()
+                for key, deadline in entries:
+                    del self._locations[key]
+                    self._place(key, deadline)
+            span *= self._slots
@@ -0,0 +1,167 @@
+"""
+Wait Estimator - Kova bazlı tahmini bekleme süresi
+
+Her eşleşme kovası için üstel ağırlıklı (EWMA) varış ve eşleşme hızları
+tutulur. Kuyruktaki bir kullanıcının tahmini süresi:
+
+    eta = (kovada öndeki kişi + 1) / kovanın eşleşme hızı
+
+Kova henüz eşleşme görmediyse varış hızı (denge durumunda çıkış ~ varış),
+o da yoksa global eşleşme hızı kullanılır. Ayrıca gerçekleşen bekleme
+sürelerinin global EWMA'sı tutulur (/public/online-count için); aynısı
+öncelikli ve normal şerit için ayrı ayrı da tutulur (adalet ölçümü).
+
+Tüm işlemler O(1); kovada öndeki kişi sayısı bilet sırası ile
+yaklaşık hesaplanır (sıra dışı ayrılmalar tahmini biraz küçültür).
+"""
+import math
+import time
+from typing import Dict, Hashable, Optional, Tuple
+from uuid import UUID
+
+
+# Hız tahmini için yarı ömür: daha kısa = trafik değişimine daha hızlı tepki
+DEFAULT_HALF_LIFE_SECONDS = 60.0
+
+# Bu hızın altı "veri yok" sayılır (olay/saniye)
+MIN_RATE = 1e-3
+
+
+class EwmaRate:
+    """Zamanla sönen olay hızı (olay/saniye)"""
+
+    __slots__ = ("_tau", "_rate", "_updated_at", "_started_at")
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE_SECONDS):
+        self._tau = half_life / math.log(2)
+        self._rate = 0.0
+        self._updated_at = None
+        self._started_at = None
+
+    def _decayed(self, now: float) -> float:
+        if self._updated_at is None:
+            return 0.0
+        return self._rate * math.exp(-(now - self._updated_at) / self._tau)
+
+    def record(self, now: float, count: int = 1) -> None:
+        if self._started_at is None:
+            self._started_at = now
+        self._rate = self._decayed(now) + count / self._tau
+        self._updated_at = now
+
+    def rate(self, now: float) -> float:
+        if self._started_at is None:
+            return 0.0
+        # Isınma düzeltmesi: ilk dakikalarda hız sıfırdan başladığı için düşük kalmasın
+        # (tek olaydan aşırı yüksek hız çıkmasın diye en az çeyrek yarı ömür)
+        elapsed = max(now - self._started_at, self._tau * math.log(2) / 4)
+        warmup = 1.0 - math.exp(-elapsed / self._tau)
+        return self._decayed(now) / warmup
+
+
+class EwmaValue:
+    """Üstel ağırlıklı ortalama (gerçekleşen bekleme süreleri)"""
+
+    __slots__ = ("_alpha", "value")
+
+    def __init__(self, alpha: float = 0.05):
+        self._alpha = alpha
+        self.value: Optional[float] = None
+
+    def record(self, sample: float) -> None:
+        if self.value is None:
+            self.value = sample
+        else:
+            self.value += self._alpha * (sample - self.value)
+
+
+class _BucketRates:
+    __slots__ = ("key", "arrivals", "matches", "enqueued", "departed", "size")
+
+    def __init__(self, key: Hashable, half_life: float):
+        self.key = key
+        self.arrivals = EwmaRate(half_life)
+        self.matches = EwmaRate(half_life)
+        # Kova içi bilet sayacı: enqueued - departed ~ öndeki kişi
+        self.enqueued = 0
+        self.departed = 0
+        self.size = 0
+
+
+class WaitEstimator:
+    """Kova başına varış/eşleşme hızları ve session başına ETA"""
+
+    def __init__(self, half_life: float = DEFAULT_HALF_LIFE_SECONDS, clock=time.monotonic):
+        self._half_life = half_life
+        self._clock = clock
+        self._buckets: Dict[Hashable, _BucketRates] = {}
+        # session_id -> (kova hızları, kova içi bilet, kuyruğa giriş zamanı, öncelikli mi);
+        # kova anahtarı session başına kopyalanmaz, _BucketRates paylaşılır
+        self._entries: Dict[UUID, Tuple[_BucketRates, int, float, bool]] = {}
+        self._matches = EwmaRate(half_life)
+        self._waits = EwmaValue()
+        # Şerit başına gerçekleşen bekleme: (normal, öncelikli)
+        self._lane_waits = (EwmaValue(), EwmaValue())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, session_id: UUID, bucket: Hashable, priority: bool = False) -> None:
+        """Kuyruğa giriş (varış)"""
+        now = self._clock()
+        rates = self._buckets.get(bucket)
+        if rates is None:
+            rates = self._buckets[bucket] = _BucketRates(bucket, self._half_life)
+        rates.arrivals.record(now)
+        self._entries[session_id] = (rates, rates.enqueued, now, priority)
+        rates.enqueued += 1
+        rates.size += 1
+
+    def remove(self, session_id: UUID, matched: bool = False) -> None:
+        """Kuyruktan çıkış; sadece eşleşmeler hız ve bekleme ortalamasına girer"""
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        rates, _, joined_at, priority = entry
+        rates.departed += 1
+        rates.size -= 1
+        if matched:
+            now = self._clock()
+            rates.matches.record(now)
+            self._matches.record(now)
+            self._waits.record(now - joined_at)
+            self._lane_waits[priority].record(now - joined_at)
+        if rates.size == 0 and rates.matches.rate(self._clock()) < MIN_RATE:
+            # Boş ve soğumuş kova: hızlar tekrar sıfırdan öğrenilir
+            del self._buckets[rates.key]
+
+    def estimate(self, session_id: UUID) -> Optional[int]:
+        """Session için kalan tahmini bekleme (saniye), veri yoksa None"""
+        entry = self._entries.get(session_id)
+        if entry is None:
+            return None
+        rates, ticket, _, _ = entry
+        now = self._clock()
+        ahead = min(max(ticket - rates.departed, 0), rates.size - 1)
+
+        rate = rates.matches.rate(now)
+        if rate < MIN_RATE:
+            rate = rates.arrivals.rate(now)
+        if rate < MIN_RATE:
+            rate = self._matches.rate(now)
+        if rate < MIN_RATE:
+            return None
+        return math.ceil((ahead + 1) / rate)
+
+    def typical_wait(self) -> Optional[int]:
+        """Gerçekleşen bekleme sürelerinin EWMA'sı (saniye)"""
+        if self._waits.value is None:
+            return None
+        return round(self._waits.value)
+
+    def lane_waits(self) -> Tuple[Optional[float], Optional[float]]:
+        """(öncelikli, normal) şerit için gerçekleşen bekleme EWMA'sı (saniye)"""
+        normal, priority = (
+            None if lane.value is None else round(lane.value, 1) for lane in self._lane_waits
+        )
+        return priority, normal
@@ -0,0 +1,89 @@
+"""
+Matchmaking memory benchmark
+
+100k kuyrukta bekleyen ve 100k bağlantıda olan session için
+MatchmakingService'in tuttuğu bellek (tracemalloc ile, session başına).
+
+Session id'leri her çağrıda yeni UUID nesnesi olarak verilir; matchmaker
+IPC / Redis yolunda her istek id'yi yeniden çözdüğü için gerçek durum budur
+(--shared-ids ile aynı nesne tekrar kullanılır).
+
+Kullanım (backend/ klasöründen):
+    python -m benchmarks.matchmaking_memory --sessions 100000
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import tracemalloc
+from uuid import UUID, uuid4
+
+from app.services.matchmaking import MatchmakingService, QueuedUser
+
+
+GENDERS = ("MALE", "FEMALE", "OTHER")
+COUNTRIES = ("TR", "DE", "US", "GB", "FR", None)
+LANGUAGES = ("tr", "en", "de", None)
+
+
+def _copy(session_id: UUID, shared: bool) -> UUID:
+    return session_id if shared else UUID(bytes=session_id.bytes)
+
+
+async def _fill(service: MatchmakingService, sessions: int, shared: bool, seed: int) -> None:
+    rng = random.Random(seed)
+    for _ in range(sessions):
+        session_id = uuid4()
+        await service.register_websocket(_copy(session_id, shared), None)
+        await service.join_queue(QueuedUser(
+            session_id=_copy(session_id, shared),
+            session_token="bench",
+            gender=rng.choice(GENDERS),
+            country=rng.choice(COUNTRIES),
+            language=rng.choice(LANGUAGES),
+        ))
+
+
+def measure(label: str, sessions: int, batch_matching: bool, shared: bool, seed: int) -> dict:
+    async def run():
+        # Toplu modda join eşleştirmez (hepsi kuyrukta kalır); greedy modda
+        # filtresiz kullanıcılar ikişer ikişer hemen eşleşir
+        service = MatchmakingService(batch_matching=batch_matching)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        await _fill(service, sessions, shared, seed)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        return service.stats(), total
+
+    stats, total = asyncio.run(run())
+    return {
+        "scenario": label,
+        "sessions": sessions,
+        "in_queue": stats.in_queue,
+        "active_connections": stats.active_connections,
+        "total_bytes": total,
+        "bytes_per_session": round(total / max(sessions, 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=100_000)
+    parser.add_argument("--shared-ids", action="store_true")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    results = [
+        measure("queued", args.sessions, True, args.shared_ids, args.seed),
+        measure("connected", args.sessions, False, args.shared_ids, args.seed),
+    ]
+    print(json.dumps({"benchmark": "matchmaking_memory", "shared_ids": args.shared_ids, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+Matchmaking simulation benchmark
+
+MatchmakingService'i sentetik trafikle sürer ve JSON rapor üretir:
+
+- Varışlar Poisson süreci (--rates, saniyede yeni session)
+- Kullanıcıların bir kısmı cinsiyet/ülke filtresi kullanır (--filter-rate)
+- Bir kısmı premium/VIP, öncelikli şeritte bekler (--priority-rate)
+- Kuyrukta bekleme sabrı üstel dağılımlı (--patience), dolunca LEAVE_QUEUE
+- Sohbet süresi üstel dağılımlı (--chat-mean), sonunda initiator
+  NEXT (--next-rate), disconnect (--disconnect-rate) veya normal çıkış yapar;
+  partner --requeue-rate olasılıkla tekrar kuyruğa girer
+
+Rapor: gerçekleşen join/s ve eşleşme/s, join/leave/end/cleanup p50/p99
+gecikmeleri, eşleşme bekleme dağılımı (şerit bazında da; öncelik
+adaleti için öne geçme sayısı ve en büyük giriş farkı), üretecin gecikmesi (doygunluk
+göstergesi) ve kuyruktaki session başına bellek (tracemalloc).
+
+Kullanım (backend/ klasöründen):
+    python -m benchmarks.matchmaking_simulation --rates 500 2000 8000 --seconds 5
+    python -m benchmarks.matchmaking_simulation --output sim.json
+"""
+import argparse
+import asyncio
+import gc
+import json
+import random
+import time
+import tracemalloc
+from uuid import uuid4
+
+from app.services.matchmaking import MatchmakingService, QueuedUser
+
+
+GENDERS = ("MALE", "FEMALE", "OTHER")
+COUNTRIES = ("TR", "DE", "US", "GB", "FR", None)
+LANGUAGES = ("tr", "en", "de", None)
+
+
+def _percentiles_ms(samples: list, points=(0.50, 0.90, 0.99)) -> dict:
+    if not samples:
+        return {f"p{int(p * 100)}": 0.0 for p in points}
+    samples = sorted(samples)
+    result = {
+        f"p{int(p * 100)}": round(samples[min(len(samples) - 1, int(len(samples) * p))] * 1000, 3)
+        for p in points
+    }
+    result["max"] = round(samples[-1] * 1000, 3)
+    return result
+
+
+def _make_user(session_id, rng: random.Random, filter_rate: float, priority: bool = False) -> QueuedUser:
+    user = QueuedUser(
+        session_id=session_id,
+        session_token="sim",
+        gender=rng.choice(GENDERS),
+        country=rng.choice(COUNTRIES),
+        language=rng.choice(LANGUAGES),
+        priority=priority,
+    )
+    if rng.random() < filter_rate:
+        if rng.random() < 0.7:
+            user.preferred_gender = rng.choice(GENDERS)
+        else:
+            user.preferred_country = rng.choice(COUNTRIES[:-1])
+    return user
+
+
+class Simulation:
+    def __init__(self, service: MatchmakingService, args, rng: random.Random):
+        self.service = service
+        self.args = args
+        self.rng = rng
+        # session_id -> eşleşme / bitiş bildirimi (route katmanındaki MATCH_FOUND / MATCH_ENDED yerine)
+        self.matched = {}
+        self.ended = {}
+        self.latencies = {"join": [], "leave": [], "end": [], "cleanup": []}
+        self.waits = []
+        self.lane_waits = {"priority": [], "normal": []}
+        self.counts = {"arrivals": 0, "joins": 0, "matches": 0, "abandoned": 0, "nexts": 0, "disconnects": 0}
+        self.generator_lag = []
+        self.tasks = set()
+
+    async def _timed(self, op: str, coro):
+        t0 = time.perf_counter()
+        result = await coro
+        self.latencies[op].append(time.perf_counter() - t0)
+        return result
+
+    def _notify(self, table: dict, session_id, value) -> None:
+        future = table.pop(session_id, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    async def _end(self, session_id, reason: str) -> None:
+        partner_id = await self._timed("end", self.service.end_connection(session_id, reason))
+        if partner_id:
+            self._notify(self.ended, partner_id, reason)
+
+    async def _disconnect(self, session_id) -> None:
+        partner_id = await self._timed("cleanup", self.service.cleanup_session(session_id))
+        if partner_id:
+            self._notify(self.ended, partner_id, "DISCONNECTED")
+
+    async def session(self, session_id) -> None:
+        """Tek bir session'ın yaşam döngüsü"""
+        loop = asyncio.get_running_loop()
+        args, rng = self.args, self.rng
+        priority = rng.random() < args.priority_rate
+        lane = self.lane_waits["priority" if priority else "normal"]
+        await self.service.register_websocket(session_id, None)
+        try:
+            while True:
+                # Kuyruğa gir
+                self.counts["joins"] += 1
+                matched = loop.create_future()
+                self.matched[session_id] = matched
+                joined_at = time.perf_counter()
+                result = await self._timed("join", self.service.join_queue(_make_user(session_id, rng, args.filter_rate, priority)))
+                if result:
+                    self.matched.pop(session_id, None)
+                    _, partner_id, _ = result
+                    self._notify(self.matched, partner_id, True)
+                    self.waits.append(0.0)
+                    lane.append(0.0)
+                    self.counts["matches"] += 1
+                    initiator = True
+                else:
+                    try:
+                        await asyncio.wait_for(asyncio.shield(matched), rng.expovariate(1 / args.patience))
+                    except asyncio.TimeoutError:
+                        if await self._timed("leave", self.service.leave_queue(session_id)):
+                            self.matched.pop(session_id, None)
+                            self.counts["abandoned"] += 1
+                            return
+                        # Sabır dolarken eşleşmiş
+                        await matched
+                    self.waits.append(time.perf_counter() - joined_at)
+                    lane.append(self.waits[-1])
+                    initiator = False
+
+                # Sohbet: bitişe initiator karar verir, partner bildirim bekler
+                ended = loop.create_future()
+                self.ended[session_id] = ended
+                if not initiator:
+                    await ended
+                    if rng.random() < args.requeue_rate:
+                        continue
+                    return
+
+                try:
+                    await asyncio.wait_for(asyncio.shield(ended), rng.expovariate(1 / args.chat_mean))
+                    # Partner koptu
+                    continue
+                except asyncio.TimeoutError:
+                    self.ended.pop(session_id, None)
+
+                roll = rng.random()
+                if roll < args.next_rate:
+                    self.counts["nexts"] += 1
+                    await self._end(session_id, "NEXTED")
+                    continue
+                if roll < args.next_rate + args.disconnect_rate:
+                    self.counts["disconnects"] += 1
+                    await self._disconnect(session_id)
+                    return
+                await self._end(session_id, "NORMAL")
+                return
+        finally:
+            self.matched.pop(session_id, None)
+            self.ended.pop(session_id, None)
+            await self.service.cleanup_session(session_id)
+
+    async def arrivals(self, rate: float, seconds: float) -> None:
+        """Poisson varışları: gecikmede kalan varışlar topluca başlatılır"""
+        started = time.perf_counter()
+        next_at = started
+        deadline = started + seconds
+        while next_at < deadline:
+            now = time.perf_counter()
+            if next_at > now:
+                await asyncio.sleep(next_at - now)
+                now = time.perf_counter()
+            while next_at <= now and next_at < deadline:
+                self.generator_lag.append(now - next_at)
+                self.counts["arrivals"] += 1
+                task = asyncio.create_task(self.session(uuid4()))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+                next_at += self.rng.expovariate(rate)
+
+
+async def run_rate(rate: float, args) -> dict:
+    service = MatchmakingService(priority_boost=args.priority_boost)
+    sim = Simulation(service, args, random.Random(args.seed))
+    started = time.perf_counter()
+    await sim.arrivals(rate, args.seconds)
+    elapsed = time.perf_counter() - started
+    stats = service.stats()
+    # wait_for, iptal ile sonuç aynı anda gelirse iptali yutabilir: bitene kadar tekrarla
+    while sim.tasks:
+        for task in list(sim.tasks):
+            task.cancel()
+        await asyncio.wait(list(sim.tasks), timeout=0.1)
+
+    return {
+        "arrival_rate": rate,
+        "elapsed_sec": round(elapsed, 3),
+        **sim.counts,
+        "joins_per_sec": round(sim.counts["joins"] / elapsed, 1),
+        "matches_per_sec": round(stats.total_matches / elapsed, 1),
+        "in_queue_at_end": stats.in_queue,
+        "active_connections_at_end": stats.active_connections,
+        "latency_ms": {op: _percentiles_ms(samples) for op, samples in sim.latencies.items()},
+        "match_wait_ms": _percentiles_ms(sim.waits),
+        "match_wait_ms_by_lane": {lane: _percentiles_ms(samples) for lane, samples in sim.lane_waits.items()},
+        "overtakes": stats.total_overtakes,
+        "max_overtake_sec": stats.max_overtake_sec,
+        "generator_lag_ms": _percentiles_ms(sim.generator_lag),
+    }
+
+
+def measure_queue_memory(sessions: int, seed: int) -> dict:
+    """Kuyruktaki session başına bellek (QueuedUser + index + sıra takibi + zamanlayıcılar)"""
+    async def fill():
+        # Toplu modda join eşleştirmez, sadece kuyruğa ekler
+        service = MatchmakingService(batch_matching=True, queue_timeout=60)
+        rng = random.Random(seed)
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        for _ in range(sessions):
+            await service.join_queue(_make_user(uuid4(), rng, 0.2))
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+        return service.queue_size, total
+
+    queued, total = asyncio.run(fill())
+    return {
+        "queued_sessions": queued,
+        "total_bytes": total,
+        "bytes_per_session": round(total / max(queued, 1), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rates", type=float, nargs="+", default=[500, 2000])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--filter-rate", type=float, default=0.2)
+    parser.add_argument("--priority-rate", type=float, default=0.1, help="premium/VIP oranı")
+    parser.add_argument("--priority-boost", type=float, default=15.0, help="öncelikli şerit avantajı (sn)")
+    parser.add_argument("--patience", type=float, default=2.0, help="ortalama kuyruk sabrı (sn)")
+    parser.add_argument("--chat-mean", type=float, default=0.5, help="ortalama sohbet süresi (sn)")
+    parser.add_argument("--next-rate", type=float, default=0.6)
+    parser.add_argument("--disconnect-rate", type=float, default=0.2)
+    parser.add_argument("--requeue-rate", type=float, default=0.7)
+    parser.add_argument("--memory-sessions", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="JSON raporu dosyaya da yaz")
+    args = parser.parse_args()
+
+    report = {
+        "benchmark": "matchmaking_simulation",
+        "params": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": [asyncio.run(run_rate(rate, args)) for rate in args.rates],
+        "memory": measure_queue_memory(args.memory_sessions, args.seed),
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Signaling codec benchmark
+
+Tek çekirdekte saniyede işlenebilen /ws/signaling mesajı (düğüm boyutlandırma):
+
+- decode: gelen mesaj -> doğrulanmış mesaj -> handler seçimi (handler'lar boş).
+  Karşılaştırma: json.loads + if/elif zinciri (eski yol, doğrulama yok),
+  loads + TypeAdapter.validate_python ve TypeAdapter.validate_json (kullanılan)
+- encode: giden mesajlar, json.dumps ile signaling_codec.dumps (orjson varsa)
+- msgpack (kuruluysa): aynı karışımın omechat.msgpack.v1 frame boyutu,
+  çözme ve kodlama (Frame.binary, giden mesaj dict'inden doğrudan) hızı
+
+Mesaj karışımı bir eşleşmenin tipik trafiği: JOIN_QUEUE, OFFER/ANSWER
+(~3 KB SDP), ICE_CANDIDATE çoğunlukta, birkaç CHAT_MESSAGE.
+
+Kullanım (backend/ klasöründen):
+    python -m benchmarks.signaling_codec --messages 200000
+"""
+import argparse
+import json
+import random
+import time
+
+from app.services import signaling_codec
+from app.services.signaling_codec import (
+    decode_client_message, decode_client_msgpack, dumps, loads, pack, _client_message_adapter,
+)
+
+
+SDP = "v=0\r\no=- 4611731400430051336 2 IN IP4 127.0.0.1\r\n" + "a=rtpmap:111 opus/48000/2\r\n" * 110
+
+CLIENT_MESSAGES = [
+    ({"type": "JOIN_QUEUE", "preferred_gender": "FEMALE", "language": "tr"}, 1),
+    ({"type": "OFFER", "connectionId": "0b7c2c1e-4f5a-4a8e-9a57-4a3f3c1f9e21", "sdp": SDP}, 1),
+    ({"type": "ANSWER", "connectionId": "0b7c2c1e-4f5a-4a8e-9a57-4a3f3c1f9e21", "sdp": SDP}, 1),
+    ({"type": "ICE_CANDIDATE", "connectionId": "0b7c2c1e-4f5a-4a8e-9a57-4a3f3c1f9e21", "candidate": {
+        "candidate": "candidate:842163049 1 udp 1677729535 203.0.113.7 54321 typ srflx raddr 0.0.0.0 rport 0",
+        "sdpMid": "0",
+        "sdpMLineIndex": 0,
+    }}, 20),
+    ({"type": "CHAT_MESSAGE", "connectionId": "0b7c2c1e-4f5a-4a8e-9a57-4a3f3c1f9e21", "text": "merhaba"}, 3),
+    ({"type": "NEXT"}, 1),
+]
+
+SERVER_MESSAGES = [
+    {"type": "MATCH_FOUND", "connection_id": "0b7c2c1e-4f5a-4a8e-9a57-4a3f3c1f9e21", "is_initiator": True},
+    {"type": "QUEUE_POSITION", "position": 12, "estimated_wait_sec": 4, "online_count": 5321},
+    {"type": "OFFER", "sdp": SDP},
+    {"type": "ICE_CANDIDATE", "candidate": CLIENT_MESSAGES[3][0]["candidate"]},
+    {"type": "ONLINE_COUNT_UPDATE", "count": 5321},
+]
+
+
+def _workload(count: int, seed: int) -> list:
+    rng = random.Random(seed)
+    messages = [message for message, weight in CLIENT_MESSAGES for _ in range(weight)]
+    return [json.dumps(rng.choice(messages)) for _ in range(count)]
+
+
+async def _noop(client, message):
+    pass
+
+
+HANDLERS = {message["type"]: _noop for message, _ in CLIENT_MESSAGES}
+
+
+def decode_if_chain(frames: list) -> None:
+    for data in frames:
+        message = json.loads(data)
+        msg_type = message.get("type")
+        if msg_type == "JOIN_QUEUE":
+            pass
+        elif msg_type == "LEAVE_QUEUE":
+            pass
+        elif msg_type == "NEXT":
+            pass
+        elif msg_type == "RECONNECT":
+            pass
+        elif msg_type in ("OFFER", "ANSWER", "ICE_CANDIDATE"):
+            pass
+        elif msg_type == "CHAT_MESSAGE":
+            pass
+
+
+def decode_validate_python(frames: list) -> None:
+    validate = _client_message_adapter.validate_python
+    for data in frames:
+        HANDLERS[validate(loads(data)).type]
+
+
+def decode_validate_json(frames: list) -> None:
+    for data in frames:
+        HANDLERS[decode_client_message(data).type]
+
+
+def decode_msgpack(frames: list) -> None:
+    for data in frames:
+        HANDLERS[decode_client_msgpack(data).type]
+
+
+def _rate(fn, payload, count: int, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        best = min(best, time.perf_counter() - start)
+    return round(count / best)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    frames = _workload(args.messages, args.seed)
+    outgoing = [SERVER_MESSAGES[i % len(SERVER_MESSAGES)] for i in range(args.messages)]
+
+    report = {
+        "benchmark": "signaling_codec",
+        "orjson": signaling_codec.orjson is not None,
+        "messages": args.messages,
+        "avg_frame_bytes": round(sum(map(len, frames)) / len(frames)),
+        "decode_msgs_per_sec": {
+            "json_if_chain_unvalidated": _rate(decode_if_chain, frames, args.messages, args.repeat),
+            "loads_validate_python": _rate(decode_validate_python, frames, args.messages, args.repeat),
+            "validate_json": _rate(decode_validate_json, frames, args.messages, args.repeat),
+        },
+        "encode_msgs_per_sec": {
+            "json_dumps": _rate(lambda items: [json.dumps(m) for m in items], outgoing, args.messages, args.repeat),
+            "codec_dumps": _rate(lambda items: [dumps(m) for m in items], outgoing, args.messages, args.repeat),
+        },
+    }
+    if signaling_codec.msgpack is not None:
+        binary_frames = [pack(json.loads(data)) for data in frames]
+        report["msgpack"] = {
+            "avg_frame_bytes": round(sum(map(len, binary_frames)) / len(binary_frames)),
+            "decode_msgs_per_sec": _rate(decode_msgpack, binary_frames, args.messages, args.repeat),
+            "encode_msgs_per_sec": _rate(lambda items: [pack(m) for m in items], outgoing, args.messages, args.repeat),
+        }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""ConnectionLog: kalıcı hatada sadece yazılamayan satırlar atılır"""
+import asyncio
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (FK hedefleri metadata'ya kaydolsun)
+from app.database import Base
+from app.models.connection import Connection
+from app.services.connection_log import MAX_FLUSH_ATTEMPTS, ConnectionLog
+
+
+def _engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[Connection.__table__])
+    return engine
+
+
+def _row_count(engine) -> int:
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(Connection.__table__)).scalar()
+
+
+def test_permanent_error_drops_only_failing_rows(capsys):
+    engine = _engine()
+    log = ConnectionLog(engine_factory=lambda: engine)
+    duplicate = uuid4()
+    log.record_start(duplicate, uuid4(), uuid4(), datetime.utcnow())
+    assert asyncio.run(log.flush()) == 1
+
+    # Aynı id ile ikinci INSERT her seferinde IntegrityError verir
+    ids = [uuid4() for _ in range(7)]
+    for connection_id in ids[:3] + [duplicate] + ids[3:]:
+        log.record_start(connection_id, uuid4(), uuid4(), datetime.utcnow())
+    log.record_end(ids[0], "NEXTED")
+
+    for _ in range(MAX_FLUSH_ATTEMPTS - 1):
+        with pytest.raises(Exception):
+            asyncio.run(log.flush())
+        assert log.pending == 8
+    assert asyncio.run(log.flush()) == 7
+
+    assert (log.pending, log.dropped, log.flushed_rows) == (0, 1, 8)
+    assert _row_count(engine) == 8
+    assert f"dropped row {duplicate}" in capsys.readouterr().out
+
+
+def test_outage_keeps_rows_for_retry():
+    def unavailable():
+        raise OperationalError("connect", {}, Exception("connection refused"))
+
+    log = ConnectionLog(engine_factory=unavailable)
+    for _ in range(3):
+        log.record_start(uuid4(), uuid4(), uuid4(), datetime.utcnow())
+
+    for _ in range(MAX_FLUSH_ATTEMPTS + 1):
+        with pytest.raises(OperationalError):
+            asyncio.run(log.flush())
+    assert (log.pending, log.dropped) == (3, 0)
@@ -0,0 +1,72 @@
+"""fanout ve Frame: alt protokol başına tek kodlama"""
+import asyncio
+
+from app.services import signaling_codec
+from app.services.fanout import fanout
+from app.services.signaling_codec import Frame, JsonSocket, MsgpackSocket, unpack
+
+
+class FakeWebSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_text(self, text):
+        self.sent.append(text)
+
+    async def send_bytes(self, data):
+        self.sent.append(data)
+
+
+class BrokenWebSocket(FakeWebSocket):
+    async def send_text(self, text):
+        raise ConnectionError("closed")
+
+
+def _count_calls(monkeypatch, name):
+    calls = []
+    original = getattr(signaling_codec, name)
+
+    def counted(message):
+        calls.append(message)
+        return original(message)
+
+    monkeypatch.setattr(signaling_codec, name, counted)
+    return calls
+
+
+def test_frame_encodes_each_protocol_once(monkeypatch):
+    dumps_calls = _count_calls(monkeypatch, "dumps")
+    pack_calls = _count_calls(monkeypatch, "pack")
+    frame = Frame({"type": "ONLINE_COUNT_UPDATE", "count": 7})
+
+    assert frame.text is frame.text
+    assert frame.binary is frame.binary
+    assert len(dumps_calls) == 1 and len(pack_calls) == 1
+    assert unpack(frame.binary) == {"type": "ONLINE_COUNT_UPDATE", "count": 7}
+
+
+def test_fanout_shares_encodings_across_mixed_sockets(monkeypatch):
+    dumps_calls = _count_calls(monkeypatch, "dumps")
+    pack_calls = _count_calls(monkeypatch, "pack")
+    json_sockets = [FakeWebSocket() for _ in range(5)]
+    msgpack_sockets = [FakeWebSocket() for _ in range(5)]
+    targets = [JsonSocket(ws) for ws in json_sockets] + [MsgpackSocket(ws) for ws in msgpack_sockets]
+
+    sent = asyncio.run(fanout(targets, {"type": "ONLINE_COUNT_UPDATE", "count": 3}, concurrency=4))
+
+    assert sent == 10
+    assert len(dumps_calls) == 1 and len(pack_calls) == 1
+    texts = [ws.sent[0] for ws in json_sockets]
+    blobs = [ws.sent[0] for ws in msgpack_sockets]
+    assert all(text is texts[0] for text in texts)
+    assert all(blob is blobs[0] for blob in blobs)
+    assert signaling_codec.loads(texts[0]) == unpack(blobs[0])
+
+
+def test_fanout_skips_failed_and_missing_sockets():
+    ok = FakeWebSocket()
+    targets = [JsonSocket(ok), JsonSocket(BrokenWebSocket()), None]
+
+    assert asyncio.run(fanout(targets, {"type": "MATCH_ENDED", "reason": "NEXTED"})) == 1
+    assert len(ok.sent) == 1
+    assert asyncio.run(fanout([], {"type": "MATCH_ENDED"})) == 0
@@ -0,0 +1,83 @@
+"""GeoIPResolver: sahte okuyucu ile LRU isabet/ıska/çıkarma"""
+from types import SimpleNamespace
+
+import geoip2.errors
+
+from app.services.geoip import GeoIPResolver, GeoResult
+
+COUNTRIES = {"8.8.8.8": "US", "1.1.1.1": "AU", "9.9.9.9": "CH"}
+
+
+class StubReader:
+    """.mmdb yerine: sorguları sayar"""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+
+    def country(self, ip: str):
+        self.calls.append(ip)
+        if ip not in COUNTRIES:
+            raise geoip2.errors.AddressNotFoundError(ip)
+        return SimpleNamespace(country=SimpleNamespace(iso_code=COUNTRIES[ip]))
+
+    def city(self, ip: str):
+        response = self.country(ip)
+        response.location = SimpleNamespace(latitude=1.5, longitude=2.5)
+        return response
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def _resolver(cache_size: int, city: bool = False) -> GeoIPResolver:
+    resolver = GeoIPResolver(None, cache_size=cache_size)
+    resolver._reader = StubReader()
+    resolver._city = city
+    return resolver
+
+
+def test_repeated_ips_are_served_from_the_cache():
+    resolver = _resolver(cache_size=4)
+    assert resolver.enabled
+
+    assert resolver.lookup("8.8.8.8") == GeoResult(country="US")
+    assert resolver.lookup("8.8.8.8") == GeoResult(country="US")
+    assert resolver._reader.calls == ["8.8.8.8"]
+
+    # Bulunamayan adres de önbelleğe alınır
+    assert resolver.lookup("4.4.4.4") == GeoResult()
+    assert resolver.lookup("4.4.4.4") == GeoResult()
+    assert resolver._reader.calls == ["8.8.8.8", "4.4.4.4"]
+
+
+def test_least_recently_used_entry_is_evicted():
+    resolver = _resolver(cache_size=2)
+    resolver.lookup("8.8.8.8")
+    resolver.lookup("1.1.1.1")
+    # İsabet 8.8.8.8'i en yeniye taşır, taşmada 1.1.1.1 çıkar
+    resolver.lookup("8.8.8.8")
+    resolver.lookup("9.9.9.9")
+    assert list(resolver._cache) == ["8.8.8.8", "9.9.9.9"]
+
+    resolver.lookup("8.8.8.8")
+    resolver.lookup("1.1.1.1")
+    assert resolver._reader.calls == ["8.8.8.8", "1.1.1.1", "9.9.9.9", "1.1.1.1"]
+    assert len(resolver._cache) == 2
+
+
+def test_private_and_invalid_addresses_skip_the_reader():
+    resolver = _resolver(cache_size=4)
+    for ip in ("10.0.0.1", "127.0.0.1", "not-an-ip", ""):
+        assert resolver.lookup(ip) == GeoResult()
+    assert resolver._reader.calls == []
+
+
+def test_city_database_adds_coordinates():
+    resolver = _resolver(cache_size=4, city=True)
+    assert resolver.lookup("1.1.1.1") == GeoResult(country="AU", latitude=1.5, longitude=2.5)
+
+    reader = resolver._reader
+    resolver.close()
+    assert reader.closed and not resolver.enabled
+    assert resolver.lookup("1.1.1.1") == GeoResult()
@@ -0,0 +1,123 @@
+"""ICE adaylarının pencere içinde toplanması (ICE_BATCH_WINDOW_MS)"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.routes import websocket
+from app.routes.websocket import SIGNALING_HANDLERS, SignalingClient
+from app.services.matchmaking import MatchmakingService, QueuedUser
+from app.services.signaling_codec import Frame, decode_client_message, dumps
+
+WINDOW_MS = 30
+
+
+class RecordingSocket:
+    """Kayıtlı socket yerine: gönderilen mesajlar sırasıyla"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_frame(self, frame: Frame, critical: bool = True) -> None:
+        self.sent.append(frame.message)
+
+    def types(self) -> list:
+        return [message["type"] for message in self.sent]
+
+
+@pytest.fixture
+def batching(monkeypatch):
+    monkeypatch.setattr(websocket.settings, "ICE_BATCH_WINDOW_MS", WINDOW_MS)
+    service = MatchmakingService()
+    monkeypatch.setattr(websocket, "mm_service", service)
+    return service
+
+
+async def _matched(service: MatchmakingService):
+    """Eşleşmiş iki session: (a'nın SignalingClient'ı, b'nin socket'i)"""
+    a, b = uuid4(), uuid4()
+    ws_a, ws_b = RecordingSocket(), RecordingSocket()
+    await service.register_websocket(a, ws_a)
+    await service.register_websocket(b, ws_b)
+    await service.join_queue(QueuedUser(session_id=a, session_token="token"))
+    await service.join_queue(QueuedUser(session_id=b, session_token="token"))
+    profile = {"can_use_reconnect": False}
+    return SignalingClient(a, "token", profile, ws_a), ws_b
+
+
+async def _send(client: SignalingClient, message: dict) -> None:
+    decoded = decode_client_message(dumps(message))
+    await SIGNALING_HANDLERS[decoded.type](client, decoded)
+
+
+def _candidate(n: int) -> dict:
+    return {"type": "ICE_CANDIDATE", "candidate": {"candidate": f"candidate:{n}", "sdpMLineIndex": 0}}
+
+
+def test_candidates_are_sent_once_the_window_elapses(batching):
+    async def scenario():
+        client, partner = await _matched(batching)
+        for n in range(3):
+            await _send(client, _candidate(n))
+        assert partner.sent == [] and len(client.ice_pending) == 3
+
+        await asyncio.sleep(WINDOW_MS / 1000 * 3)
+        assert partner.sent == [{
+            "type": "ICE_CANDIDATES",
+            "candidates": [_candidate(n)["candidate"] for n in range(3)],
+        }]
+
+        # Penceredeki tek aday eski biçimde gider
+        await _send(client, _candidate(3))
+        await asyncio.sleep(WINDOW_MS / 1000 * 3)
+        assert partner.sent[-1] == _candidate(3)
+        assert client.ice_pending == [] and client.ice_flush is None
+
+    asyncio.run(scenario())
+
+
+def test_pending_candidates_are_flushed_before_sdp(batching):
+    async def scenario():
+        client, partner = await _matched(batching)
+        await _send(client, _candidate(0))
+        await _send(client, _candidate(1))
+        await _send(client, {"type": "OFFER", "sdp": "v=0"})
+        await _send(client, _candidate(2))
+        await _send(client, {"type": "ANSWER", "sdp": "v=0"})
+
+        assert partner.types() == ["ICE_CANDIDATES", "OFFER", "ICE_CANDIDATE", "ANSWER"]
+        assert client.ice_flush is None
+        # İptal edilen zamanlayıcı sonradan bir şey göndermez
+        await asyncio.sleep(WINDOW_MS / 1000 * 3)
+        assert len(partner.sent) == 4
+
+    asyncio.run(scenario())
+
+
+def test_next_discards_candidates_for_the_old_partner(batching):
+    async def scenario():
+        client, partner = await _matched(batching)
+        await _send(client, _candidate(0))
+        await _send(client, {"type": "NEXT"})
+        await asyncio.sleep(WINDOW_MS / 1000 * 3)
+
+        assert partner.types() == ["MATCH_ENDED"]
+        assert client.ice_pending == [] and client.ice_flush is None
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_discards_pending_candidates(batching):
+    async def scenario():
+        client, partner = await _matched(batching)
+        await _send(client, _candidate(0))
+        await _send(client, _candidate(1))
+
+        # Route'un finally bloğu: socket kapandı
+        client.discard_ice_candidates()
+        await asyncio.sleep(WINDOW_MS / 1000 * 3)
+
+        assert partner.sent == []
+        assert client.ice_pending == [] and client.ice_flush is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+"""MatchIndex: kova hiyerarşisi, iki yönlü filtreler ve temizlik"""
+from uuid import uuid4
+
+from app.services.match_index import MAX_SKIP_PER_BUCKET, MatchIndex
+from app.services.matchmaking import QueuedUser
+
+
+def _user(joined_at, **kwargs) -> QueuedUser:
+    return QueuedUser(session_id=uuid4(), session_token="token", joined_at=joined_at, **kwargs)
+
+
+def test_filters_are_two_way():
+    index = MatchIndex()
+    wants_female = _user(1, gender="MALE", preferred_gender="FEMALE")
+    only_tr = _user(2, gender="FEMALE", country="DE", preferred_country="TR")
+    index.add(wants_female)
+    index.add(only_tr)
+
+    assert index.find_match(_user(3, gender="MALE", country="US")) is None
+    assert index.find_match(_user(3, gender="MALE", country="TR")) is only_tr
+    assert index.find_match(_user(3, gender="FEMALE", country="US")) is wants_female
+    assert index.find_match(_user(3, gender="MALE", country="US", preferred_gender="FEMALE")) is None
+    assert index.find_match(_user(3, gender="FEMALE", country="TR", preferred_country="DE")) is only_tr
+
+
+def test_prefers_same_language_then_oldest():
+    index = MatchIndex()
+    older = _user(1, language="en")
+    newer = _user(2, language="tr")
+    index.add(older)
+    index.add(newer)
+
+    assert index.find_match(_user(3, language="tr")) is newer
+    assert index.find_match(_user(3, language="de")) is older
+
+
+def test_remove_cleans_empty_buckets():
+    index = MatchIndex()
+    users = [_user(i, gender="MALE", country=f"C{i}", language="tr") for i in range(10)]
+    for user in users:
+        index.add(user)
+    assert len(index) == 10
+
+    for user in users:
+        assert index.remove(user.session_id) is user
+    assert index.remove(users[0].session_id) is None
+    assert len(index) == 0
+    assert index._demands == {} and index._keys == {}
+
+
+def test_avoid_skips_bounded_number_of_heads():
+    index = MatchIndex()
+    avoided = [_user(i) for i in range(MAX_SKIP_PER_BUCKET)]
+    fresh = _user(MAX_SKIP_PER_BUCKET)
+    for user in avoided + [fresh]:
+        index.add(user)
+    skip = {user.session_id for user in avoided}
+
+    assert index.find_match(_user(99), avoid=lambda a, b: b in skip) is None
+    skip.pop()
+    assert index.find_match(_user(99), avoid=lambda a, b: b in skip) is not None
@@ -0,0 +1,114 @@
+"""Toplu eşleştirme turları: greedy eşleştirme kalitesi ve eşitlik durumları"""
+import random
+from types import SimpleNamespace
+from uuid import uuid4
+
+import numpy as np
+import pytest
+
+from app.services import matching_rounds
+from app.services.matching_rounds import greedy_max_weight_matching, plan_round
+from app.services.matchmaking import QueuedUser
+
+NOW = 1000.0
+
+
+@pytest.fixture(autouse=True)
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(matching_rounds, "time", SimpleNamespace(monotonic=lambda: NOW))
+
+
+def _user(waited: float, **kwargs) -> QueuedUser:
+    return QueuedUser(session_id=uuid4(), session_token="token", joined_at=NOW - waited, **kwargs)
+
+
+def _random_scores(rng: random.Random, n: int) -> np.ndarray:
+    scores = np.full((n, n), -np.inf, dtype=np.float32)
+    for i in range(n):
+        for j in range(i + 1, n):
+            if rng.random() < 0.7:
+                scores[i, j] = scores[j, i] = rng.uniform(0, 100)
+    return scores
+
+
+def _weight(scores: np.ndarray, pairs) -> float:
+    return float(sum(scores[i, j] for i, j in pairs))
+
+
+def _optimum(scores: np.ndarray, nodes=None) -> float:
+    """Kaba kuvvet maksimum ağırlıklı eşleştirme (küçük n)"""
+    nodes = list(range(len(scores))) if nodes is None else nodes
+    if len(nodes) < 2:
+        return 0.0
+    first, rest = nodes[0], nodes[1:]
+    best = _optimum(scores, rest)  # first eşlenmeden kalır
+    for k, other in enumerate(rest):
+        if np.isfinite(scores[first, other]):
+            best = max(best, scores[first, other] + _optimum(scores, rest[:k] + rest[k + 1:]))
+    return best
+
+
+def _edge_greedy(scores: np.ndarray):
+    """Kenarları büyükten küçüğe sıralayıp seçen klasik greedy"""
+    edges = sorted(
+        ((scores[i, j], i, j) for i in range(len(scores)) for j in range(i + 1, len(scores)) if np.isfinite(scores[i, j])),
+        reverse=True,
+    )
+    used, pairs = set(), []
+    for _, i, j in edges:
+        if i not in used and j not in used:
+            used.update((i, j))
+            pairs.append((i, j))
+    return pairs
+
+
+def test_matching_equals_edge_greedy_and_is_half_optimal():
+    rng = random.Random(11)
+    for _ in range(60):
+        scores = _random_scores(rng, rng.randrange(2, 9))
+        pairs = greedy_max_weight_matching(scores)
+
+        matched = [node for pair in pairs for node in pair]
+        assert len(matched) == len(set(matched))
+        assert all(np.isfinite(scores[i, j]) for i, j in pairs)
+        assert sorted(pairs) == sorted(_edge_greedy(scores))
+        assert _weight(scores, pairs) >= _optimum(scores) / 2 - 1e-3
+
+
+@pytest.mark.parametrize("n", [2, 5, 6])
+def test_all_equal_scores_terminate_and_pair_everyone(n):
+    scores = np.ones((n, n), dtype=np.float32)
+    np.fill_diagonal(scores, -np.inf)
+    pairs = greedy_max_weight_matching(scores)
+    # Eşitlikte küçük indeksler önce
+    assert pairs == [(i, i + 1) for i in range(0, n - 1, 2)]
+
+
+def test_equal_scores_prefer_the_longest_waiting_candidate():
+    # oldest ile (long, short) iki aday eşit puanlı: short'un fazlası aynı ülke bonusu
+    oldest = _user(100, country="TR")
+    long = _user(50, country="DE")
+    short = _user(50 - matching_rounds.W_REGION, country="TR")
+    scores = matching_rounds.score_pairs([oldest, long, short])
+    assert scores[0, 1] == scores[0, 2]
+
+    for order in ([short, long, oldest], [long, short, oldest], [oldest, short, long]):
+        (initiator, partner), = plan_round(order)
+        assert {initiator.session_id, partner.session_id} == {oldest.session_id, long.session_id}
+        # Yeni gelen (daha az bekleyen) offer oluşturur
+        assert initiator is long
+
+
+def test_round_respects_filters_and_avoids_recent_partners():
+    seeker = _user(30, gender="MALE", preferred_gender="FEMALE")
+    male = _user(40, gender="MALE")
+    female = _user(10, gender="FEMALE")
+    assert {frozenset((a.session_id, b.session_id)) for a, b in plan_round([seeker, male, female])} == {
+        frozenset((seeker.session_id, female.session_id)),
+    }
+
+    a, b, c, d = (_user(waited) for waited in (40, 30, 20, 10))
+    recent = {a.session_id: [b.session_id], b.session_id: [a.session_id]}
+    pairs = plan_round([a, b, c, d], lambda session_id: recent.get(session_id, ()))
+    paired = {frozenset((x.session_id, y.session_id)) for x, y in pairs}
+    assert len(paired) == 2 and frozenset((a.session_id, b.session_id)) not in paired
@@ -0,0 +1,202 @@
+"""Matchmaker IPC: çerçeve formatı, istek/yanıt eşleşmesi, EVENT yönlendirme ve bağlantı kopması"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.services import matchmaker_ipc
+from app.services.matchmaker_ipc import (
+    EVENT, REQUEST, RESPONSE, IpcMatchmakingService, MatchmakerServer, encode_frame, read_frame,
+)
+from app.services.matchmaking import MatchmakingService, QueuedUser
+from app.services.signaling_codec import Frame
+
+
+class FakeSocket:
+    """Worker tarafındaki WebSocket yerine: gelen (mesaj, kritik mi) çiftleri"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send_frame(self, frame: Frame, critical: bool = True) -> None:
+        self.sent.append((frame.message, critical))
+
+
+def _user(session_id, **kwargs) -> QueuedUser:
+    return QueuedUser(session_id=session_id, session_token="token", **kwargs)
+
+
+async def _until(condition, timeout: float = 3.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "mm.sock")
+
+
+def _run(path, scenario):
+    """Sunucu + worker'lar aynı event loop'ta; scenario(service, server, worker_factory)"""
+    async def main():
+        service = MatchmakingService()
+        server = MatchmakerServer(service, path)
+        await server.start()
+        workers = []
+
+        async def worker() -> IpcMatchmakingService:
+            ipc = IpcMatchmakingService(path, stats_interval=60)
+            await ipc.start()
+            workers.append(ipc)
+            return ipc
+
+        try:
+            await scenario(service, server, worker)
+        finally:
+            for ipc in workers:
+                await ipc.stop()
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def test_frame_round_trip():
+    async def scenario():
+        reader = asyncio.StreamReader()
+        body = {"m": "join", "a": [{"language": "tr", "priority": 0}]}
+        reader.feed_data(encode_frame(REQUEST, 7, body) + encode_frame(EVENT, 0, {"s": "x", "m": {}}))
+        assert await read_frame(reader) == (REQUEST, 7, body)
+        assert await read_frame(reader) == (EVENT, 0, {"s": "x", "m": {}})
+
+        reader.feed_data(matchmaker_ipc._HEADER.pack(matchmaker_ipc.MAX_FRAME_SIZE + 1, RESPONSE, 1))
+        with pytest.raises(ValueError):
+            await read_frame(reader)
+
+        reader.feed_eof()
+        with pytest.raises(asyncio.IncompleteReadError):
+            await read_frame(reader)
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_requests_get_their_own_responses(path):
+    async def scenario(service, server, worker):
+        ipc = await worker()
+        sessions = [uuid4() for _ in range(20)]
+        for index, session_id in enumerate(sessions):
+            await ipc.register_websocket(session_id, FakeSocket())
+            # Birbirine uymayan filtreler: hepsi kuyrukta kalır
+            assert await ipc.join_queue(_user(session_id, preferred_country=f"Z{index}")) is None
+
+        # Yanıtlar istek sırasından bağımsız gelse de her çağrı kendi sonucunu alır
+        calls = [ipc.get_queue_position(session_id) for session_id in reversed(sessions)]
+        calls.append(ipc._call("no-such-method"))
+        *positions, failure = await asyncio.gather(*calls, return_exceptions=True)
+
+        assert positions == list(range(len(sessions), 0, -1))
+        assert isinstance(failure, RuntimeError) and "Unknown method" in str(failure)
+        assert ipc._pending == {}
+
+    _run(path, scenario)
+
+
+def test_events_are_routed_to_the_owning_worker(path):
+    async def scenario(service, server, worker):
+        first, second = await worker(), await worker()
+        a, b = uuid4(), uuid4()
+        socket_a, socket_b = FakeSocket(), FakeSocket()
+        await first.register_websocket(a, socket_a)
+        await second.register_websocket(b, socket_b)
+
+        assert await first.join_queue(_user(a)) is None
+        connection_id, partner_id, _ = await second.join_queue(_user(b))
+        assert partner_id == a
+
+        # Başka worker'daki session'a matchmaker üzerinden
+        assert await second.deliver(a, {"type": "SDP_OFFER", "sdp": "v=0"})
+        # Matchmaker sürecinden (background loop'lar), atılabilir olarak
+        await service.get_websocket(b).send_frame(Frame({"type": "QUEUE_POSITION"}), critical=False)
+
+        await _until(lambda: socket_a.sent and socket_b.sent)
+        assert socket_a.sent == [({"type": "SDP_OFFER", "sdp": "v=0"}, True)]
+        assert socket_b.sent == [({"type": "QUEUE_POSITION"}, False)]
+        assert (await first.get_connection(a)).connection_id == connection_id
+
+    _run(path, scenario)
+
+
+def test_worker_disconnect_cleans_up_its_sessions(path):
+    async def scenario(service, server, worker):
+        first, second = await worker(), await worker()
+        a, b = uuid4(), uuid4()
+        socket_b = FakeSocket()
+        await first.register_websocket(a, FakeSocket())
+        await second.register_websocket(b, socket_b)
+        await first.join_queue(_user(a))
+        await second.join_queue(_user(b))
+
+        await first.stop()
+
+        await _until(lambda: socket_b.sent)
+        assert socket_b.sent == [({"type": "MATCH_ENDED", "reason": "DISCONNECTED"}, True)]
+        assert service.get_websocket(a) is None
+        assert await second.get_partner_session_id(b) is None
+        assert service.active_connections_count == 0
+
+    _run(path, scenario)
+
+
+def test_worker_re_registers_after_matchmaker_restart(path, monkeypatch):
+    monkeypatch.setattr(matchmaker_ipc, "RECONNECT_SECONDS", 0.05)
+
+    async def scenario(service, server, worker):
+        ipc = await worker()
+        session_id, socket = uuid4(), FakeSocket()
+        await ipc.register_websocket(session_id, socket)
+
+        # Matchmaker yeniden başlıyor: eski bağlantı kopar, yeni süreç boş başlar
+        ipc._writer.close()
+        await server.stop()
+        restarted = MatchmakingService()
+        new_server = MatchmakerServer(restarted, path)
+        await new_server.start()
+        try:
+            await _until(lambda: restarted.get_websocket(session_id) is not None)
+            assert await restarted.deliver(session_id, {"type": "PONG"})
+            await _until(lambda: socket.sent)
+            assert socket.sent == [({"type": "PONG"}, True)]
+            assert await ipc.get_partner_session_id(session_id) is None
+        finally:
+            await new_server.stop()
+
+    _run(path, scenario)
+
+
+def test_stalled_worker_drops_optional_events_then_is_disconnected(path, monkeypatch):
+    monkeypatch.setattr(matchmaker_ipc, "WORKER_BUFFER_LIMIT", 64 * 1024)
+    monkeypatch.setattr(matchmaker_ipc, "WORKER_DRAIN_TIMEOUT", 0.1)
+
+    async def scenario(service, server, worker):
+        # Kaydolup hiç okumayan worker
+        reader, writer = await asyncio.open_unix_connection(path)
+        session_id = uuid4()
+        writer.write(encode_frame(REQUEST, 1, {"m": "register", "a": [str(session_id)]}))
+        await writer.drain()
+        assert await read_frame(reader) == (RESPONSE, 1, {"r": True})
+        ws = service.get_websocket(session_id)
+
+        # Kernel tamponu dolana kadar atılabilir mesajlar: hiçbiri beklemez
+        filler = Frame({"type": "QUEUE_POSITION", "pad": "x" * 16384})
+        for _ in range(200):
+            await asyncio.wait_for(ws.send_frame(filler, critical=False), 0.05)
+
+        # Kritik mesaj sığmıyor: bağlantı kapanır, session temizlenir
+        with pytest.raises(ConnectionError):
+            await ws.send_frame(Frame({"type": "MATCH_FOUND"}))
+        await _until(lambda: service.get_websocket(session_id) is None)
+        assert await service.deliver(session_id, {"type": "PONG"}) is False
+        writer.close()
+
+    _run(path, scenario)
@@ -0,0 +1,203 @@
+"""MatchmakingService: eşleşme, RECONNECT, öncelik şeritleri ve eşzamanlılık"""
+import asyncio
+import random
+from uuid import uuid4
+
+from app.services.matchmaking import MatchmakingService, QueuedUser
+
+
+class SlowLock(asyncio.Lock):
+    """Almadan önce event loop'a birkaç kez dönen lock (yarışları görünür kılar)"""
+
+    async def __aenter__(self):
+        for _ in range(3):
+            await asyncio.sleep(0)
+        return await super().__aenter__()
+
+
+def _user(session_id, **kwargs) -> QueuedUser:
+    return QueuedUser(session_id=session_id, session_token="token", **kwargs)
+
+
+async def _register(service: MatchmakingService, *session_ids) -> None:
+    for session_id in session_ids:
+        await service.register_websocket(session_id, object())
+
+
+def _assert_consistent(service: MatchmakingService) -> None:
+    """Her session en fazla bir bağlantıda, harita ve bağlantılar birbirini tutuyor"""
+    owners = {}
+    for connection in service._connections.values():
+        for session_id in (connection.session_a_id, connection.session_b_id):
+            assert session_id not in owners, f"{session_id} is in two connections"
+            owners[session_id] = connection
+            assert service._session_connections.get(session_id) is connection
+    assert len(service._session_connections) == len(owners)
+    assert service.active_connections_count == len(service._connections)
+
+
+def test_join_matches_waiting_user():
+    async def scenario():
+        service = MatchmakingService()
+        a, b = uuid4(), uuid4()
+        await _register(service, a, b)
+
+        assert await service.join_queue(_user(a)) is None
+        connection_id, partner_id, is_initiator = await service.join_queue(_user(b))
+
+        assert partner_id == a and is_initiator
+        assert (await service.get_connection(a)).connection_id == connection_id
+        assert await service.get_partner_session_id(b) == a
+        assert service.queue_size == 0
+        _assert_consistent(service)
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_to_previous_partner():
+    async def scenario():
+        service = MatchmakingService()
+        a, b = uuid4(), uuid4()
+        await _register(service, a, b)
+        await service.join_queue(_user(a))
+        await service.join_queue(_user(b))
+        assert await service.end_connection(a) == b
+
+        result = await service.reconnect(b)
+
+        assert result is not None and result[1] == a
+        assert await service.get_partner_session_id(a) == b
+        # Zaten bağlı: ikinci RECONNECT yeni bağlantı açmaz
+        assert await service.reconnect(b) is None
+        assert await service.reconnect(a) is None
+        _assert_consistent(service)
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_needs_both_sides_to_be_each_others_last_partner():
+    async def scenario():
+        service = MatchmakingService()
+        a, b, c = uuid4(), uuid4(), uuid4()
+        await _register(service, a, b, c)
+        await service.join_queue(_user(a))
+        await service.join_queue(_user(b))
+        # a NEXT'ledi ve başka biriyle eşleşip ayrıldı
+        assert await service.end_connection(a) == b
+        await service.join_queue(_user(b, preferred_country="ZZ"))
+        await service.join_queue(_user(a))
+        await service.join_queue(_user(c))
+        assert await service.end_connection(c) == a
+
+        # b'nin son partneri hâlâ a ama a'nınki c: b a'yı geri çekemez
+        assert await service.reconnect(b) is None
+        result = await service.reconnect(c)
+        assert result is not None and result[1] == a
+        assert await service.get_queue_position(b) == 1
+        _assert_consistent(service)
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_rechecks_both_filters():
+    async def scenario():
+        service = MatchmakingService()
+        a, b = uuid4(), uuid4()
+        await _register(service, a, b)
+        await service.join_queue(_user(a, gender="MALE"))
+        await service.join_queue(_user(b, gender="FEMALE"))
+        assert await service.end_connection(a) == b
+
+        # b filtresini değiştirdi: a'nın RECONNECT'i b'yi kuyruktan çekemez
+        assert await service.join_queue(_user(b, gender="FEMALE", preferred_gender="FEMALE")) is None
+        assert await service.reconnect(a) is None
+        assert await service.get_queue_position(b) == 1
+
+        await service.leave_queue(b)
+        assert await service.join_queue(_user(b, gender="FEMALE", preferred_gender="MALE")) is None
+        result = await service.reconnect(a)
+        assert result is not None and result[1] == b
+        _assert_consistent(service)
+
+        await service.cleanup_session(a)
+        assert a not in service._requests
+
+    asyncio.run(scenario())
+
+
+def test_join_and_reconnect_race_leaves_one_connection():
+    """
+    U kuyruktaki M ile eşleşirken eski partneri P aynı anda RECONNECT
+    gönderiyor: U tek bir bağlantıda kalmalı, sahipsiz bağlantı oluşmamalı.
+    """
+    async def scenario():
+        service = MatchmakingService(lock_factory=SlowLock)
+        u, m, p = uuid4(), uuid4(), uuid4()
+        await _register(service, u, m, p)
+
+        await service.join_queue(_user(p))
+        await service.join_queue(_user(u))
+        assert await service.end_connection(u) == p
+        await service.join_queue(_user(m))
+
+        joined, reconnected = await asyncio.gather(service.join_queue(_user(u)), service.reconnect(p))
+
+        assert (joined is None) != (reconnected is None)
+        assert service.active_connections_count == 1
+        _assert_consistent(service)
+        if joined is not None:
+            assert await service.get_partner_session_id(u) == m
+        else:
+            assert await service.get_partner_session_id(u) == p
+            # M eşleşmedi, kuyrukta kalır
+            assert await service.get_queue_position(m) == 1
+
+    asyncio.run(scenario())
+
+
+def test_priority_overtakes_a_normal_user_by_at_most_the_boost():
+    async def scenario():
+        service = MatchmakingService(priority_boost=15)
+        # Aynı kovada bekleyenler (birbirine uymaz), sonra onları kabul eden gelenler
+        normal = _user(uuid4(), preferred_country="ZZ", joined_at=0.0)
+        early, late, too_late = (
+            _user(uuid4(), preferred_country="ZZ", joined_at=t, priority=True) for t in (5.0, 14.0, 16.0)
+        )
+        for user in (normal, early, late, too_late):
+            assert await service.join_queue(user) is None
+
+        order = []
+        for _ in range(4):
+            _, partner_id, _ = await service.join_queue(_user(uuid4(), country="ZZ", joined_at=20.0))
+            order.append(partner_id)
+
+        assert order == [early.session_id, late.session_id, normal.session_id, too_late.session_id]
+        stats = service.stats()
+        assert stats.total_overtakes == 2 and stats.max_overtake_sec == 14.0
+
+    asyncio.run(scenario())
+
+
+def test_priority_overtake_bound_holds_under_random_arrivals():
+    async def scenario():
+        boost = 15.0
+        service = MatchmakingService(priority_boost=boost)
+        rng = random.Random(5)
+        waiting = {}
+        now = 0.0
+        for _ in range(2000):
+            now += rng.uniform(0, 4)
+            if waiting and rng.random() < 0.5:
+                _, partner_id, _ = await service.join_queue(_user(uuid4(), country="ZZ", joined_at=now))
+                matched = waiting.pop(partner_id)
+                # Eşleşenden önce gelmiş, hâlâ bekleyen normal kullanıcılar
+                passed = [u for u in waiting.values() if not u.priority and u.joined_at < matched.joined_at]
+                assert not passed or matched.priority
+                assert all(matched.joined_at - u.joined_at <= boost for u in passed)
+            else:
+                user = _user(uuid4(), preferred_country="ZZ", joined_at=now, priority=rng.random() < 0.3)
+                assert await service.join_queue(user) is None
+                waiting[user.session_id] = user
+        assert 0 < service.stats().max_overtake_sec <= boost
+
+    asyncio.run(scenario())
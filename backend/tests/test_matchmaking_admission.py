@@ -0,0 +1,85 @@
+"""MatchmakingService admission control: dolu kuyruk/kova, sayaçlar ve snapshot'tan dönenler"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+from app.services.matchmaking import MatchmakingService, QueueFullError, QueuedUser
+from app.services.signaling_codec import Frame
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_frame(self, frame: Frame, critical: bool = True) -> None:
+        self.sent.append(frame.message)
+
+
+def _user(**kwargs) -> QueuedUser:
+    return QueuedUser(session_id=uuid4(), session_token="token", **kwargs)
+
+
+def test_full_queue_rejects_unless_the_join_matches():
+    async def scenario():
+        service = MatchmakingService(max_queue_size=2, busy_retry_after=5)
+        # Birbirine uymayan iki bekleyen
+        waiting = _user(preferred_country="ZZ")
+        await service.join_queue(waiting)
+        await service.join_queue(_user(preferred_country="YY"))
+
+        with pytest.raises(QueueFullError) as rejected:
+            await service.join_queue(_user(preferred_country="XX"))
+        assert rejected.value.scope == "global"
+        assert 5 <= rejected.value.retry_after <= 10
+
+        # Hemen eşleşen JOIN kuyruğa girmediği için reddedilmez
+        result = await service.join_queue(_user(country="ZZ"))
+        assert result is not None and result[1] == waiting.session_id
+
+        stats = service.stats()
+        assert (stats.rejected_global, stats.rejected_bucket) == (1, 0)
+        assert stats.in_queue == 1 and stats.total_joins == 3
+
+    asyncio.run(scenario())
+
+
+def test_full_bucket_rejects_only_that_bucket():
+    async def scenario():
+        service = MatchmakingService(max_bucket_size=1)
+        await service.join_queue(_user(preferred_country="ZZ"))
+
+        for _ in range(2):
+            with pytest.raises(QueueFullError) as rejected:
+                await service.join_queue(_user(preferred_country="ZZ"))
+            assert rejected.value.scope == "bucket"
+        assert await service.join_queue(_user(preferred_country="YY")) is None
+
+        stats = service.stats()
+        assert (stats.rejected_global, stats.rejected_bucket) == (0, 2)
+        assert stats.in_queue == 2
+
+    asyncio.run(scenario())
+
+
+def test_restored_session_gets_queue_busy_when_the_queue_filled_up():
+    async def scenario():
+        service = MatchmakingService(max_queue_size=1)
+        late, early = _user(preferred_country="ZZ"), _user(preferred_country="YY")
+        service.restore_state([late, early], [])
+
+        # İlk dönen kuyruğa girer, ikincisi için yer kalmadı
+        early_socket, late_socket = RecordingSocket(), RecordingSocket()
+        await service.register_websocket(early.session_id, early_socket)
+        await service.register_websocket(late.session_id, late_socket)
+
+        assert early_socket.sent == []
+        assert await service.get_queue_position(early.session_id) == 1
+        (busy,) = late_socket.sent
+        assert busy["type"] == "QUEUE_BUSY" and busy["scope"] == "global" and busy["retry_after_sec"] >= 1
+        assert await service.get_queue_position(late.session_id) is None
+        assert service.stats().rejected_global == 1
+        # Reddedilen kayıt tekrar denenmez, grace süresinde de düşürülecek bir şey kalmaz
+        assert late.session_id not in service._restored
+
+    asyncio.run(scenario())
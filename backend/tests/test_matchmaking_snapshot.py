@@ -0,0 +1,64 @@
+"""matchmaking_snapshot: ikili biçim ve dosya yazımı"""
+import os
+import stat
+import time
+from uuid import uuid4
+
+import pytest
+
+from app.services import matchmaking_snapshot
+from app.services.matchmaking import ActiveConnection, QueuedUser
+
+
+def _queued():
+    now = time.monotonic()
+    return [
+        QueuedUser(session_id=uuid4(), session_token="secret-a", gender="MALE", country="TR",
+                   language="tr", joined_at=now - 30, priority=True),
+        QueuedUser(session_id=uuid4(), session_token="secret-b", gender="FEMALE", preferred_gender="MALE",
+                   preferred_country="TR", language="tr", joined_at=now - 5),
+        QueuedUser(session_id=uuid4(), session_token="secret-c", joined_at=now),
+    ]
+
+
+def test_round_trip_without_tokens():
+    queued = _queued()
+    connections = [ActiveConnection(uuid4(), uuid4(), uuid4(), started_at=time.time() - 60)]
+
+    data = matchmaking_snapshot.encode(queued, connections)
+    snapshot = matchmaking_snapshot.decode(data)
+
+    assert b"secret" not in data
+    assert [u.session_id for u in snapshot.queued] == [u.session_id for u in queued]
+    for original, restored in zip(queued, snapshot.queued):
+        assert restored.session_token == ""
+        assert (restored.gender, restored.preferred_gender, restored.country,
+                restored.preferred_country, restored.language, restored.priority) == (
+            original.gender, original.preferred_gender, original.country,
+            original.preferred_country, original.language, original.priority)
+        assert restored.joined_at == pytest.approx(original.joined_at, abs=0.01)
+    assert snapshot.connections == connections
+
+
+def test_decode_rejects_corrupt_data():
+    data = matchmaking_snapshot.encode(_queued(), [])
+    with pytest.raises(ValueError):
+        matchmaking_snapshot.decode(data[:-3])
+    with pytest.raises(ValueError):
+        matchmaking_snapshot.decode(b"XXXX" + data[4:])
+
+
+def test_save_is_owner_only_and_load_removes_file(tmp_path):
+    path = str(tmp_path / "state" / "matchmaking.snapshot")
+    os.makedirs(os.path.dirname(path))
+    with open(f"{path}.tmp", "w") as f:
+        f.write("stale")
+    os.chmod(f"{path}.tmp", 0o644)
+
+    matchmaking_snapshot.save(path, _queued(), [])
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    snapshot = matchmaking_snapshot.load(path)
+    assert len(snapshot.queued) == 3
+    assert not os.path.exists(path)
+    assert matchmaking_snapshot.load(path) is None
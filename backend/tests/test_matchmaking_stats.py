@@ -0,0 +1,115 @@
+"""MatchmakingCounters: join/eşleşme/ayrılma/temizlikte sayaçlar ve snapshot'tan dönen session'lar"""
+import asyncio
+from uuid import uuid4
+
+from app.services.matchmaking import ActiveConnection, MatchmakingService, QueuedUser
+from app.services.timing_wheel import TimingWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _user(session_id, **kwargs) -> QueuedUser:
+    return QueuedUser(session_id=session_id, session_token="token", **kwargs)
+
+
+def _counts(service: MatchmakingService) -> tuple:
+    stats = service.stats()
+    return stats.online_users, stats.in_queue, stats.active_connections, stats.connected_sockets
+
+
+def _assert_matches_state(service: MatchmakingService) -> None:
+    """Artımlı sayaçlar yapıların kendisiyle tutarlı"""
+    online, in_queue, active, sockets = _counts(service)
+    assert in_queue == len(service._queue)
+    assert active == len(service._connections)
+    assert sockets == len(service._session_websockets)
+    assert online == in_queue + 2 * active == service.online_count
+
+
+def test_counters_follow_join_match_leave_and_cleanup():
+    async def scenario():
+        service = MatchmakingService()
+        a, b, c = uuid4(), uuid4(), uuid4()
+        for session_id in (a, b, c):
+            await service.register_websocket(session_id, object())
+        # Aynı socket'in tekrar kaydı sayılmaz
+        await service.register_websocket(a, object())
+        assert _counts(service) == (0, 0, 0, 3)
+
+        await service.join_queue(_user(a))
+        assert _counts(service) == (1, 1, 0, 3)
+        await service.join_queue(_user(b))
+        assert _counts(service) == (2, 0, 1, 3)
+        await service.join_queue(_user(c))
+        assert _counts(service) == (3, 1, 1, 3)
+        _assert_matches_state(service)
+
+        assert await service.leave_queue(c)
+        assert not await service.leave_queue(c)
+        assert _counts(service) == (2, 0, 1, 3)
+
+        assert await service.end_connection(a) == b
+        assert _counts(service) == (0, 0, 0, 3)
+
+        await service.join_queue(_user(c))
+        for session_id in (a, b, c):
+            await service.cleanup_session(session_id)
+        assert _counts(service) == (0, 0, 0, 0)
+        _assert_matches_state(service)
+
+        stats = service.stats()
+        assert (stats.total_joins, stats.total_matches, stats.total_ended, stats.total_disconnects) == (4, 1, 1, 3)
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_mid_match_updates_both_sides():
+    async def scenario():
+        service = MatchmakingService()
+        a, b = uuid4(), uuid4()
+        for session_id in (a, b):
+            await service.register_websocket(session_id, object())
+        await service.join_queue(_user(a))
+        await service.join_queue(_user(b))
+
+        assert await service.cleanup_session(a) == b
+        assert _counts(service) == (0, 0, 0, 1)
+        assert await service.cleanup_session(b) is None
+        assert _counts(service) == (0, 0, 0, 0)
+        assert service.stats().total_ended == 1
+
+    asyncio.run(scenario())
+
+
+def test_restored_sessions_are_counted_when_their_sockets_return():
+    async def scenario():
+        clock = FakeClock()
+        service = MatchmakingService(restore_grace=30)
+        service._restore_grace = TimingWheel(clock=clock)
+        queued, x, y = uuid4(), uuid4(), uuid4()
+        service.restore_state([_user(queued, preferred_country="ZZ")], [ActiveConnection(uuid4(), x, y)])
+
+        # Bağlantı hemen yerinde, kuyruk kaydı socket dönene kadar beklemede
+        assert _counts(service) == (2, 0, 1, 0)
+        await service.register_websocket(queued, object())
+        await service.register_websocket(x, object())
+        assert _counts(service) == (3, 1, 1, 2)
+        _assert_matches_state(service)
+
+        # y grace içinde dönmedi: bağlantısı biter, x'e MATCH_ENDED gidecek
+        clock.now = 31
+        assert await service.expire_restored() == [x]
+        assert _counts(service) == (1, 1, 0, 2)
+
+        for session_id in (queued, x):
+            await service.cleanup_session(session_id)
+        assert _counts(service) == (0, 0, 0, 0)
+        _assert_matches_state(service)
+
+    asyncio.run(scenario())
@@ -0,0 +1,118 @@
+"""OutboundSocket: yavaş istemci politikaları ve sayaçlar"""
+import asyncio
+
+import pytest
+
+from app.services.outbound import (
+    DISCONNECT, DROP_OLDEST, SLOW_CONSUMER_CLOSE_CODE, OutboundSocket, outbound_stats,
+)
+from app.services.signaling_codec import Frame
+
+
+class BlockingWebSocket:
+    """release() çağrılana kadar send_frame'de bekleyen socket (takılan mobil istemci)"""
+
+    def __init__(self):
+        self.sent = []
+        self.close_code = None
+        self._gate = asyncio.Event()
+
+    def release(self) -> None:
+        self._gate.set()
+
+    async def send_frame(self, frame: Frame) -> None:
+        await self._gate.wait()
+        self.sent.append(frame.message["n"])
+
+    async def close(self, code: int = 1000, reason: str = "") -> None:
+        self.close_code = code
+
+
+def _frame(n: int) -> Frame:
+    return Frame({"type": "TEST", "n": n})
+
+
+def _delta(before: dict) -> dict:
+    after = outbound_stats()
+    return {name: after[name] - before[name] for name in ("sockets", "queued", "sent", "dropped", "disconnected")}
+
+
+async def _stalled(policy: str, max_size: int = 2):
+    """İlk mesajı gönderirken takılmış socket: kuyruk boş, writer meşgul"""
+    ws = BlockingWebSocket()
+    outbound = OutboundSocket(ws, max_size=max_size, policy=policy)
+    await outbound.send_frame(_frame(0))
+    await asyncio.sleep(0)
+    assert outbound.depth == 0
+    return ws, outbound
+
+
+def test_drop_oldest_evicts_non_critical_frames_first():
+    async def scenario():
+        before = outbound_stats()
+        ws, outbound = await _stalled(DROP_OLDEST)
+        await outbound.send_frame(_frame(1), critical=False)
+        await outbound.send_frame(_frame(2))
+        # Dolu: en eski kritik olmayan (1) atılır
+        await outbound.send_frame(_frame(3))
+        # Atılacak kritik olmayan kalmadı: yeni kritik olmayan mesaj atılır
+        await outbound.send_frame(_frame(4), critical=False)
+        assert outbound.depth == 2
+
+        ws.release()
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert ws.sent == [0, 2, 3]
+        assert ws.close_code is None and not outbound.closed
+        assert _delta(before) == {"sockets": 1, "queued": 0, "sent": 3, "dropped": 2, "disconnected": 0}
+
+        outbound.close()
+        assert _delta(before)["sockets"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_critical_overflow_disconnects_with_1013():
+    async def scenario():
+        before = outbound_stats()
+        ws, outbound = await _stalled(DROP_OLDEST)
+        await outbound.send_frame(_frame(1))
+        await outbound.send_frame(_frame(2))
+
+        with pytest.raises(ConnectionError):
+            await outbound.send_frame(_frame(3))
+        await asyncio.sleep(0)
+
+        assert outbound.closed and ws.close_code == SLOW_CONSUMER_CLOSE_CODE
+        with pytest.raises(ConnectionError):
+            await outbound.send_frame(_frame(4), critical=False)
+        ws.release()
+        await asyncio.sleep(0)
+        assert ws.sent == []
+        assert _delta(before) == {"sockets": 0, "queued": 0, "sent": 0, "dropped": 0, "disconnected": 1}
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_drops_the_client_on_any_overflow():
+    async def scenario():
+        before = outbound_stats()
+        ws, outbound = await _stalled(DISCONNECT, max_size=1)
+        await outbound.send_frame(_frame(1), critical=False)
+
+        # Kritik olmayan mesaj bile sığmazsa istemci koparılır (hata fırlatılmaz)
+        await outbound.send_frame(_frame(2), critical=False)
+        await asyncio.sleep(0)
+
+        assert outbound.closed and ws.close_code == SLOW_CONSUMER_CLOSE_CODE
+        assert _delta(before) == {"sockets": 0, "queued": 0, "sent": 0, "dropped": 0, "disconnected": 1}
+
+    asyncio.run(scenario())
+
+
+def test_unknown_policy_is_rejected():
+    async def scenario():
+        with pytest.raises(ValueError):
+            OutboundSocket(BlockingWebSocket(), policy="block")
+
+    asyncio.run(scenario())
@@ -0,0 +1,45 @@
+"""QueuePositionTracker: Fenwick tree sıraları, kirli kuyruk sonu ve sıkıştırma"""
+import random
+from uuid import uuid4
+
+from app.services.queue_position import FenwickTree, QueuePositionTracker
+
+
+def test_fenwick_from_ones_matches_incremental():
+    built = FenwickTree.from_ones(16, 11)
+    incremental = FenwickTree(16)
+    for index in range(1, 12):
+        incremental.add(index, 1)
+    assert [built.prefix_sum(i) for i in range(17)] == [incremental.prefix_sum(i) for i in range(17)]
+
+
+def test_positions_follow_removals_and_compaction():
+    # Küçük kapasite: bilet alanı birkaç kez dolar ve sıkıştırılır
+    tracker = QueuePositionTracker(initial_capacity=4)
+    expected = []
+    rng = random.Random(7)
+    for _ in range(300):
+        if expected and rng.random() < 0.4:
+            tracker.remove(expected.pop(rng.randrange(len(expected))))
+        else:
+            session_id = uuid4()
+            tracker.add(session_id)
+            expected.append(session_id)
+        for position, session_id in enumerate(expected, start=1):
+            assert tracker.position(session_id) == position
+    assert len(tracker) == len(expected)
+
+
+def test_drain_updates_only_reports_the_tail():
+    tracker = QueuePositionTracker()
+    sessions = [uuid4() for _ in range(6)]
+    for session_id in sessions:
+        tracker.add(session_id)
+    assert tracker.drain_updates() == []
+
+    tracker.remove(sessions[3])
+    tracker.remove(sessions[1])
+    assert tracker.drain_updates() == [(sessions[2], 2), (sessions[4], 3), (sessions[5], 4)]
+    assert tracker.drain_updates() == []
+    assert tracker.position(sessions[1]) is None
+    assert tracker.ahead_of(sessions[5]) == 3
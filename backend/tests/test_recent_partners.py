@@ -0,0 +1,76 @@
+"""RecentPartners: ring buffer penceresi, LRU sınırı ve sönen Bloom filter"""
+from uuid import uuid4
+
+from app.services.matchmaking import MatchmakingService
+from app.services.recent_partners import DecayingBloomFilter, RecentPartners
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_ring_keeps_last_partners_within_window():
+    clock = FakeClock()
+    recent = RecentPartners(per_session=2, window_seconds=60, clock=clock)
+    a, b, c, d = (uuid4() for _ in range(4))
+    recent.record(a, b)
+    clock.now += 10
+    recent.record(a, c)
+    recent.record(a, d)
+
+    assert recent.partners(a) == [c, d]
+    assert recent.partners(b) == [a]
+    assert recent.was_recent(d, a)
+
+    clock.now += 61
+    assert recent.partners(a) == []
+
+
+def test_bloom_remembers_pairs_evicted_from_lru():
+    clock = FakeClock()
+    recent = RecentPartners(per_session=1, max_sessions=2, window_seconds=60, bloom_bits=1 << 12, clock=clock)
+    a, b = uuid4(), uuid4()
+    recent.record(a, b)
+    for _ in range(3):
+        recent.record(uuid4(), uuid4())
+
+    assert len(recent) == 2
+    assert recent.partners(a) == ()
+    # Ring'den düştü ama Bloom hâlâ hatırlıyor (sıradan bağımsız)
+    assert recent.was_recent(a, b) and recent.was_recent(b, a)
+
+    # Bir çift en fazla bir pencere boyunca kalır
+    clock.now += 60
+    assert not recent.was_recent(a, b)
+
+
+def test_bloom_generations_rotate():
+    clock = FakeClock()
+    bloom = DecayingBloomFilter(bits=1 << 12, window_seconds=100, clock=clock)
+    bloom.add(12345)
+    clock.now += 50
+    # İlk dönüş: önceki nesil hâlâ sorgulanır
+    assert 12345 in bloom
+    bloom.add(67890)
+    clock.now += 50
+    assert 12345 not in bloom and 67890 in bloom
+    clock.now += 100
+    assert 67890 not in bloom
+
+
+def test_forget_drops_ring():
+    recent = RecentPartners(clock=FakeClock(), bloom_bits=1 << 12)
+    a, b = uuid4(), uuid4()
+    recent.record(a, b)
+    recent.forget(a)
+    assert recent.partners(a) == () and len(recent) == 1
+
+
+def test_service_keeps_the_configured_instance():
+    # Boş RecentPartners falsy (__len__ == 0); ayarlardan gelen nesne yerine varsayılan kurulmamalı
+    configured = RecentPartners(per_session=1, clock=FakeClock(), bloom_bits=1 << 12)
+    assert MatchmakingService(recent_partners=configured)._recent_partners is configured
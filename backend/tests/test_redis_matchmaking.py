@@ -0,0 +1,277 @@
+"""RedisMatchmakingService: Lua script'leri fakeredis (lupa) üzerinde"""
+import asyncio
+from uuid import uuid4
+
+import pytest
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from fakeredis import aioredis  # noqa: E402
+
+from app.services.matchmaking import QueueFullError, QueuedUser  # noqa: E402
+from app.services import redis_matchmaking  # noqa: E402
+from app.services.redis_matchmaking import RedisMatchmakingService  # noqa: E402
+
+
+class FakeSocket:
+    def __init__(self):
+        self.received = []
+
+    async def send_frame(self, frame, critical=True):
+        self.received.append(frame.message)
+
+
+def _service(server, **kwargs) -> RedisMatchmakingService:
+    return RedisMatchmakingService(aioredis.FakeRedis(server=server, decode_responses=True), **kwargs)
+
+
+def _user(session_id=None, **kwargs) -> QueuedUser:
+    return QueuedUser(session_id=session_id or uuid4(), session_token="token", **kwargs)
+
+
+async def _queue_keys(service: RedisMatchmakingService) -> list:
+    """Kuyruk index'inde kalan anahtarlar (kuyruk boşken hiç olmamalı)"""
+    keys = []
+    for pattern in ("lane:*", "genders:*", "countries:*", "languages:*"):
+        keys += await service._redis.keys(service._prefix + pattern)
+    return keys
+
+
+def test_join_matches_and_cleans_index():
+    async def scenario():
+        service = _service(fakeredis.FakeServer())
+        a, b = _user(gender="MALE", country="TR"), _user(gender="FEMALE", country="TR")
+
+        assert await service.join_queue(a) is None
+        assert await service.get_queue_position(a.session_id) == 1
+        connection_id, partner_id, is_initiator = await service.join_queue(b)
+
+        assert partner_id == a.session_id and is_initiator
+        assert await service.get_partner_session_id(a.session_id) == b.session_id
+        assert (await service.get_connection(b.session_id)).connection_id == connection_id
+        assert await _queue_keys(service) == []
+        stats = await service.refresh_stats()
+        assert (stats.in_queue, stats.active_connections, stats.total_matches) == (0, 1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_filters_are_two_way():
+    async def scenario():
+        service = _service(fakeredis.FakeServer())
+        wants_female = _user(gender="MALE", preferred_gender="FEMALE")
+        await service.join_queue(wants_female)
+
+        # Erkek, kadın isteyen bekleyene uymaz
+        assert await service.join_queue(_user(gender="MALE")) is None
+        # Ülke filtresi: sadece DE
+        assert await service.join_queue(_user(gender="FEMALE", country="TR", preferred_country="DE")) is None
+        result = await service.join_queue(_user(gender="FEMALE", country="US"))
+        assert result is not None and result[1] == wants_female.session_id
+
+    asyncio.run(scenario())
+
+
+def test_prefers_same_language_then_oldest():
+    async def scenario():
+        service = _service(fakeredis.FakeServer())
+        # Bekleyenler birbirine uymaz (hepsi kadın istiyor), gelen kadın hepsine uyar
+        waiting = {"gender": "MALE", "preferred_gender": "FEMALE"}
+        older_en = _user(language="en", **waiting)
+        await service.join_queue(older_en)
+        for index in range(50):
+            await service.join_queue(_user(language=f"x{index}", **waiting))
+        newer_tr = _user(language="tr", **waiting)
+        await service.join_queue(newer_tr)
+
+        result = await service.join_queue(_user(gender="FEMALE", language="tr"))
+        assert result[1] == newer_tr.session_id
+        result = await service.join_queue(_user(gender="FEMALE", language="de"))
+        assert result[1] == older_en.session_id
+
+    asyncio.run(scenario())
+
+
+def test_end_reconnect_and_recent_partner_avoidance():
+    async def scenario():
+        service = _service(fakeredis.FakeServer(), recent_partner_window=600)
+        a, b = uuid4(), uuid4()
+        await service.register_websocket(a, FakeSocket())
+        await service.register_websocket(b, FakeSocket())
+        await service.join_queue(_user(a))
+        await service.join_queue(_user(b))
+
+        assert await service.end_connection(a) == b
+        assert await service.get_connection(a) is None
+
+        # NEXT sonrası ikisi tekrar kuyruğa girerse birbirleriyle eşleşmezler
+        assert await service.join_queue(_user(a)) is None
+        assert await service.join_queue(_user(b)) is None
+        third = _user()
+        result = await service.join_queue(third)
+        assert result is not None and result[1] == a
+
+        # b'nin son partneri a: RECONNECT a'yı mevcut bağlantısı yüzünden bulamaz
+        assert await service.reconnect(b) is None
+        # Bağlantı bitse de a'nın son partneri artık third: b onu geri çekemez
+        assert await service.end_connection(third.session_id) == a
+        assert await service.reconnect(b) is None
+        result = await service.reconnect(third.session_id)
+        assert result is not None and result[1] == a
+        assert await service.get_queue_position(b) == 1
+
+    asyncio.run(scenario())
+
+
+def test_reconnect_rechecks_both_filters():
+    async def scenario():
+        service = _service(fakeredis.FakeServer())
+        a, b = uuid4(), uuid4()
+        await service.register_websocket(a, FakeSocket())
+        await service.register_websocket(b, FakeSocket())
+        await service.join_queue(_user(a, gender="MALE"))
+        await service.join_queue(_user(b, gender="FEMALE"))
+        assert await service.end_connection(a) == b
+
+        # b artık sadece kadınlarla eşleşmek istiyor: a'nın RECONNECT'i b'yi kuyruktan çekemez
+        assert await service.join_queue(_user(b, gender="FEMALE", preferred_gender="FEMALE")) is None
+        assert await service.reconnect(a) is None
+        assert await service.get_queue_position(b) == 1
+
+        await service.leave_queue(b)
+        assert await service.join_queue(_user(b, gender="FEMALE", preferred_gender="MALE")) is None
+        result = await service.reconnect(a)
+        assert result is not None and result[1] == b
+
+        # Temizlenen session'ın filtre kaydı kalmaz
+        await service.cleanup_session(a)
+        assert not await service._redis.hexists(service._prefix + "filters", str(a))
+
+    asyncio.run(scenario())
+
+
+def test_priority_overtake_and_admission_stats():
+    async def scenario():
+        service = _service(fakeredis.FakeServer(), priority_boost=15, max_bucket_size=2)
+        normal = _user(gender="MALE", preferred_gender="FEMALE")
+        await service.join_queue(normal)
+        await asyncio.sleep(0.01)
+        vip = _user(gender="MALE", preferred_gender="FEMALE", priority=True)
+        await service.join_queue(vip)
+        with pytest.raises(QueueFullError) as error:
+            await service.join_queue(_user(gender="MALE", preferred_gender="FEMALE"))
+        assert error.value.scope == "bucket"
+
+        result = await service.join_queue(_user(gender="FEMALE"))
+        assert result[1] == vip.session_id
+        stats = await service.refresh_stats()
+        assert stats.total_overtakes == 1
+        assert 0 < stats.max_overtake_sec <= 15
+        assert stats.rejected_bucket == 1
+
+    asyncio.run(scenario())
+
+
+def test_cross_worker_delivery():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        worker_a, worker_b = _service(server), _service(server)
+        await worker_a.start()
+        await worker_b.start()
+        try:
+            a, b = uuid4(), uuid4()
+            socket_a, socket_b = FakeSocket(), FakeSocket()
+            await worker_a.register_websocket(a, socket_a)
+            await worker_b.register_websocket(b, socket_b)
+
+            await worker_a.join_queue(_user(a))
+            connection_id, partner_id, _ = await worker_b.join_queue(_user(b))
+            assert partner_id == a
+
+            message = {"type": "MATCH_FOUND", "connection_id": str(connection_id), "is_initiator": False}
+            assert await worker_b.deliver(a, message)
+            for _ in range(50):
+                if socket_a.received:
+                    break
+                await asyncio.sleep(0.01)
+            assert socket_a.received == [message]
+            assert socket_b.received == []
+
+            # Kopan session'a diğer worker'dan teslim edilemez
+            assert await worker_a.cleanup_session(a) == b
+            assert not await worker_b.deliver(a, message)
+        finally:
+            await worker_a.stop()
+            await worker_b.stop()
+
+    asyncio.run(scenario())
+
+
+def test_orphaned_queue_entries_expire_from_any_worker():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        crashed = _service(server, queue_timeout=0.05)
+        survivor = _service(server, queue_timeout=0.05)
+        orphan = _user(preferred_country="ZZ")
+        await crashed.join_queue(orphan)
+        # Eşleşenin süre kaydı da silinir
+        a, b = _user(gender="MALE", preferred_gender="FEMALE"), _user(gender="FEMALE")
+        await survivor.join_queue(a)
+        await survivor.join_queue(b)
+
+        assert await survivor.expire_queue() == []
+        await asyncio.sleep(0.06)
+        # Kuyruğa girenin worker'ı çökmüş: diğer worker süresi dolanı çıkarır
+        assert await survivor.expire_queue() == [orphan.session_id]
+        assert await survivor.expire_queue() == []
+        assert await _queue_keys(survivor) == []
+        assert await survivor._redis.zcard(survivor._prefix + "expiry") == 0
+        stats = await survivor.refresh_stats()
+        assert (stats.in_queue, stats.total_expired) == (0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_relay_resubscribes_after_connection_loss(monkeypatch, caplog):
+    monkeypatch.setattr(redis_matchmaking, "RELAY_RETRY_MIN_SECONDS", 0.01)
+
+    async def scenario():
+        server = fakeredis.FakeServer()
+        worker_a, worker_b = _service(server), _service(server)
+        subscriptions = []
+        real_pubsub = worker_a._redis.pubsub
+
+        def flaky_pubsub(**kwargs):
+            pubsub = real_pubsub(**kwargs)
+            if not subscriptions:
+                async def broken_listen():
+                    raise ConnectionError("Connection reset by peer")
+                    yield
+                pubsub.listen = broken_listen
+            subscriptions.append(pubsub)
+            return pubsub
+
+        monkeypatch.setattr(worker_a._redis, "pubsub", flaky_pubsub)
+        await worker_a.start()
+        try:
+            session_id, socket = uuid4(), FakeSocket()
+            await worker_a.register_websocket(session_id, socket)
+            for _ in range(100):
+                if len(subscriptions) == 2:
+                    break
+                await asyncio.sleep(0.01)
+            assert len(subscriptions) == 2
+
+            message = {"type": "MATCH_ENDED", "reason": "NEXTED"}
+            assert await worker_b.deliver(session_id, message)
+            for _ in range(50):
+                if socket.received:
+                    break
+                await asyncio.sleep(0.01)
+            assert socket.received == [message]
+        finally:
+            await worker_a.stop()
+
+    asyncio.run(scenario())
+    assert "connection lost" in caplog.text
@@ -0,0 +1,93 @@
+"""SessionTokenCache: TTL, LRU sınırı ve ban ile geçersiz kılma"""
+import asyncio
+from types import SimpleNamespace
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import app.models  # noqa: F401  (ilişki hedefleri metadata'ya kaydolsun)
+from app import database
+from app.database import Base
+from app.models.user_session import DeviceType, UserSession
+from app.services import ban, session_cache
+from app.services.session_cache import CachedSession, SessionTokenCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _cached(ip_address="10.0.0.1", device_fingerprint=None) -> CachedSession:
+    return CachedSession(uuid4(), "UNSPECIFIED", None, True, ip_address, device_fingerprint)
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(session_cache, "time", SimpleNamespace(monotonic=clock))
+    cache = SessionTokenCache(ttl=30)
+    cached = cache.put("token", _cached())
+
+    clock.now += 29
+    assert cache.get("token") is cached
+    clock.now += 1
+    assert cache.get("token") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = SessionTokenCache(max_size=2)
+    cache.put("a", _cached())
+    cache.put("b", _cached())
+    cache.get("a")
+    cache.put("c", _cached())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_invalidate_matching_by_ip_or_device():
+    cache = SessionTokenCache()
+    cache.put("same-ip", _cached(ip_address="1.1.1.1"))
+    cache.put("same-device", _cached(ip_address="2.2.2.2", device_fingerprint="fp"))
+    cache.put("other", _cached(ip_address="3.3.3.3"))
+
+    assert cache.invalidate_matching() == 0
+    assert cache.invalidate_matching(ip_address="1.1.1.1", device_fingerprint="fp") == 2
+    assert cache.get("other") is not None and len(cache) == 1
+    assert cache.invalidate("other") and not cache.invalidate("other")
+
+
+def test_ban_deactivates_sessions_and_drops_cached_tokens(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[UserSession.__table__])
+    db = sessionmaker(bind=engine)()
+    cache = SessionTokenCache()
+    monkeypatch.setattr(session_cache, "_cache", cache)
+
+    rows = [
+        UserSession(session_token=token, ip_address=ip, device_type=DeviceType.WEB)
+        for token, ip in (("banned", "6.6.6.6"), ("innocent", "7.7.7.7"))
+    ]
+    db.add_all(rows)
+    db.commit()
+    for row in rows:
+        cache.put(row.session_token, CachedSession.from_model(row))
+
+    assert ban.deactivate_banned_sessions(db, ip_address="6.6.6.6") == 1
+    assert cache.get("banned") is None
+    assert cache.get("innocent") is not None
+    db.refresh(rows[0])
+    assert rows[0].is_active is False
+
+    # Kaçan token DB'den yüklenir ve kapalı session olarak görülür
+    monkeypatch.setattr(database, "get_session_local", lambda: sessionmaker(bind=engine))
+    assert asyncio.run(cache.get_or_load("banned")).is_active is False
+    assert asyncio.run(cache.get_or_load("unknown")) is None
+    db.close()
@@ -0,0 +1,85 @@
+"""Signaling codec: istemci mesajı doğrulama, msgpack alt protokolü ve tip kodları"""
+from typing import get_args
+
+import msgpack
+import pytest
+
+from app.routes.websocket import SIGNALING_HANDLERS
+from app.schemas.websocket import ClientMessage, MESSAGE_TYPE_CODES, MESSAGE_TYPE_NAMES
+from app.services.signaling_codec import (
+    Frame, decode_client_message, decode_client_msgpack, dumps, pack, unpack,
+)
+
+
+CLIENT_MESSAGES = [
+    {"type": "JOIN_QUEUE", "preferred_gender": "FEMALE", "preferred_country": "TR", "language": "tr"},
+    {"type": "LEAVE_QUEUE"},
+    {"type": "NEXT"},
+    {"type": "RECONNECT"},
+    {"type": "OFFER", "connection_id": "c1", "sdp": "v=0"},
+    {"type": "ANSWER", "connection_id": "c1", "sdp": "v=0"},
+    {"type": "ICE_CANDIDATE", "connection_id": "c1", "candidate": {"candidate": "a=1", "sdpMLineIndex": 0}},
+    {"type": "CHAT_MESSAGE", "connection_id": "c1", "text": "merhaba"},
+]
+
+
+@pytest.mark.parametrize("message", CLIENT_MESSAGES, ids=lambda message: message["type"])
+def test_each_client_message_type_validates(message):
+    decoded = decode_client_message(dumps(message))
+    assert type(decoded).model_fields["type"].default == message["type"]
+    assert decoded.model_dump(exclude_unset=True) == message
+
+
+@pytest.mark.parametrize("data", [
+    '{"type": "SELF_DESTRUCT"}',  # bilinmeyen tip
+    '{"sdp": "v=0"}',  # tip yok
+    '{"type": "OFFER", "connection_id": "c1"}',  # eksik alan
+    '{"type": "CHAT_MESSAGE", "text": 5}',  # yanlış tür
+    '{"type": "NEXT", "force": true}',  # tanımsız alan
+    '{"type": "JOIN_QUEUE", "priority": true}',
+    '{"type": "OFFER"',  # bozuk JSON
+    '[]',
+])
+def test_invalid_client_messages_raise_value_error(data):
+    with pytest.raises(ValueError):
+        decode_client_message(data)
+
+
+def test_mobile_connection_id_alias_is_not_an_extra_field():
+    message = decode_client_message('{"type": "ANSWER", "connectionId": "c1", "sdp": "v=0"}')
+    assert message.connection_id == "c1"
+
+
+def test_every_client_message_has_a_handler():
+    (union, _discriminator) = get_args(ClientMessage)
+    types = {member.model_fields["type"].default for member in get_args(union)}
+    assert types == set(SIGNALING_HANDLERS)
+    assert types <= set(MESSAGE_TYPE_CODES)
+
+
+def test_type_codes_are_unique_and_invertible():
+    assert len(set(MESSAGE_TYPE_CODES.values())) == len(MESSAGE_TYPE_CODES)
+    assert all(MESSAGE_TYPE_CODES[MESSAGE_TYPE_NAMES[code]] == code for code in MESSAGE_TYPE_NAMES)
+
+
+@pytest.mark.parametrize("message", CLIENT_MESSAGES, ids=lambda message: message["type"])
+def test_client_messages_round_trip_over_msgpack(message):
+    data = pack(message)
+    # Tip kısa tamsayı koduyla taşınır, diğer alanlar aynen
+    assert msgpack.unpackb(data)["type"] == MESSAGE_TYPE_CODES[message["type"]]
+    assert unpack(data) == message
+    assert decode_client_msgpack(data) == decode_client_message(dumps(message))
+
+
+def test_server_frames_carry_type_codes():
+    frame = Frame({"type": "MATCH_FOUND", "connection_id": "c1", "is_initiator": True})
+    assert msgpack.unpackb(frame.binary)["type"] == MESSAGE_TYPE_CODES["MATCH_FOUND"]
+    assert unpack(frame.binary) == frame.message
+    # Kodu olmayan tip isimle gider
+    assert unpack(pack({"type": "PONG"})) == {"type": "PONG"}
+
+
+def test_invalid_msgpack_frames_raise_value_error():
+    for data in (b"\xc1", msgpack.packb({"type": 99}), msgpack.packb([1, 2]), pack({"type": "OFFER"})):
+        with pytest.raises(ValueError):
+            decode_client_msgpack(data)
@@ -0,0 +1,60 @@
+"""TimingWheel: seviyeler arası dağıtım (cascade) ve iptal"""
+import random
+
+from app.services.timing_wheel import TimingWheel
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_on_their_tick_across_levels():
+    clock = FakeClock()
+    # 4 yuva x 3 seviye: 4, 16 ve 64 tick'lik kapsamlar, sonrası en üstte bekler
+    wheel = TimingWheel(tick_seconds=1.0, slots=4, levels=3, clock=clock)
+    delays = {f"k{delay}": delay for delay in (1, 3, 4, 5, 15, 16, 17, 63, 64, 65, 150)}
+    for key, delay in delays.items():
+        wheel.schedule(key, delay)
+
+    expired_at = {}
+    for tick in range(1, 200):
+        clock.now = tick
+        for key in wheel.advance():
+            expired_at[key] = tick
+    assert expired_at == delays
+    assert len(wheel) == 0
+
+
+def test_cascade_matches_brute_force():
+    clock = FakeClock()
+    wheel = TimingWheel(tick_seconds=0.5, slots=8, levels=2, clock=clock)
+    rng = random.Random(3)
+    deadlines = {}
+    for step in range(400):
+        clock.now = step * 0.5
+        for key in wheel.advance():
+            assert deadlines.pop(key) == step
+        if rng.random() < 0.5:
+            key = rng.randrange(50)
+            ticks = rng.randrange(1, 120)
+            wheel.schedule(key, ticks * 0.5)
+            deadlines[key] = step + ticks
+        elif deadlines and rng.random() < 0.3:
+            key = rng.choice(list(deadlines))
+            assert wheel.cancel(key)
+            del deadlines[key]
+        assert len(wheel) == len(deadlines)
+
+
+def test_advance_catches_up_after_a_long_pause():
+    clock = FakeClock()
+    wheel = TimingWheel(slots=4, levels=2, clock=clock)
+    wheel.schedule("a", 2)
+    wheel.schedule("b", 30)
+    assert "b" in wheel
+    assert sorted(wheel.advance(now=40)) == ["a", "b"]
+    assert not wheel.cancel("a")
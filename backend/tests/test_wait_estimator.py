@@ -0,0 +1,111 @@
+"""WaitEstimator: kova hızlarından ETA (sabit saat ile) ve QUEUE_POSITION'daki tahmin"""
+import asyncio
+from uuid import uuid4
+
+from app.routes import websocket
+from app.schemas.websocket import JoinQueueMessage
+from app.services.matchmaking import MatchmakingService, QueuedUser
+from app.services.signaling_codec import Frame
+from app.services.wait_estimator import WaitEstimator
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send_frame(self, frame: Frame, critical: bool = True) -> None:
+        self.sent.append(frame.message)
+
+
+# Yarı ömür 60 sn, tek olay: hız ısınma tabanıyla (çeyrek yarı ömür) 1 / 13.8 olay/sn
+ONE_EVENT_ETA = 14
+
+
+def test_estimate_starts_from_the_arrival_rate():
+    clock = FakeClock()
+    estimator = WaitEstimator(clock=clock)
+    a, b, c = uuid4(), uuid4(), uuid4()
+    assert estimator.estimate(a) is None and estimator.typical_wait() is None
+
+    estimator.add(a, "bucket")
+    assert estimator.estimate(a) == ONE_EVENT_ETA
+
+    # Üç varış: hız üç katı, öndeki her kişi bir aralık ekler
+    estimator.add(b, "bucket")
+    estimator.add(c, "bucket")
+    assert [estimator.estimate(s) for s in (a, b, c)] == [5, 10, 14]
+
+
+def test_match_updates_rates_and_realised_waits():
+    clock = FakeClock()
+    estimator = WaitEstimator(clock=clock)
+    a, b, c = uuid4(), uuid4(), uuid4()
+    for session_id in (a, b):
+        estimator.add(session_id, "bucket")
+    estimator.add(c, "bucket", priority=True)
+
+    clock.now += 10
+    estimator.remove(a, matched=True)
+
+    # Kovanın eşleşme hızı (tek eşleşme) varış hızının yerini alır
+    assert estimator.estimate(a) is None
+    assert [estimator.estimate(b), estimator.estimate(c)] == [ONE_EVENT_ETA, 2 * ONE_EVENT_ETA]
+    assert estimator.typical_wait() == 10
+    assert estimator.lane_waits() == (None, 10.0)
+
+    clock.now += 20
+    estimator.remove(c, matched=True)
+    assert estimator.lane_waits() == (30.0, 10.0)
+
+
+def test_leaving_moves_the_queue_without_counting_as_a_match():
+    clock = FakeClock()
+    estimator = WaitEstimator(clock=clock)
+    a, b, c = uuid4(), uuid4(), uuid4()
+    for session_id in (a, b, c):
+        estimator.add(session_id, "bucket")
+
+    clock.now += 5
+    estimator.remove(a)
+    estimator.remove(b)
+
+    assert len(estimator) == 1
+    assert estimator.estimate(b) is None
+    assert estimator.estimate(c) == 5  # öndeki kalmadı, hâlâ varış hızı
+    assert estimator.typical_wait() is None
+
+    # Kova boşalıp soğuyunca hızlar sıfırdan öğrenilir
+    estimator.remove(c)
+    estimator.add(a, "bucket")
+    assert estimator.estimate(a) == ONE_EVENT_ETA
+
+
+def test_queue_position_carries_the_estimate(monkeypatch):
+    async def scenario():
+        clock = FakeClock()
+        service = MatchmakingService(wait_estimator=WaitEstimator(clock=clock))
+        monkeypatch.setattr(websocket, "mm_service", service)
+        session_id, ws = uuid4(), RecordingSocket()
+        await service.register_websocket(session_id, ws)
+        # Öndeki kişi (aynı kova, birbirine uymaz)
+        await service.join_queue(QueuedUser(session_id=uuid4(), session_token="token", preferred_country="ZZ"))
+
+        profile = {
+            "gender": "UNSPECIFIED", "country": None, "language": None, "priority": False,
+            "can_use_gender_filter": False, "can_use_country_filter": True,
+        }
+        await websocket.handle_join_queue(session_id, "token", profile, JoinQueueMessage(preferred_country="ZZ"), ws)
+
+        (message,) = ws.sent
+        assert (message["type"], message["position"], message["estimated_wait_sec"]) == ("QUEUE_POSITION", 2, 14)
+        assert service.estimated_wait(session_id) == 14
+
+    asyncio.run(scenario())
@@ -0,0 +1,127 @@
+"""/ws/signaling route: kapanış yolları ve frame türleri (TestClient, in-memory matchmaking)"""
+import asyncio
+from contextlib import ExitStack
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.routes import websocket
+from app.services.session_cache import CachedSession, get_session_cache
+from app.services.signaling_codec import MSGPACK_SUBPROTOCOL, pack, unpack
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(websocket.router)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def _session() -> tuple:
+    """Cache'e yazılmış (DB'ye inmeyen) yeni bir session: (token, session_id)"""
+    token, session_id = uuid4().hex, uuid4()
+    get_session_cache().put(token, CachedSession(session_id, "UNSPECIFIED", None, True))
+    return token, session_id
+
+
+def _receive_until(ws, message_type: str) -> list:
+    """message_type gelene kadar gelen mesajlar (sonuncusu o mesaj)"""
+    received = []
+    while not received or received[-1]["type"] != message_type:
+        received.append(ws.receive_json())
+    return received
+
+
+def _drain(ws) -> list:
+    """Şimdiye kadar kuyruğa girmiş mesajlar: geçersiz bir mesajın ERROR cevabına kadar oku"""
+    ws.send_json({"type": "PING"})
+    return _receive_until(ws, "ERROR")[:-1]
+
+
+def _pair(client, stack: ExitStack):
+    """İki socket bağla ve eşleştir: (ws_a, id_a, ws_b, id_b); a'nın context'i ayrı stack'te"""
+    token_a, id_a = _session()
+    token_b, id_b = _session()
+    ws_b = stack.enter_context(client.websocket_connect(f"/ws/signaling?session_token={token_b}"))
+    ws_a = client.websocket_connect(f"/ws/signaling?session_token={token_a}").__enter__()
+    ws_a.send_json({"type": "JOIN_QUEUE", "preferred_country": "ZZ"})
+    _receive_until(ws_a, "QUEUE_POSITION")
+    ws_b.send_json({"type": "JOIN_QUEUE"})
+    _receive_until(ws_b, "MATCH_FOUND")
+    _receive_until(ws_a, "MATCH_FOUND")
+    return ws_a, id_a, ws_b, id_b
+
+
+def _close(ws, code: int) -> None:
+    """Socket'i kapat ve sunucu tarafındaki handler'ın bitmesini bekle"""
+    ws.close(code=code)
+    ws.__exit__(None, None, None)
+
+
+def _partner_of(session_id):
+    return asyncio.run(websocket.mm_service.get_partner_session_id(session_id))
+
+
+@pytest.fixture
+def restoring(monkeypatch):
+    """Snapshot açık (sunucu kapanışında session'lar korunur)"""
+    monkeypatch.setattr(websocket.mm_service, "snapshot_path", "unused.snapshot")
+    monkeypatch.setattr(websocket.mm_service, "shutting_down", False)
+    return websocket.mm_service
+
+
+def test_client_sent_1012_still_ends_the_match(client, restoring):
+    with ExitStack() as stack:
+        ws_a, id_a, ws_b, id_b = _pair(client, stack)
+        _close(ws_a, websocket.SERVICE_RESTART_CLOSE_CODE)
+
+        assert {"type": "MATCH_ENDED", "reason": "DISCONNECTED"} in _drain(ws_b)
+        assert websocket.mm_service.get_websocket(id_a) is None
+        assert _partner_of(id_b) is None
+
+
+def test_server_shutdown_1012_keeps_the_connection(client, restoring):
+    with ExitStack() as stack:
+        ws_a, id_a, ws_b, id_b = _pair(client, stack)
+        restoring.shutting_down = True
+        _close(ws_a, websocket.SERVICE_RESTART_CLOSE_CODE)
+        assert _partner_of(id_b) == id_a
+        restoring.shutting_down = False
+
+    asyncio.run(restoring.cleanup_session(id_a))
+
+
+def test_wrong_frame_type_is_an_invalid_message(client):
+    token, _ = _session()
+    with client.websocket_connect(f"/ws/signaling?session_token={token}", subprotocols=[MSGPACK_SUBPROTOCOL]) as ws:
+        ws.send_text('{"type": "JOIN_QUEUE"}')
+        assert unpack(ws.receive_bytes())["code"] == "INVALID_MESSAGE"
+
+        # Bağlantı açık kalır, binary frame normal işlenir
+        ws.send_bytes(pack({"type": "JOIN_QUEUE", "preferred_country": "ZZ"}))
+        while (message := unpack(ws.receive_bytes()))["type"] == "ERROR":
+            assert message["code"] == "FILTER_LOCKED"
+        assert message["type"] == "QUEUE_POSITION"
+
+    token, _ = _session()
+    with client.websocket_connect(f"/ws/signaling?session_token={token}") as ws:
+        ws.send_bytes(b'{"type": "LEAVE_QUEUE"}')
+        assert ws.receive_json()["code"] == "INVALID_MESSAGE"
+
+
+def test_handler_error_still_ends_the_match(client, monkeypatch):
+    async def broken_handler(client, message):
+        raise RuntimeError("handler bug")
+
+    monkeypatch.setitem(websocket.SIGNALING_HANDLERS, "CHAT_MESSAGE", broken_handler)
+    with ExitStack() as stack:
+        ws_a, id_a, ws_b, id_b = _pair(client, stack)
+        ws_a.send_json({"type": "CHAT_MESSAGE", "text": "hi"})
+        _close(ws_a, 1000)
+
+        assert {"type": "MATCH_ENDED", "reason": "DISCONNECTED"} in _drain(ws_b)
+        assert websocket.mm_service.get_websocket(id_a) is None
+        assert _partner_of(id_b) is None